@@ -0,0 +1,285 @@
+"""
+Run the sites partitioning migration (6d3a9f2b7c14) both ways on seeded data.
+
+Usage (from the app directory, against an empty scratch database):
+    python -m commands.check_partition_migration [--sites N]
+
+Migrates to the revision before partitioning, seeds sites, groups and links,
+then upgrades to head, downgrades back and upgrades again. After each step
+it checks that every site and link survived, that count=estimate has a row
+estimate, that new sites still get ids and that the country stats match the
+sites (the summary plus its pending deltas at head, the summary alone below
+the deltas revision); at head it also checks that each site lives in its
+country's partition with its links following it, that such a move is logged
+as an update and that a site id cannot be reused in another partition.
+
+Exits with status 1 when a check fails.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+from functools import partial
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from config import get_settings
+from infrastructure.models.site import Site
+from infrastructure.models.site_stats import SiteCountryStats
+from services.counting import _estimate_rows
+from services.site_stats import STATS_FIELDS, _compute_site_stats, verify_site_stats
+from sqlalchemy import pool, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+PARTITIONING = "6d3a9f2b7c14"
+
+SITE_COLUMNS = (
+    "id, name, country::text, installation_date, max_power_megawatt, "
+    "min_power_megawatt, useful_energy_at_1_megawatt, efficiency"
+)
+
+
+def run(step: Callable[[AsyncSession], Awaitable]):
+    """
+    Run `step` in one committed transaction. Alembic's env.py runs its own
+    event loop, so each step gets a loop and a connection of its own.
+    """
+
+    async def in_session():
+        engine = create_async_engine(
+            str(get_settings().db_url), poolclass=pool.NullPool
+        )
+        try:
+            async with AsyncSession(engine) as session:
+                value = await step(session)
+                await session.commit()
+                return value
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(in_session())
+
+
+async def is_empty(session: AsyncSession) -> bool:
+    result = await session.execute(text("SELECT to_regclass('alembic_version')"))
+    return result.scalar_one() is None
+
+
+async def seed(session: AsyncSession, site_count: int) -> None:
+    """Sites spread over the two countries of that schema, most with groups."""
+    rng = random.Random(42)
+    await session.execute(
+        text("INSERT INTO groups (name, type) VALUES (:name, :type)"),
+        [
+            {"name": f"Group {index}", "type": ("group1", "group2")[index % 2]}
+            for index in range(20)
+        ],
+    )
+    await session.execute(
+        text(
+            "INSERT INTO sites (name, country, installation_date, "
+            "max_power_megawatt, min_power_megawatt, efficiency) "
+            "VALUES (:name, CAST(:country AS countryenum), :installation_date, "
+            ":max_power, :min_power, :efficiency)"
+        ),
+        [
+            {
+                "name": f"Site {index}",
+                "country": rng.choice(("FR", "IT")),
+                "installation_date": date(2020, 1, 4) + timedelta(days=index),
+                "max_power": rng.uniform(10, 100),
+                "min_power": rng.uniform(0, 10),
+                "efficiency": rng.choice((None, rng.random())),
+            }
+            for index in range(site_count)
+        ],
+    )
+    await session.execute(
+        text(
+            "INSERT INTO site_group (site_id, group_id) "
+            "SELECT sites.id, groups.id FROM sites CROSS JOIN groups "
+            "WHERE (sites.id + groups.id) % 7 = 0"
+        )
+    )
+
+
+async def snapshot(session: AsyncSession) -> tuple[list, list]:
+    sites = await session.execute(text(f"SELECT {SITE_COLUMNS} FROM sites ORDER BY id"))
+    links = await session.execute(
+        text("SELECT site_id, group_id FROM site_group ORDER BY site_id, group_id")
+    )
+    return sites.all(), links.all()
+
+
+async def count(session: AsyncSession, query: str) -> int:
+    result = await session.execute(text(query))
+    return result.scalar_one()
+
+
+async def check_partitions(session: AsyncSession) -> list[str]:
+    """
+    At head: rows sit in their country's partition, links follow moves,
+    moves are logged as updates and ids stay unique across partitions.
+    """
+    failures = []
+    misplaced = await count(
+        session,
+        "SELECT count(*) FROM sites "
+        "WHERE tableoid::regclass::text <> 'sites_' || lower(country::text)",
+    )
+    if misplaced:
+        failures.append(f"{misplaced} sites outside their country partition")
+
+    # Move a linked site to another country: its row changes partition and
+    # ON UPDATE CASCADE carries the new country to its links
+    result = await session.execute(
+        text(
+            "UPDATE sites SET country = CASE country WHEN 'DE' THEN 'ES' ELSE 'DE' "
+            "END::countryenum WHERE id = (SELECT min(site_id) FROM site_group) "
+            "RETURNING id, tableoid::regclass::text, country::text"
+        )
+    )
+    moved = result.one()
+    if moved[1] != f"sites_{moved[2].lower()}":
+        failures.append(f"Moved site {moved[0]} landed in {moved[1]}")
+    stale = await count(
+        session,
+        "SELECT count(*) FROM site_group JOIN sites ON sites.id = site_group.site_id "
+        "WHERE site_group.site_country <> sites.country",
+    )
+    if stale:
+        failures.append(f"{stale} links with a stale site_country")
+    # ... and the change log records the move as one update
+    result = await session.execute(
+        text(
+            "SELECT array_agg(operation::text ORDER BY id) FROM change_log "
+            "WHERE entity = 'site' AND entity_id = :id "
+            "AND txid = pg_current_xact_id()::text::bigint"
+        ),
+        {"id": moved[0]},
+    )
+    logged = result.scalar_one()
+    if logged != ["update"]:
+        failures.append(f"Move of site {moved[0]} logged as {logged}")
+
+    # An id already used in one partition is refused in another (the moved
+    # site is in DE or ES)
+    try:
+        async with session.begin_nested():
+            await session.execute(
+                text(
+                    "INSERT INTO sites (id, name, country, installation_date, "
+                    "max_power_megawatt, min_power_megawatt) "
+                    "VALUES (:id, 'Duplicate', 'FR', '2030-01-05', 1, 0)"
+                ),
+                {"id": moved[0]},
+            )
+        failures.append(f"Duplicate site id {moved[0]} was accepted")
+    except IntegrityError:
+        pass
+    return failures
+
+
+async def check_data(session: AsyncSession, expected: tuple[list, list]) -> list[str]:
+    """
+    Every step: sites and links unchanged, the row estimate available and
+    new sites still get ids.
+    """
+    failures = []
+    sites, links = await snapshot(session)
+    if sites != expected[0]:
+        lost = {row[0] for row in expected[0]} - {row[0] for row in sites}
+        failures.append(f"Sites changed ({len(lost)} missing)")
+    if links != expected[1]:
+        failures.append(f"Links changed ({len(links)} of {len(expected[1])} left)")
+
+    # The migrations analyze sites, so count=estimate needs no COUNT(*)
+    estimate = await _estimate_rows(session, select(Site))
+    if estimate != len(sites):
+        failures.append(f"Row estimate is {estimate}, not {len(sites)}")
+
+    # A new site gets an id past the copied ones; it is removed again
+    result = await session.execute(
+        text(
+            "INSERT INTO sites (name, country, installation_date, "
+            "max_power_megawatt, min_power_megawatt) "
+            "VALUES ('Probe', 'FR', '2030-01-05', 1, 0) RETURNING id"
+        )
+    )
+    new_id = result.scalar_one()
+    if sites and new_id <= sites[-1][0]:
+        failures.append(f"New site got id {new_id}, already used")
+    await session.execute(text("DELETE FROM sites WHERE id = :id"), {"id": new_id})
+    return failures
+
+
+async def check_summary_stats(session: AsyncSession) -> list[str]:
+    """
+    Below the stats deltas revision: the summary table alone matches the sites.
+    """
+    actual = await _compute_site_stats(session)
+    result = await session.execute(select(SiteCountryStats))
+    stored = {stats.country: stats for stats in result.scalars().all()}
+    failures = []
+    for country in sorted(set(actual) | set(stored)):
+        for field in STATS_FIELDS:
+            stored_value = getattr(stored.get(country), field, 0)
+            actual_value = actual.get(country, {}).get(field, 0)
+            if not math.isclose(stored_value, actual_value, abs_tol=1e-6):
+                failures.append(
+                    f"{country.value} {field}: "
+                    f"stored={stored_value} actual={actual_value}"
+                )
+    return failures
+
+
+def main(site_count: int) -> int:
+    if not run(is_empty):
+        print("Expects an empty scratch database (alembic_version exists).")
+        return 2
+
+    config = Config("alembic.ini")
+    before = ScriptDirectory.from_config(config).get_revision(PARTITIONING)
+    command.upgrade(config, before.down_revision)
+    run(partial(seed, site_count=site_count))
+    expected = run(snapshot)
+    print(f"Seeded {len(expected[0])} sites and {len(expected[1])} links.")
+
+    failures = []
+    for label, migrate, at_head in (
+        ("upgrade", lambda: command.upgrade(config, "head"), True),
+        ("downgrade", lambda: command.downgrade(config, before.down_revision), False),
+        ("upgrade again", lambda: command.upgrade(config, "head"), True),
+    ):
+        migrate()
+        step_failures = run(partial(check_data, expected=expected))
+        if at_head:
+            # Its own transaction: the check sets the isolation level first
+            drifts = run(verify_site_stats)
+        else:
+            drifts = run(check_summary_stats)
+        step_failures += [f"Stats drift: {drift}" for drift in drifts]
+        if at_head:
+            step_failures += run(check_partitions)
+            # The moved site is now part of the expected data
+            expected = run(snapshot)
+        failures += [f"{label}: {failure}" for failure in step_failures]
+        print(f"{label}: {'FAILED' if step_failures else 'ok'}")
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sites", type=int, default=5000, help="number of sites to seed"
+    )
+    sys.exit(main(parser.parse_args().sites))
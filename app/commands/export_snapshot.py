@@ -0,0 +1,56 @@
+"""
+Export a consistent snapshot of the site and group tables for analytics.
+
+Usage (from the app directory):
+    python -m commands.export_snapshot OUTPUT_DIR [--format parquet|arrow]
+
+Writes one file per table (sites, groups, site_group, group_group), all
+read from the same REPEATABLE READ transaction.
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from config import get_settings
+from infrastructure.db import async_session_maker, statement_timeout_ms
+from services.export import (
+    EXPORT_FILE_EXTENSIONS,
+    ExportFormatEnum,
+    ExportTableEnum,
+    export_table,
+)
+
+
+async def main(output_dir: Path, fmt: ExportFormatEnum) -> int:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    settings = get_settings()
+    batch_size = settings.export_batch_size
+    statement_timeout_ms.set(settings.export_statement_timeout_ms)
+
+    async with async_session_maker() as session:
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ"}
+        )
+        for table in ExportTableEnum:
+            path = output_dir / f"{table.value}.{EXPORT_FILE_EXTENSIONS[fmt]}"
+            with path.open("wb") as file:
+                async for chunk in export_table(table, fmt, session, batch_size):
+                    file.write(chunk)
+            print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output_dir", type=Path, help="directory to write into")
+    parser.add_argument(
+        "--format",
+        type=ExportFormatEnum,
+        choices=list(ExportFormatEnum),
+        default=ExportFormatEnum.parquet,
+        help="file format (default: parquet)",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.output_dir, args.format)))
@@ -0,0 +1,39 @@
+"""
+Recompute the per-country site stats from scratch and report drift.
+
+Usage (from the app directory):
+    python -m commands.verify_site_stats [--fix]
+
+Exits with status 1 when drift is found and `--fix` was not given.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from infrastructure.db import async_session_maker
+from services.site_stats import verify_site_stats
+
+
+async def main(fix: bool) -> int:
+    async with async_session_maker() as session:
+        drifts = await verify_site_stats(session, fix=fix)
+
+    for drift in drifts:
+        print(
+            f"{drift['country'].value} {drift['field']}: "
+            f"stored={drift['stored']} actual={drift['actual']}"
+        )
+    if not drifts:
+        print("Site stats are consistent.")
+    elif fix:
+        print(f"Rebuilt site stats ({len(drifts)} drifted fields).")
+    return 1 if drifts and not fix else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--fix", action="store_true", help="rebuild the stats from the sites table"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args().fix)))
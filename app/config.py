@@ -8,6 +8,83 @@ class Settings(BaseSettings):
     db_url: PostgresDsn
     db_test_url: PostgresDsn
 
+    # Connection pool and query limits
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
+    db_pool_timeout_seconds: float = 30.0
+    db_statement_timeout_ms: int = 30_000
+
+    # Slow-query log. A threshold of 0 turns it off; sampled slow reads are
+    # explained into a JSON lines file.
+    slow_query_threshold_ms: float = 500.0
+    slow_query_explain_sample_rate: float = 0.0
+    slow_query_explain_max_pending: int = 2
+    slow_query_explain_path: str = "slow_queries/plans.jsonl"
+
+    # Admission control. The read, write and export limits together should
+    # stay within DB_POOL_SIZE; the overflow is left to background jobs.
+    admission_read_limit: int = 6
+    admission_write_limit: int = 3
+    admission_export_limit: int = 1
+    admission_max_waiting: int = 50
+    admission_wait_timeout_seconds: float = 2.0
+    admission_retry_after_seconds: int = 1
+
+    # Group commit of POST /sites and POST /groups: concurrent creates are
+    # written in one transaction per batch
+    write_batching_enabled: bool = False
+    write_batch_max_delay_ms: float = 5.0
+    write_batch_max_size: int = 100
+
+    # In-memory read model serving GET /sites (except fuzzy search), loaded
+    # at startup and kept up to date from the change notifications
+    site_read_model_enabled: bool = False
+
+    # Response encoding
+    compression_minimum_size: int = 1024
+    compression_offload_size: int = 262_144
+    encoding_offload_min_items: int = 1000
+
+    # Background jobs
+    job_workers: int = 2
+    job_max_pending: int = 100
+    job_chunk_size: int = 500
+    job_poll_interval_seconds: float = 5.0
+    job_stale_after_seconds: int = 300
+
+    # Per-country site stats: writes append deltas, folded into the summary
+    # this often
+    site_stats_fold_interval_seconds: float = 10.0
+
+    # Server-sent events
+    events_queue_size: int = 1000
+    events_keepalive_seconds: float = 15.0
+
+    # Request tracing. Traces are written as OTLP/JSON to TRACING_FILE_PATH
+    # ("file") or posted to an OTLP/HTTP collector ("otlp") by a background
+    # thread, in batches; traces beyond the queue size are dropped.
+    tracing_enabled: bool = False
+    tracing_exporter: str = "file"
+    tracing_file_path: str = "traces/traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318"
+    tracing_sample_rate: float = 1.0
+    tracing_service_name: str = "python-technical-test"
+    tracing_export_queue_size: int = 1000
+    tracing_export_batch_size: int = 64
+
+    # Snapshot exports
+    export_batch_size: int = 50_000
+    export_statement_timeout_ms: int = 600_000
+
+    # Request profiling (requires pyinstrument)
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval_seconds: float = 0.001
+    profiling_format: str = "speedscope"
+    profiling_output_dir: str = "profiles"
+
     class Config:
         env_file = ".env"
         extra = "allow"
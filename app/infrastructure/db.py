@@ -1,15 +1,196 @@
+import asyncio
+import json
+import random
+import time
 from collections.abc import AsyncGenerator
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
 
 from config import get_settings
+from infrastructure.tracing import current_span, tracer
+from logger import get_logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
+from starlette.concurrency import run_in_threadpool
 
 Base = declarative_base()
 
-engine = create_async_engine(str(get_settings().db_url))
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Statement timeout for the current request, set by the admission control
+# middleware. None keeps the connection default (DB_STATEMENT_TIMEOUT_MS).
+statement_timeout_ms: ContextVar[int | None] = ContextVar(
+    "statement_timeout_ms", default=None
+)
+
+# Where the current queries come from ("GET /sites/", "job 12 (bulk_import)"),
+# for the slow-query log. Set by the admission control middleware and the
+# job runner.
+query_origin: ContextVar[str | None] = ContextVar("query_origin", default=None)
+
+# Set while a sampled slow query is being explained, so that the EXPLAIN
+# itself is neither logged nor explained
+_explaining: ContextVar[bool] = ContextVar("_explaining", default=False)
+_explain_tasks: set[asyncio.Task] = set()
+
+engine = create_async_engine(
+    str(settings.db_url),
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    connect_args={
+        "server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}
+    },
+)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
+@event.listens_for(engine.sync_engine, "begin")
+def apply_statement_timeout(connection: Connection) -> None:
+    """
+    Override the connection's statement timeout for this transaction when
+    the current request asks for a different one. SET LOCAL ends with the
+    transaction, so the pooled connection keeps its default.
+    """
+    timeout = statement_timeout_ms.get()
+    if timeout is not None and timeout != settings.db_statement_timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def start_query_timer(
+    connection: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    context._trace_span = tracer.start_span(
+        (statement.split(None, 1) or ["SQL"])[0].upper(),
+        kind="client",
+        **{"db.system": "postgresql", "db.statement": statement},
+    )
+    context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def stop_query_timer(
+    connection: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    duration_ms = (time.perf_counter() - context._query_started_at) * 1000
+    if context._trace_span is not None:
+        context._trace_span.end()
+    record_query(statement, parameters, duration_ms, executemany)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def end_failed_query_span(exception_context: ExceptionContext) -> None:
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.end(exception_context.original_exception)
+
+
+def _format_params(parameters: Any, limit: int = 500) -> str:
+    # selectin loads and batch reads can carry thousands of ids
+    text = repr(parameters)
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text)} chars)"
+
+
+def record_query(
+    statement: str, parameters: Any, duration_ms: float, executemany: bool = False
+) -> None:
+    """
+    Log a statement that ran for at least SLOW_QUERY_THRESHOLD_MS (0 turns
+    the log off), and sample slow reads for an EXPLAIN ANALYZE.
+    """
+    threshold = settings.slow_query_threshold_ms
+    if not threshold or duration_ms < threshold or _explaining.get():
+        return
+    origin = query_origin.get() or "-"
+    logger.warning(
+        f"Slow query ({duration_ms:.0f} ms, {origin}): {statement} "
+        f"params={_format_params(parameters)}"
+    )
+    if (
+        not executemany
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and len(_explain_tasks) < settings.slow_query_explain_max_pending
+        and random.random() < settings.slow_query_explain_sample_rate
+    ):
+        schedule_explain(statement, parameters, duration_ms, origin)
+
+
+def schedule_explain(
+    statement: str, parameters: Any, duration_ms: float, origin: str
+) -> None:
+    """
+    Run `explain_query` in the background on the running event loop. Does
+    nothing when called outside of one.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(explain_query(statement, parameters, duration_ms, origin))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
+
+async def explain_query(
+    statement: str, parameters: Any, duration_ms: float, origin: str
+) -> None:
+    """
+    Re-run a slow query under EXPLAIN (ANALYZE, BUFFERS) on a connection of
+    its own and append the plan to SLOW_QUERY_EXPLAIN_PATH as a JSON line.
+
+    ANALYZE executes the statement, so it runs in a read-only transaction
+    that is rolled back: statements with side effects fail instead, and the
+    failure is only logged.
+    """
+    _explaining.set(True)
+    current_span.set(None)  # keep the EXPLAIN out of the request's trace
+    try:
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}",
+                tuple(parameters or ()),
+            )
+            plan = result.scalar_one()
+            await connection.rollback()
+    except Exception as exc:
+        logger.warning(f"Could not explain slow query from {origin}: {exc}")
+        return
+
+    record = {
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "origin": origin,
+        "duration_ms": round(duration_ms, 3),
+        "statement": statement,
+        "parameters": list(parameters or ()),
+        "plan": json.loads(plan) if isinstance(plan, str) else plan,
+    }
+    await run_in_threadpool(_append_record, record)
+
+
+def _append_record(record: dict) -> None:
+    path = Path(settings.slow_query_explain_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as store:
+        store.write(json.dumps(record, default=str) + "\n")
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     try:
         db = async_session_maker()
@@ -0,0 +1,215 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any
+
+from config import get_settings
+from infrastructure.db import async_session_maker, query_origin
+from infrastructure.models.job import Job, JobKindEnum, JobStatusEnum
+from logger import get_logger
+from sqlalchemy import func, select, update
+
+logger = get_logger(__name__)
+
+
+class JobCancelledError(Exception):
+    """
+    Raised at a checkpoint when cancellation of the running job was requested.
+    """
+
+
+class JobContext:
+    """
+    Handle given to a job handler to report progress between chunks.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+
+    async def checkpoint(self, processed: int, total: int | None = None) -> None:
+        """
+        Persist progress and the heartbeat in a short transaction of its own,
+        then raise `JobCancelledError` if the job was asked to stop.
+        """
+        values: dict[str, Any] = {"processed": processed, "heartbeat_at": func.now()}
+        if total is not None:
+            values["total"] = total
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(**values)
+                .returning(Job.cancel_requested)
+            )
+            cancel_requested = result.scalar_one()
+            await session.commit()
+        if cancel_requested:
+            raise JobCancelledError()
+
+
+JobHandler = Callable[[dict, JobContext], Awaitable[dict | None]]
+
+
+class JobRunner:
+    """
+    In-process pool of workers executing jobs stored in the `jobs` table.
+
+    The table is the queue: workers claim the oldest pending job with
+    `FOR UPDATE SKIP LOCKED`, so several API processes can share it and
+    nothing is lost on restart. Submissions wake idle workers immediately;
+    otherwise they poll every `poll_interval` seconds. Jobs left `running`
+    by a dead process are put back to `pending` once their heartbeat is
+    older than `stale_after`; the workers check for them on start and every
+    `stale_after / 2` while running.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, stale_after: timedelta):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._handlers: dict[JobKindEnum, JobHandler] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._next_recovery = 0.0
+
+    def handler(self, kind: JobKindEnum) -> Callable[[JobHandler], JobHandler]:
+        """
+        Register the coroutine executing jobs of `kind`.
+        """
+
+        def register(func: JobHandler) -> JobHandler:
+            self._handlers[kind] = func
+            return func
+
+        return register
+
+    def notify(self) -> None:
+        """
+        Wake idle workers after a submission.
+        """
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        self._next_recovery = 0.0
+        await self._recover_if_due()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"job-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.info(f"Job runner started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job runner stopped")
+
+    async def _recover_if_due(self) -> None:
+        """
+        Re-queue abandoned jobs unless it was done less than `stale_after / 2`
+        ago, so jobs of a dead process are picked up without a restart here.
+        """
+        now = asyncio.get_running_loop().time()
+        if now < self._next_recovery:
+            return
+        # Set before awaiting so the other workers skip this round
+        self._next_recovery = now + self.stale_after.total_seconds() / 2
+        await self._recover_stale_jobs()
+
+    async def _recover_stale_jobs(self) -> None:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(Job)
+                .where(
+                    Job.status == JobStatusEnum.running,
+                    func.coalesce(Job.heartbeat_at, Job.started_at)
+                    < func.now() - self.stale_after,
+                )
+                .values(status=JobStatusEnum.pending)
+                .returning(Job.id)
+            )
+            recovered = result.scalars().all()
+            await session.commit()
+        if recovered:
+            logger.warning(f"Re-queued abandoned jobs: {recovered}")
+
+    async def _claim(self) -> tuple[int, JobKindEnum, dict] | None:
+        next_job = (
+            select(Job.id)
+            .where(Job.status == JobStatusEnum.pending)
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == next_job)
+                .values(
+                    status=JobStatusEnum.running,
+                    started_at=func.coalesce(Job.started_at, func.now()),
+                    heartbeat_at=func.now(),
+                )
+                .returning(Job.id, Job.kind, Job.params)
+            )
+            claimed = result.first()
+            await session.commit()
+        return tuple(claimed) if claimed else None
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await self._recover_if_due()
+                self._wakeup.clear()
+                claimed = await self._claim()
+                if claimed is None:
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), timeout=self.poll_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(*claimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep the worker alive through database hiccups
+                logger.exception("Job worker iteration failed")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, job_id: int, kind: JobKindEnum, params: dict) -> None:
+        logger.info(f"Running job {job_id} ({kind.value})")
+        values: dict[str, Any]
+        origin_token = query_origin.set(f"job {job_id} ({kind.value})")
+        try:
+            handler = self._handlers[kind]
+            outcome = await handler(params, JobContext(job_id))
+            values = {"status": JobStatusEnum.succeeded, "result": outcome}
+        except JobCancelledError:
+            values = {"status": JobStatusEnum.cancelled}
+        except Exception as exc:
+            logger.exception(f"Job {job_id} failed")
+            values = {"status": JobStatusEnum.failed, "error": str(exc)}
+        finally:
+            query_origin.reset(origin_token)
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(**values, finished_at=func.now())
+            )
+            await session.commit()
+        logger.info(f"Job {job_id} finished: {values['status'].value}")
+
+
+settings = get_settings()
+job_runner = JobRunner(
+    workers=settings.job_workers,
+    poll_interval=settings.job_poll_interval_seconds,
+    stale_after=timedelta(seconds=settings.job_stale_after_seconds),
+)
@@ -3,9 +3,11 @@ from logging.config import fileConfig
 
 from alembic import context
 from config import get_settings
-from infrastructure.db import Base, engine
+from infrastructure.db import Base
 from infrastructure.models import *  # noqa: F403
+from sqlalchemy import pool
 from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -56,7 +58,13 @@ async def run_async_migrations() -> None:
 
     """
 
-    connectable = engine
+    # Not the application engine: migrations build indexes and rewrite
+    # tables, so they must not run under the API's statement timeout
+    connectable = create_async_engine(
+        str(get_settings().db_url),
+        poolclass=pool.NullPool,
+        connect_args={"server_settings": {"statement_timeout": "0"}},
+    )
 
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
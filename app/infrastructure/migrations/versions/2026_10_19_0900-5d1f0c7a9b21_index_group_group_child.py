@@ -0,0 +1,32 @@
+"""Index group_group child column
+
+Revision ID: 5d1f0c7a9b21
+Revises: 73e0381bc79b
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d1f0c7a9b21"
+down_revision: str | None = "73e0381bc79b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The primary key (parent_group_id, child_group_id) only serves lookups by
+    # parent; the cycle check walks the hierarchy upwards by child.
+    op.create_index(
+        op.f("ix_group_group_child_group_id"),
+        "group_group",
+        ["child_group_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_group_group_child_group_id"), table_name="group_group")
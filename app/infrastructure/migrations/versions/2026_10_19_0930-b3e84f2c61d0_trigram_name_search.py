@@ -0,0 +1,42 @@
+"""Trigram name search indexes
+
+Revision ID: b3e84f2c61d0
+Revises: 5d1f0c7a9b21
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e84f2c61d0"
+down_revision: str | None = "5d1f0c7a9b21"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_sites_name_trgm",
+        "sites",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_groups_name_trgm",
+        "groups",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_groups_name_trgm", table_name="groups")
+    op.drop_index("ix_sites_name_trgm", table_name="sites")
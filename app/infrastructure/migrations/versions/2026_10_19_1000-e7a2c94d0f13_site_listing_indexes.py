@@ -0,0 +1,36 @@
+"""Site listing filter and sort indexes
+
+Revision ID: e7a2c94d0f13
+Revises: b3e84f2c61d0
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a2c94d0f13"
+down_revision: str | None = "b3e84f2c61d0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SORT_FIELDS = ("installation_date", "max_power_megawatt", "min_power_megawatt")
+
+
+def upgrade() -> None:
+    for field in SORT_FIELDS:
+        op.create_index(f"ix_sites_{field}_id", "sites", [field, "id"], unique=False)
+        op.create_index(
+            f"ix_sites_country_{field}_id",
+            "sites",
+            ["country", field, "id"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    for field in reversed(SORT_FIELDS):
+        op.drop_index(f"ix_sites_country_{field}_id", table_name="sites")
+        op.drop_index(f"ix_sites_{field}_id", table_name="sites")
@@ -0,0 +1,135 @@
+"""Site country stats
+
+Revision ID: 0c5b7e2d8a46
+Revises: e7a2c94d0f13
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0c5b7e2d8a46"
+down_revision: str | None = "e7a2c94d0f13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATS_COLUMNS = (
+    "country, site_count, total_max_power_megawatt, "
+    "efficiency_sum, efficiency_count, useful_energy_sum, useful_energy_count"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "site_country_stats",
+        sa.Column(
+            "country",
+            postgresql.ENUM(name="countryenum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("site_count", sa.Integer(), nullable=False),
+        sa.Column("total_max_power_megawatt", sa.Float(), nullable=False),
+        sa.Column("efficiency_sum", sa.Float(), nullable=False),
+        sa.Column("efficiency_count", sa.Integer(), nullable=False),
+        sa.Column("useful_energy_sum", sa.Float(), nullable=False),
+        sa.Column("useful_energy_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("country"),
+    )
+
+    # Apply a +1/-1 delta of one site row to its country's aggregates
+    op.execute(
+        f"""
+        CREATE FUNCTION site_country_stats_apply(
+            p_country countryenum,
+            p_sign integer,
+            p_max_power double precision,
+            p_efficiency double precision,
+            p_useful_energy double precision
+        ) RETURNS void AS $$
+        BEGIN
+            INSERT INTO site_country_stats AS s ({STATS_COLUMNS})
+            VALUES (
+                p_country,
+                p_sign,
+                p_sign * p_max_power,
+                p_sign * COALESCE(p_efficiency, 0),
+                p_sign * (p_efficiency IS NOT NULL)::integer,
+                p_sign * COALESCE(p_useful_energy, 0),
+                p_sign * (p_useful_energy IS NOT NULL)::integer
+            )
+            ON CONFLICT (country) DO UPDATE SET
+                site_count = s.site_count + EXCLUDED.site_count,
+                total_max_power_megawatt =
+                    s.total_max_power_megawatt + EXCLUDED.total_max_power_megawatt,
+                efficiency_sum = s.efficiency_sum + EXCLUDED.efficiency_sum,
+                efficiency_count = s.efficiency_count + EXCLUDED.efficiency_count,
+                useful_energy_sum = s.useful_energy_sum + EXCLUDED.useful_energy_sum,
+                useful_energy_count =
+                    s.useful_energy_count + EXCLUDED.useful_energy_count;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION site_country_stats_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM site_country_stats_apply(
+                    OLD.country, -1, OLD.max_power_megawatt,
+                    OLD.efficiency, OLD.useful_energy_at_1_megawatt
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM site_country_stats_apply(
+                    NEW.country, 1, NEW.max_power_megawatt,
+                    NEW.efficiency, NEW.useful_energy_at_1_megawatt
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER sites_country_stats
+        AFTER INSERT OR DELETE
+            OR UPDATE OF country, max_power_megawatt, efficiency,
+                useful_energy_at_1_megawatt
+        ON sites
+        FOR EACH ROW EXECUTE FUNCTION site_country_stats_trigger()
+        """
+    )
+
+    # Backfill from the existing sites
+    op.execute(
+        f"""
+        INSERT INTO site_country_stats ({STATS_COLUMNS})
+        SELECT
+            country,
+            count(*),
+            sum(max_power_megawatt),
+            COALESCE(sum(efficiency), 0),
+            count(efficiency),
+            COALESCE(sum(useful_energy_at_1_megawatt), 0),
+            count(useful_energy_at_1_megawatt)
+        FROM sites
+        GROUP BY country
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER sites_country_stats ON sites")
+    op.execute("DROP FUNCTION site_country_stats_trigger()")
+    op.execute(
+        "DROP FUNCTION site_country_stats_apply("
+        "countryenum, integer, double precision, double precision, double precision)"
+    )
+    op.drop_table("site_country_stats")
@@ -0,0 +1,168 @@
+"""Change log
+
+Revision ID: 4f8e1b7c3d52
+Revises: 9a4d3f61c2e8
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8e1b7c3d52"
+down_revision: str | None = "9a4d3f61c2e8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+ENTITY_TABLES = {"site": "sites", "group": "groups"}
+# entity -> (table, entity_id column, related_id column)
+LINK_TABLES = {
+    "site_group": ("site_group", "site_id", "group_id"),
+    "group_group": ("group_group", "parent_group_id", "child_group_id"),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "txid",
+            sa.BigInteger(),
+            server_default=sa.text("pg_current_xact_id()::text::bigint"),
+            nullable=False,
+        ),
+        sa.Column(
+            "entity",
+            sa.Enum(
+                "site", "group", "site_group", "group_group", name="changeentityenum"
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "operation",
+            sa.Enum("insert", "update", "delete", name="changeoperationenum"),
+            nullable=False,
+        ),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("related_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_change_log_txid_id", "change_log", ["txid", "id"])
+
+    for table in ENTITY_TABLES.values():
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=False,
+            ),
+        )
+
+    op.execute(
+        """
+        CREATE FUNCTION touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION log_entity_change() RETURNS trigger AS $$
+        DECLARE
+            changed_id integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed_id := OLD.id;
+            ELSE
+                changed_id := NEW.id;
+            END IF;
+            INSERT INTO change_log (entity, operation, entity_id)
+            VALUES (
+                TG_ARGV[0]::changeentityenum,
+                lower(TG_OP)::changeoperationenum,
+                changed_id
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION log_link_change() RETURNS trigger AS $$
+        DECLARE
+            link jsonb;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                link := to_jsonb(OLD);
+            ELSE
+                link := to_jsonb(NEW);
+            END IF;
+            INSERT INTO change_log (entity, operation, entity_id, related_id)
+            VALUES (
+                TG_ARGV[0]::changeentityenum,
+                lower(TG_OP)::changeoperationenum,
+                (link ->> TG_ARGV[1])::integer,
+                (link ->> TG_ARGV[2])::integer
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    for entity, table in ENTITY_TABLES.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_touch_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION touch_updated_at()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_change_log
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION log_entity_change('{entity}')
+            """
+        )
+    for entity, (table, entity_column, related_column) in LINK_TABLES.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_change_log
+            AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION
+                log_link_change('{entity}', '{entity_column}', '{related_column}')
+            """
+        )
+
+
+def downgrade() -> None:
+    for table, _, _ in LINK_TABLES.values():
+        op.execute(f"DROP TRIGGER {table}_change_log ON {table}")
+    for table in ENTITY_TABLES.values():
+        op.execute(f"DROP TRIGGER {table}_change_log ON {table}")
+        op.execute(f"DROP TRIGGER {table}_touch_updated_at ON {table}")
+        op.drop_column(table, "updated_at")
+    op.execute("DROP FUNCTION log_link_change()")
+    op.execute("DROP FUNCTION log_entity_change()")
+    op.execute("DROP FUNCTION touch_updated_at()")
+    op.drop_index("ix_change_log_txid_id", table_name="change_log")
+    op.drop_table("change_log")
+    op.execute("DROP TYPE changeoperationenum")
+    op.execute("DROP TYPE changeentityenum")
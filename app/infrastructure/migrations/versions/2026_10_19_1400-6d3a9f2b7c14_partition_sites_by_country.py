@@ -0,0 +1,171 @@
+"""Partition sites by country
+
+Revision ID: 6d3a9f2b7c14
+Revises: 4f8e1b7c3d52
+Create Date: 2026-10-19 14:00:00.000000
+
+Rebuilds `sites` as a table list-partitioned on `country`, one partition per
+country (`sites_fr`, `sites_de`, ...). A primary key on a partitioned table
+must contain the partition key, so it becomes (id, country); `site_group`
+gains a `site_country` column to reference it, kept in sync by ON UPDATE
+CASCADE when a site changes country. That key no longer makes `id` unique by
+itself; 3c9e5a7d2b18 enforces it again across partitions.
+
+The table is rewritten under an exclusive lock: run it in a maintenance
+window on large databases.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "6d3a9f2b7c14"
+down_revision: str | None = "4f8e1b7c3d52"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COUNTRIES = ("FR", "DE", "ES", "IT")
+SORT_FIELDS = ("installation_date", "max_power_megawatt", "min_power_megawatt")
+
+
+def create_site_indexes() -> None:
+    # On the partitioned table each index is created on every partition
+    op.create_index(
+        "ix_sites_name_trgm",
+        "sites",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    for field in SORT_FIELDS:
+        op.create_index(f"ix_sites_{field}_id", "sites", [field, "id"], unique=False)
+
+
+def create_site_triggers() -> None:
+    # Same definitions as in 0c5b7e2d8a46 and 4f8e1b7c3d52
+    op.execute(
+        """
+        CREATE TRIGGER sites_country_stats
+        AFTER INSERT OR DELETE
+            OR UPDATE OF country, max_power_megawatt, efficiency,
+                useful_energy_at_1_megawatt
+        ON sites
+        FOR EACH ROW EXECUTE FUNCTION site_country_stats_trigger()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER sites_touch_updated_at
+        BEFORE UPDATE ON sites
+        FOR EACH ROW EXECUTE FUNCTION touch_updated_at()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER sites_change_log
+        AFTER INSERT OR UPDATE OR DELETE ON sites
+        FOR EACH ROW EXECUTE FUNCTION log_entity_change('site')
+        """
+    )
+
+
+def replace_sites_table(new_table: str) -> None:
+    """
+    Copy `sites` into `new_table`, then swap it in place of `sites`. The
+    old table's indexes and triggers go with it.
+    """
+    op.execute(f"INSERT INTO {new_table} SELECT * FROM sites")
+    op.execute(f"ALTER SEQUENCE sites_id_seq OWNED BY {new_table}.id")
+    op.drop_table("sites")
+    op.rename_table(new_table, "sites")
+    op.execute(f"ALTER TABLE sites RENAME CONSTRAINT {new_table}_pkey TO sites_pkey")
+    create_site_indexes()
+    create_site_triggers()
+
+
+def upgrade() -> None:
+    # The first migration only created FR and IT. New enum values cannot be
+    # used in the transaction that adds them.
+    with op.get_context().autocommit_block():
+        for country in COUNTRIES:
+            op.execute(f"ALTER TYPE countryenum ADD VALUE IF NOT EXISTS '{country}'")
+
+    op.execute("LOCK TABLE sites, site_group IN ACCESS EXCLUSIVE MODE")
+
+    op.execute(
+        """
+        CREATE TABLE sites_partitioned (
+            LIKE sites INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, country)
+        ) PARTITION BY LIST (country)
+        """
+    )
+    for country in COUNTRIES:
+        op.execute(
+            f"CREATE TABLE sites_{country.lower()} PARTITION OF sites_partitioned "
+            f"FOR VALUES IN ('{country}')"
+        )
+
+    op.add_column(
+        "site_group",
+        sa.Column(
+            "site_country",
+            postgresql.ENUM(name="countryenum", create_type=False),
+            nullable=True,
+        ),
+    )
+    op.execute(
+        """
+        UPDATE site_group SET site_country = sites.country
+        FROM sites WHERE sites.id = site_group.site_id
+        """
+    )
+    op.alter_column("site_group", "site_country", nullable=False)
+    op.drop_constraint("site_group_site_id_fkey", "site_group", type_="foreignkey")
+
+    replace_sites_table("sites_partitioned")
+
+    op.create_foreign_key(
+        "site_group_site_id_fkey",
+        "site_group",
+        "sites",
+        ["site_id", "site_country"],
+        ["id", "country"],
+        onupdate="CASCADE",
+    )
+    # Autovacuum never analyzes a partitioned parent: give the planner (and
+    # count=estimate) statistics for the parent and every partition now
+    op.execute("ANALYZE sites")
+
+
+def downgrade() -> None:
+    # The added countryenum values are kept: Postgres cannot drop them
+    op.execute("LOCK TABLE sites, site_group IN ACCESS EXCLUSIVE MODE")
+    op.drop_constraint("site_group_site_id_fkey", "site_group", type_="foreignkey")
+
+    op.execute(
+        """
+        CREATE TABLE sites_plain (
+            LIKE sites INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    replace_sites_table("sites_plain")
+    op.create_index("ix_sites_id", "sites", ["id"], unique=False)
+    for field in SORT_FIELDS:
+        op.create_index(
+            f"ix_sites_country_{field}_id",
+            "sites",
+            ["country", field, "id"],
+            unique=False,
+        )
+
+    op.create_foreign_key(
+        "site_group_site_id_fkey", "site_group", "sites", ["site_id"], ["id"]
+    )
+    op.drop_column("site_group", "site_country")
+    op.execute("ANALYZE sites")
@@ -0,0 +1,79 @@
+"""Cascade link deletes
+
+Revision ID: 8b7c2e5d1f90
+Revises: 6d3a9f2b7c14
+Create Date: 2026-10-19 15:00:00.000000
+
+Deleting a site or group now deletes its site_group / group_group links in
+the database, in the same statement.
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b7c2e5d1f90"
+down_revision: str | None = "6d3a9f2b7c14"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# name -> (table, columns, referred table, referred columns, ON UPDATE)
+FOREIGN_KEYS = {
+    "site_group_site_id_fkey": (
+        "site_group",
+        ["site_id", "site_country"],
+        "sites",
+        ["id", "country"],
+        "CASCADE",
+    ),
+    "site_group_group_id_fkey": ("site_group", ["group_id"], "groups", ["id"], None),
+    "group_group_parent_group_id_fkey": (
+        "group_group",
+        ["parent_group_id"],
+        "groups",
+        ["id"],
+        None,
+    ),
+    "group_group_child_group_id_fkey": (
+        "group_group",
+        ["child_group_id"],
+        "groups",
+        ["id"],
+        None,
+    ),
+}
+
+
+def replace_foreign_keys(ondelete: str | None) -> None:
+    for name, (
+        table,
+        columns,
+        referred,
+        referred_columns,
+        onupdate,
+    ) in FOREIGN_KEYS.items():
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name,
+            table,
+            referred,
+            columns,
+            referred_columns,
+            onupdate=onupdate,
+            ondelete=ondelete,
+        )
+
+
+def upgrade() -> None:
+    replace_foreign_keys(ondelete="CASCADE")
+    # The primary key (site_id, group_id) only serves lookups by site; the
+    # cascade from groups finds a group's links by group_id.
+    op.create_index(
+        op.f("ix_site_group_group_id"), "site_group", ["group_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_site_group_group_id"), table_name="site_group")
+    replace_foreign_keys(ondelete=None)
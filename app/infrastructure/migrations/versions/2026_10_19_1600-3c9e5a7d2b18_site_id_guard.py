@@ -0,0 +1,114 @@
+"""Site id guard and partition-move logging
+
+Revision ID: 3c9e5a7d2b18
+Revises: 8b7c2e5d1f90
+Create Date: 2026-10-19 16:00:00.000000
+
+Since `sites` is partitioned its primary key is (id, country), which no
+longer makes `id` unique on its own, while every lookup by id relies on it.
+`site_ids` holds one row per site id and its primary key restores the
+guarantee: an insert (or id change) reusing an id in another partition fails
+with a unique violation. It costs one extra index entry per site insert.
+
+Changing a site's country moves its row to another partition, which Postgres
+runs as a DELETE plus an INSERT: the row-level change log trigger recorded
+it as a delete and an insert. Statement-level triggers on the partitioned
+table see the move as the UPDATE it is, so both the change log and the id
+guard are now statement-level, working on the transition tables.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e5a7d2b18"
+down_revision: str | None = "8b7c2e5d1f90"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# event -> transition tables it can reference
+TRANSITION_TABLES = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    op.create_table("site_ids", sa.Column("id", sa.Integer(), primary_key=True))
+    op.execute("INSERT INTO site_ids SELECT id FROM sites")
+
+    op.execute(
+        """
+        CREATE FUNCTION track_site_ids() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO site_ids SELECT id FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM site_ids WHERE id IN (SELECT id FROM old_rows);
+            ELSE
+                -- Only ids the update changed; none for regular updates
+                DELETE FROM site_ids WHERE id IN (
+                    SELECT id FROM old_rows EXCEPT SELECT id FROM new_rows
+                );
+                INSERT INTO site_ids
+                SELECT id FROM new_rows EXCEPT SELECT id FROM old_rows;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION log_site_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO change_log (entity, operation, entity_id)
+                SELECT 'site', 'delete', id FROM old_rows ORDER BY id;
+            ELSE
+                INSERT INTO change_log (entity, operation, entity_id)
+                SELECT 'site', lower(TG_OP)::changeoperationenum, id
+                FROM new_rows ORDER BY id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    op.execute("DROP TRIGGER sites_change_log ON sites")
+    for event, tables in TRANSITION_TABLES.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER sites_change_log_{event.lower()}
+            AFTER {event} ON sites REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_site_changes()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER sites_track_ids_{event.lower()}
+            AFTER {event} ON sites REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION track_site_ids()
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in TRANSITION_TABLES:
+        op.execute(f"DROP TRIGGER sites_track_ids_{event.lower()} ON sites")
+        op.execute(f"DROP TRIGGER sites_change_log_{event.lower()} ON sites")
+    # Same definition as in 4f8e1b7c3d52
+    op.execute(
+        """
+        CREATE TRIGGER sites_change_log
+        AFTER INSERT OR UPDATE OR DELETE ON sites
+        FOR EACH ROW EXECUTE FUNCTION log_entity_change('site')
+        """
+    )
+    op.execute("DROP FUNCTION log_site_changes()")
+    op.execute("DROP FUNCTION track_site_ids()")
+    op.drop_table("site_ids")
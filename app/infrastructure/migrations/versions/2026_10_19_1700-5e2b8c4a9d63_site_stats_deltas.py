@@ -0,0 +1,231 @@
+"""Append-only site stats deltas
+
+Revision ID: 5e2b8c4a9d63
+Revises: 3c9e5a7d2b18
+Create Date: 2026-10-19 17:00:00.000000
+
+The row-level `sites_country_stats` trigger upserted into the one
+`site_country_stats` row of the site's country, so every write to a country
+waited for the other open transactions writing to it, and two transactions
+touching countries in opposite orders could deadlock.
+
+Writes now only append: a statement-level trigger inserts one delta row per
+country the statement changed into `site_country_stats_deltas`, which has no
+unique key to wait on. Reads add the pending deltas to the summary and a
+periodic fold moves them into it, locking the summary rows in country order.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2b8c4a9d63"
+down_revision: str | None = "3c9e5a7d2b18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATS_COLUMNS = (
+    "country, site_count, total_max_power_megawatt, "
+    "efficiency_sum, efficiency_count, useful_energy_sum, useful_energy_count"
+)
+# Columns the stats depend on
+STATS_SOURCE = "country, max_power_megawatt, efficiency, useful_energy_at_1_megawatt"
+
+# event -> transition tables it can reference
+TRANSITION_TABLES = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def _record_deltas(changes: str) -> str:
+    """
+    Statement appending one delta per country of `changes`, a query of
+    signed (+1 added, -1 removed) stats source rows.
+    """
+    return f"""
+        WITH changes AS ({changes})
+        INSERT INTO site_country_stats_deltas ({STATS_COLUMNS})
+        SELECT
+            country,
+            sum(sign),
+            sum(sign * max_power_megawatt),
+            sum(sign * COALESCE(efficiency, 0)),
+            sum(sign * (efficiency IS NOT NULL)::integer),
+            sum(sign * COALESCE(useful_energy_at_1_megawatt, 0)),
+            sum(sign * (useful_energy_at_1_megawatt IS NOT NULL)::integer)
+        FROM changes
+        GROUP BY country
+        ORDER BY country
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "site_country_stats_deltas",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "country",
+            postgresql.ENUM(name="countryenum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("site_count", sa.Integer(), nullable=False),
+        sa.Column("total_max_power_megawatt", sa.Float(), nullable=False),
+        sa.Column("efficiency_sum", sa.Float(), nullable=False),
+        sa.Column("efficiency_count", sa.Integer(), nullable=False),
+        sa.Column("useful_energy_sum", sa.Float(), nullable=False),
+        sa.Column("useful_energy_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    inserted = _record_deltas(f"SELECT 1 AS sign, {STATS_SOURCE} FROM new_rows")
+    deleted = _record_deltas(f"SELECT -1 AS sign, {STATS_SOURCE} FROM old_rows")
+    # Rows of an update that leave the stats source unchanged (most updates)
+    # cancel out in the EXCEPT ALL and record nothing
+    updated = _record_deltas(
+        f"""
+        SELECT 1 AS sign, * FROM (
+            SELECT {STATS_SOURCE} FROM new_rows
+            EXCEPT ALL SELECT {STATS_SOURCE} FROM old_rows
+        ) AS added
+        UNION ALL
+        SELECT -1, * FROM (
+            SELECT {STATS_SOURCE} FROM old_rows
+            EXCEPT ALL SELECT {STATS_SOURCE} FROM new_rows
+        ) AS removed
+        """
+    )
+    op.execute(
+        f"""
+        CREATE FUNCTION site_country_stats_record() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {inserted};
+            ELSIF TG_OP = 'DELETE' THEN
+                {deleted};
+            ELSE
+                {updated};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    op.execute("DROP TRIGGER sites_country_stats ON sites")
+    op.execute("DROP FUNCTION site_country_stats_trigger()")
+    op.execute(
+        "DROP FUNCTION site_country_stats_apply("
+        "countryenum, integer, double precision, double precision, double precision)"
+    )
+    for event, tables in TRANSITION_TABLES.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER sites_country_stats_{event.lower()}
+            AFTER {event} ON sites REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION site_country_stats_record()
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in TRANSITION_TABLES:
+        op.execute(f"DROP TRIGGER sites_country_stats_{event.lower()} ON sites")
+    op.execute("DROP FUNCTION site_country_stats_record()")
+
+    # Fold the pending deltas before their table goes
+    op.execute(
+        f"""
+        INSERT INTO site_country_stats AS s ({STATS_COLUMNS})
+        SELECT
+            country,
+            sum(site_count),
+            sum(total_max_power_megawatt),
+            sum(efficiency_sum),
+            sum(efficiency_count),
+            sum(useful_energy_sum),
+            sum(useful_energy_count)
+        FROM site_country_stats_deltas
+        GROUP BY country
+        ORDER BY country
+        ON CONFLICT (country) DO UPDATE SET
+            site_count = s.site_count + EXCLUDED.site_count,
+            total_max_power_megawatt =
+                s.total_max_power_megawatt + EXCLUDED.total_max_power_megawatt,
+            efficiency_sum = s.efficiency_sum + EXCLUDED.efficiency_sum,
+            efficiency_count = s.efficiency_count + EXCLUDED.efficiency_count,
+            useful_energy_sum = s.useful_energy_sum + EXCLUDED.useful_energy_sum,
+            useful_energy_count = s.useful_energy_count + EXCLUDED.useful_energy_count
+        """
+    )
+    op.drop_table("site_country_stats_deltas")
+
+    # Same definitions as in 0c5b7e2d8a46
+    op.execute(
+        f"""
+        CREATE FUNCTION site_country_stats_apply(
+            p_country countryenum,
+            p_sign integer,
+            p_max_power double precision,
+            p_efficiency double precision,
+            p_useful_energy double precision
+        ) RETURNS void AS $$
+        BEGIN
+            INSERT INTO site_country_stats AS s ({STATS_COLUMNS})
+            VALUES (
+                p_country,
+                p_sign,
+                p_sign * p_max_power,
+                p_sign * COALESCE(p_efficiency, 0),
+                p_sign * (p_efficiency IS NOT NULL)::integer,
+                p_sign * COALESCE(p_useful_energy, 0),
+                p_sign * (p_useful_energy IS NOT NULL)::integer
+            )
+            ON CONFLICT (country) DO UPDATE SET
+                site_count = s.site_count + EXCLUDED.site_count,
+                total_max_power_megawatt =
+                    s.total_max_power_megawatt + EXCLUDED.total_max_power_megawatt,
+                efficiency_sum = s.efficiency_sum + EXCLUDED.efficiency_sum,
+                efficiency_count = s.efficiency_count + EXCLUDED.efficiency_count,
+                useful_energy_sum = s.useful_energy_sum + EXCLUDED.useful_energy_sum,
+                useful_energy_count =
+                    s.useful_energy_count + EXCLUDED.useful_energy_count;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION site_country_stats_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM site_country_stats_apply(
+                    OLD.country, -1, OLD.max_power_megawatt,
+                    OLD.efficiency, OLD.useful_energy_at_1_megawatt
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM site_country_stats_apply(
+                    NEW.country, 1, NEW.max_power_megawatt,
+                    NEW.efficiency, NEW.useful_energy_at_1_megawatt
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER sites_country_stats
+        AFTER INSERT OR DELETE
+            OR UPDATE OF country, max_power_megawatt, efficiency,
+                useful_energy_at_1_megawatt
+        ON sites
+        FOR EACH ROW EXECUTE FUNCTION site_country_stats_trigger()
+        """
+    )
@@ -0,0 +1,4 @@
+# Import every model so that relationships declared by class name (Site.groups
+# -> "Group") resolve in any process that loads one of them, such as the
+# commands and Alembic's env.py
+from . import associations, change_log, group, job, site, site_stats  # noqa: F401
@@ -1,16 +1,43 @@
 from infrastructure.db import Base
-from sqlalchemy import Column, ForeignKey, Table
+from sqlalchemy import Column, ForeignKey, ForeignKeyConstraint, Integer, Table
+from sqlalchemy.dialects import postgresql
 
 site_group_table = Table(
     "site_group",
     Base.metadata,
-    Column("site_id", ForeignKey("sites.id"), primary_key=True),
-    Column("group_id", ForeignKey("groups.id"), primary_key=True),
+    Column("site_id", Integer, primary_key=True),
+    Column(
+        "group_id",
+        ForeignKey("groups.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+    # Copy of the site's country: the partitioned sites table is keyed by
+    # (id, country). The countryenum type belongs to sites.country.
+    Column(
+        "site_country",
+        postgresql.ENUM(name="countryenum", create_type=False),
+        nullable=False,
+    ),
+    ForeignKeyConstraint(
+        ["site_id", "site_country"],
+        ["sites.id", "sites.country"],
+        name="site_group_site_id_fkey",
+        onupdate="CASCADE",
+        ondelete="CASCADE",
+    ),
 )
 
 group_group_table = Table(
     "group_group",
     Base.metadata,
-    Column("parent_group_id", ForeignKey("groups.id"), primary_key=True),
-    Column("child_group_id", ForeignKey("groups.id"), primary_key=True),
+    Column(
+        "parent_group_id", ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True
+    ),
+    Column(
+        "child_group_id",
+        ForeignKey("groups.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
 )
@@ -0,0 +1,48 @@
+import enum
+
+from infrastructure.db import Base
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Index, Integer, func, text
+
+
+class ChangeEntityEnum(str, enum.Enum):
+    site = "site"
+    group = "group"
+    site_group = "site_group"
+    group_group = "group_group"
+
+
+class ChangeOperationEnum(str, enum.Enum):
+    insert = "insert"
+    update = "update"
+    delete = "delete"
+
+
+class ChangeLog(Base):
+    """
+    Append-only feed of row changes on sites, groups and their association
+    tables, written by database triggers (see the "change log" migration).
+
+    `txid` is the writing transaction's id. Readers order by (txid, id) and
+    only read entries of transactions older than every running one, which
+    makes the (txid, id) cursor safe against out-of-order commits.
+
+    For association rows, `entity_id` is the site / parent group id and
+    `related_id` the group / child group id.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = (Index("ix_change_log_txid_id", "txid", "id"),)
+
+    id = Column(BigInteger, primary_key=True)
+    txid = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+    )
+    entity = Column(Enum(ChangeEntityEnum), nullable=False)
+    operation = Column(Enum(ChangeOperationEnum), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    related_id = Column(Integer, nullable=True)
+    changed_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
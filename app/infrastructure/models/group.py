@@ -1,8 +1,8 @@
 import enum
 
 from infrastructure.db import Base
-from sqlalchemy import Column, Enum, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, func
+from sqlalchemy.orm import backref, relationship
 
 from .associations import group_group_table, site_group_table
 
@@ -15,16 +15,28 @@ class GroupTypeEnum(str, enum.Enum):
 
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        Index(
+            "ix_groups_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     type = Column(Enum(GroupTypeEnum), nullable=False)
+    # Maintained by the touch_updated_at trigger
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
 
     sites = relationship(
         "Site",
         secondary=site_group_table,
         back_populates="groups",
-        cascade="all, delete",
+        passive_deletes=True,  # Links are removed by ON DELETE CASCADE
         lazy="selectin",  # <--- Eager load sites
     )
 
@@ -33,7 +45,7 @@ class Group(Base):
         secondary=group_group_table,
         primaryjoin=id == group_group_table.c.parent_group_id,
         secondaryjoin=id == group_group_table.c.child_group_id,
-        backref="parent_groups",
-        cascade="all, delete",
+        backref=backref("parent_groups", passive_deletes=True),
+        passive_deletes=True,
         lazy="selectin",  # <--- Eager load child groups
     )
@@ -0,0 +1,42 @@
+import enum
+
+from infrastructure.db import Base
+from sqlalchemy import Boolean, Column, DateTime, Enum, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class JobKindEnum(str, enum.Enum):
+    site_import = "site_import"
+    site_update = "site_update"
+    site_revalidation = "site_revalidation"
+
+
+class JobStatusEnum(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(Enum(JobKindEnum), nullable=False)
+    status = Column(
+        Enum(JobStatusEnum), nullable=False, default=JobStatusEnum.pending, index=True
+    )
+    params = Column(JSONB, nullable=False, default=dict)
+    result = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped at every checkpoint, lets a restarted worker spot abandoned jobs
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
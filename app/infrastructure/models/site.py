@@ -1,7 +1,18 @@
 import enum
 
 from infrastructure.db import Base
-from sqlalchemy import Column, Date, Enum, Float, Integer, String
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    Index,
+    Integer,
+    String,
+    Table,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from .associations import site_group_table
@@ -16,20 +27,50 @@ class CountryEnum(str, enum.Enum):
 
 class Site(Base):
     __tablename__ = "sites"
+    # List-partitioned on country, one partition per country (see migration
+    # 6d3a9f2b7c14). Indexes are created on every partition, so a country
+    # filter only ever touches that country's partition and indexes.
+    __table_args__ = (
+        Index(
+            "ix_sites_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Listing filter/sort indexes, see services.site.SITE_SORT_FIELDS
+        Index("ix_sites_installation_date_id", "installation_date", "id"),
+        Index("ix_sites_max_power_megawatt_id", "max_power_megawatt", "id"),
+        Index("ix_sites_min_power_megawatt_id", "min_power_megawatt", "id"),
+        {"postgresql_partition_by": "LIST (country)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key must be part of the primary key, so (id, country)
+    # alone would let two partitions hold the same id. Lookups by id rely on
+    # it being unique: site_id_table enforces that (migration 3c9e5a7d2b18).
+    id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
-    country = Column(Enum(CountryEnum), nullable=False)
+    country = Column(Enum(CountryEnum), primary_key=True)
     installation_date = Column(Date, nullable=False)
     max_power_megawatt = Column(Float, nullable=False)
     min_power_megawatt = Column(Float, nullable=False)
     useful_energy_at_1_megawatt = Column(Float, nullable=True)
     efficiency = Column(Float, nullable=True)
+    # Maintained by the touch_updated_at trigger
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
 
     groups = relationship(
         "Group",
         secondary=site_group_table,
         back_populates="sites",
+        passive_deletes=True,  # Links are removed by ON DELETE CASCADE
         lazy="selectin",  # Eager load groups
-        cascade="all, delete",
     )
+
+
+# One row per site id, kept by statement-level triggers on `sites`: its
+# primary key makes ids unique across the country partitions
+site_id_table = Table(
+    "site_ids", Base.metadata, Column("id", Integer, primary_key=True)
+)
@@ -0,0 +1,45 @@
+from infrastructure.db import Base
+from sqlalchemy import BigInteger, Column, Enum, Float, Integer
+
+from .site import CountryEnum
+
+
+class SiteCountryStats(Base):
+    """
+    Running per-country aggregates over `sites`, as of the last fold of
+    `SiteCountryStatsDelta`; the current stats are these plus the pending
+    deltas. Averages are derived at read time from the sums and non-null
+    counts.
+    """
+
+    __tablename__ = "site_country_stats"
+
+    country = Column(Enum(CountryEnum), primary_key=True)
+    site_count = Column(Integer, nullable=False, default=0)
+    total_max_power_megawatt = Column(Float, nullable=False, default=0)
+    efficiency_sum = Column(Float, nullable=False, default=0)
+    efficiency_count = Column(Integer, nullable=False, default=0)
+    useful_energy_sum = Column(Float, nullable=False, default=0)
+    useful_energy_count = Column(Integer, nullable=False, default=0)
+
+
+class SiteCountryStatsDelta(Base):
+    """
+    Change of the per-country aggregates made by one statement on `sites`.
+
+    Rows are appended by the `sites_country_stats_*` triggers (see the
+    "append-only site stats deltas" migration), so every write path keeps
+    the stats current without the services having to know about them, and
+    concurrent writes never wait on a shared stats row.
+    """
+
+    __tablename__ = "site_country_stats_deltas"
+
+    id = Column(BigInteger, primary_key=True)
+    country = Column(Enum(CountryEnum), nullable=False)
+    site_count = Column(Integer, nullable=False)
+    total_max_power_megawatt = Column(Float, nullable=False)
+    efficiency_sum = Column(Float, nullable=False)
+    efficiency_count = Column(Integer, nullable=False)
+    useful_energy_sum = Column(Float, nullable=False)
+    useful_energy_count = Column(Integer, nullable=False)
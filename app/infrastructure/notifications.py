@@ -0,0 +1,154 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import asyncpg
+from config import get_settings
+from infrastructure.db import engine
+from logger import get_logger
+from sqlalchemy import ColumnElement, Integer, String, Text, cast, func, literal
+from sqlalchemy.dialects import postgresql
+
+logger = get_logger(__name__)
+
+CHANNEL = "entity_changes"
+# Sent to subscribers when events may have been missed (queue overflow or a
+# lost LISTEN connection); clients should resync, e.g. from GET /changes
+RESYNC_EVENT = "resync"
+
+
+def notify_clause(
+    entity: str,
+    operation: str,
+    entity_id: int | ColumnElement,
+    related_ids: list[int] | ColumnElement | None = None,
+) -> ColumnElement:
+    """
+    SQL expression sending a change NOTIFY, for use in the RETURNING or
+    SELECT list of the write statement itself so that no extra round trip
+    is needed. `entity_id` may be a column of the written row and
+    `related_ids` an integer array expression, e.g. an aggregate of it.
+    """
+    fields = [
+        literal("entity", String),
+        literal(entity, String),
+        literal("operation", String),
+        literal(operation, String),
+        literal("id", String),
+        entity_id if isinstance(entity_id, ColumnElement) else literal(entity_id),
+    ]
+    if related_ids is not None:
+        fields += [
+            literal("related_ids", String),
+            (
+                related_ids
+                if isinstance(related_ids, ColumnElement)
+                else literal(related_ids, postgresql.ARRAY(Integer))
+            ),
+        ]
+    payload = cast(func.json_build_object(*fields), Text)
+    return func.pg_notify(CHANNEL, payload).label("notified")
+
+
+class Subscriber:
+    """
+    Bounded mailbox of one event stream client.
+
+    A client that does not keep up is not allowed to grow memory: once its
+    queue is full it is marked as overflowed, stops receiving events and
+    gets a single resync event instead.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def push(self, payload: str) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeBroadcaster:
+    """
+    Fan NOTIFY events out to any number of in-process subscribers through a
+    single LISTEN connection per worker process, reconnecting with backoff
+    if that connection is lost.
+    """
+
+    def __init__(self, queue_size: int, reconnect_delay: float = 1.0):
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: set[Subscriber] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[Subscriber]:
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, payload: str) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.push(payload)
+
+    def _resync_all(self) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.overflowed = True
+
+    def _on_notification(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        self.publish(payload)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen(), name="change-listener")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        dsn = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        delay = self.reconnect_delay
+        first_attempt = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _, lost=lost: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notification)
+                if not first_attempt:
+                    # Events sent while we were away are gone
+                    self._resync_all()
+                logger.info(f"Listening for {CHANNEL} notifications")
+                first_attempt, delay = False, self.reconnect_delay
+                await lost.wait()
+                logger.warning("LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                if connection is not None:
+                    await connection.close()
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed")
+                first_attempt = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+broadcaster = ChangeBroadcaster(queue_size=get_settings().events_queue_size)
@@ -0,0 +1,44 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from infrastructure.db import async_session_maker
+from logger import get_logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """
+    Background task running `func` with a session of its own every
+    `interval` seconds. A failed run is logged and retried at the next tick.
+    """
+
+    def __init__(
+        self, name: str, interval: float, func: Callable[[AsyncSession], Awaitable[Any]]
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with async_session_maker() as session:
+                    await self.func(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Periodic task {self.name} failed")
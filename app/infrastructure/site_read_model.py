@@ -0,0 +1,568 @@
+import asyncio
+import json
+import math
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+import numpy as np
+from config import get_settings
+from infrastructure.db import async_session_maker
+from infrastructure.models.associations import site_group_table
+from infrastructure.models.group import Group
+from infrastructure.models.site import CountryEnum, Site
+from infrastructure.notifications import broadcaster
+from logger import get_logger
+from sqlalchemy import Integer, any_, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+logger = get_logger(__name__)
+
+EPOCH = date(1970, 1, 1)
+# Columns of SiteResponse, in table order
+SITE_COLUMNS = [
+    Site.__table__.c[name]
+    for name in (
+        "id",
+        "name",
+        "country",
+        "installation_date",
+        "max_power_megawatt",
+        "min_power_megawatt",
+        "useful_energy_at_1_megawatt",
+        "efficiency",
+    )
+]
+SITE_FIELDS = [column.name for column in SITE_COLUMNS]
+# Fields with a sorted index; all but id also take range filters
+SORTED_FIELDS = ("id", "installation_date", "max_power_megawatt", "min_power_megawatt")
+# Numeric fields, stored as typed columns: dates as days since the epoch,
+# missing values of the nullable fields as NaN
+DTYPES = {
+    "id": np.int64,
+    "installation_date": np.int64,
+    "max_power_megawatt": np.float64,
+    "min_power_megawatt": np.float64,
+    "useful_energy_at_1_megawatt": np.float64,
+    "efficiency": np.float64,
+}
+NULLABLE_FIELDS = ("useful_energy_at_1_megawatt", "efficiency")
+
+# A site: its columns, and the ids of its groups
+SiteRecord = tuple[dict[str, Any], tuple[int, ...]]
+
+
+def _column_value(field: str, value: Any) -> Any:
+    if value is None:
+        return math.nan
+    return (value - EPOCH).days if field == "installation_date" else value
+
+
+def _index_positions(
+    sorted_values: np.ndarray,
+    sorted_ids: np.ndarray,
+    values: np.ndarray,
+    ids: np.ndarray,
+) -> np.ndarray:
+    """
+    Positions of the (value, id) pairs in an index sorted by (value, id):
+    where they are, or where they would be inserted.
+    """
+    lower = np.searchsorted(sorted_values, values, "left")
+    upper = np.searchsorted(sorted_values, values, "right")
+    return np.fromiter(
+        (
+            start + np.searchsorted(sorted_ids[start:end], site_id)
+            for start, end, site_id in zip(lower, upper, ids, strict=True)
+        ),
+        np.int64,
+        len(ids),
+    )
+
+
+@dataclass(frozen=True)
+class SiteColumns:
+    """
+    Immutable columnar snapshot of the sites, stored in slots: the site in
+    slot s has `values[field][s]` for its numeric fields, `names[s]`,
+    `countries[s]` and the ids of its groups in `group_ids[s]`. Slots of
+    deleted sites are in `free` and reused. `orders[field]` lists the
+    occupied slots by (field, id) ascending, with the matching values and
+    ids in `sorted_values[field]` and `sorted_ids[field]` for binary search.
+    Site dicts are only built by `records`, for the slots a read returns.
+    """
+
+    slots: dict[int, int]
+    free: list[int]
+    names: np.ndarray
+    countries: np.ndarray
+    group_ids: list[tuple[int, ...]]
+    values: dict[str, np.ndarray]
+    orders: dict[str, np.ndarray]
+    sorted_values: dict[str, np.ndarray]
+    sorted_ids: dict[str, np.ndarray]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.values["id"]
+
+    @classmethod
+    def build(cls, records: list[SiteRecord]) -> "SiteColumns":
+        values = {
+            field: np.fromiter(
+                (_column_value(field, site[field]) for site, _ in records),
+                dtype,
+                len(records),
+            )
+            for field, dtype in DTYPES.items()
+        }
+        ids = values["id"]
+        orders = {field: np.lexsort((ids, values[field])) for field in SORTED_FIELDS}
+        return cls(
+            slots={site["id"]: slot for slot, (site, _) in enumerate(records)},
+            free=[],
+            names=np.array([site["name"] for site, _ in records], dtype=object),
+            countries=np.array(
+                [CountryEnum(site["country"]).value for site, _ in records], dtype="U2"
+            ),
+            group_ids=[group_ids for _, group_ids in records],
+            values=values,
+            orders=orders,
+            sorted_values={
+                field: values[field][order] for field, order in orders.items()
+            },
+            sorted_ids={field: ids[order] for field, order in orders.items()},
+        )
+
+    def records(self, slots: Sequence[int]) -> list[SiteRecord]:
+        """
+        The sites in `slots` with their group ids, shaped like the database
+        rows they were loaded from.
+        """
+        slots = np.asarray(slots, np.int64)
+        columns = {field: self.values[field][slots].tolist() for field in DTYPES}
+        columns["installation_date"] = (
+            self.values["installation_date"][slots].astype("datetime64[D]").tolist()
+        )
+        for field in NULLABLE_FIELDS:
+            columns[field] = [
+                None if math.isnan(value) else value for value in columns[field]
+            ]
+        columns["name"] = self.names[slots].tolist()
+        columns["country"] = [
+            CountryEnum(code) for code in self.countries[slots].tolist()
+        ]
+        rows = zip(*(columns[field] for field in SITE_FIELDS), strict=True)
+        return [
+            (dict(zip(SITE_FIELDS, row, strict=True)), self.group_ids[slot])
+            for row, slot in zip(rows, slots.tolist(), strict=True)
+        ]
+
+    def patch(self, changes: dict[int, SiteRecord | None]) -> "SiteColumns":
+        """
+        New snapshot with `changes` (site id to its new record, or None when
+        deleted) applied. The indexes are patched in place of being rebuilt:
+        each changed site is removed and re-inserted at its binary searched
+        position, so a burst of k changes costs k log n searches and a few
+        copies of each array instead of a full sort.
+        """
+        slots = dict(self.slots)
+        free = list(self.free)
+        names = self.names.copy()
+        countries = self.countries.copy()
+        group_ids = list(self.group_ids)
+        values = {field: column.copy() for field, column in self.values.items()}
+
+        # Take the changed sites out of the indexes
+        old = np.array(
+            [slots[site_id] for site_id in changes if site_id in slots], np.int64
+        )
+        orders, sorted_values, sorted_ids = {}, {}, {}
+        for field in SORTED_FIELDS:
+            positions = _index_positions(
+                self.sorted_values[field],
+                self.sorted_ids[field],
+                self.values[field][old],
+                self.ids[old],
+            )
+            orders[field] = np.delete(self.orders[field], positions)
+            sorted_values[field] = np.delete(self.sorted_values[field], positions)
+            sorted_ids[field] = np.delete(self.sorted_ids[field], positions)
+
+        for site_id, record in changes.items():
+            if record is None and site_id in slots:
+                slot = slots.pop(site_id)
+                names[slot] = None
+                countries[slot] = ""
+                group_ids[slot] = ()
+                free.append(slot)
+
+        # Grow the arrays once for the new sites that find no free slot
+        new_sites = sum(
+            1
+            for site_id, record in changes.items()
+            if record is not None and site_id not in slots
+        )
+        extra = max(new_sites - len(free), 0)
+        if extra:
+            free.extend(range(len(countries), len(countries) + extra))
+            names = np.concatenate([names, np.empty(extra, dtype=object)])
+            countries = np.concatenate([countries, np.full(extra, "", dtype="U2")])
+            group_ids.extend([()] * extra)
+            values = {
+                field: np.concatenate([column, np.zeros(extra, column.dtype)])
+                for field, column in values.items()
+            }
+
+        for site_id, record in changes.items():
+            if record is None:
+                continue
+            slot = slots[site_id] if site_id in slots else free.pop()
+            slots[site_id] = slot
+            site, group_ids[slot] = record
+            names[slot] = site["name"]
+            countries[slot] = CountryEnum(site["country"]).value
+            for field in DTYPES:
+                values[field][slot] = _column_value(field, site[field])
+
+        # Put the upserted sites back in, in index order among themselves
+        new = np.array(
+            [
+                slots[site_id]
+                for site_id, record in changes.items()
+                if record is not None
+            ],
+            np.int64,
+        )
+        ids = values["id"]
+        for field in SORTED_FIELDS:
+            slots_in_order = new[np.lexsort((ids[new], values[field][new]))]
+            positions = _index_positions(
+                sorted_values[field],
+                sorted_ids[field],
+                values[field][slots_in_order],
+                ids[slots_in_order],
+            )
+            orders[field] = np.insert(orders[field], positions, slots_in_order)
+            sorted_values[field] = np.insert(
+                sorted_values[field], positions, values[field][slots_in_order]
+            )
+            sorted_ids[field] = np.insert(
+                sorted_ids[field], positions, ids[slots_in_order]
+            )
+
+        return SiteColumns(
+            slots=slots,
+            free=free,
+            names=names,
+            countries=countries,
+            group_ids=group_ids,
+            values=values,
+            orders=orders,
+            sorted_values=sorted_values,
+            sorted_ids=sorted_ids,
+        )
+
+    def select(
+        self,
+        sort_keys: Sequence[tuple[str, bool]],
+        country: CountryEnum | str | None = None,
+        ranges: dict[str, tuple[Any, Any]] | None = None,
+    ) -> np.ndarray:
+        """
+        Slots of the matching sites in `sort_keys` order ((field,
+        descending) pairs, as from `parse_sort_keys`; an id tie-breaker in
+        the direction of the first key is implied). Range bounds are
+        inclusive.
+        """
+        ranges = {
+            field: (
+                None if lower is None else _column_value(field, lower),
+                None if upper is None else _column_value(field, upper),
+            )
+            for field, (lower, upper) in (ranges or {}).items()
+        }
+
+        # Walk the first key's index, narrowed to its range if it has one
+        first, first_descending = sort_keys[0]
+        lower, upper = ranges.pop(first, (None, None))
+        sorted_values = self.sorted_values[first]
+        start = 0 if lower is None else np.searchsorted(sorted_values, lower, "left")
+        end = (
+            len(sorted_values)
+            if upper is None
+            else np.searchsorted(sorted_values, upper, "right")
+        )
+        positions = self.orders[first][start:end]
+
+        mask = np.ones(len(positions), dtype=bool)
+        if country:
+            mask &= self.countries[positions] == getattr(country, "value", country)
+        for field, (lower, upper) in ranges.items():
+            column = self.values[field][positions]
+            if lower is not None:
+                mask &= column >= lower
+            if upper is not None:
+                mask &= column <= upper
+        positions = positions[mask]
+
+        if len(sort_keys) == 1:
+            return positions[::-1] if first_descending else positions
+
+        keys = [
+            (
+                -self.values[field][positions]
+                if descending
+                else self.values[field][positions]
+            )
+            for field, descending in sort_keys
+        ]
+        if "id" not in dict(sort_keys):
+            ids = self.ids[positions]
+            keys.append(-ids if first_descending else ids)
+        # np.lexsort sorts by the last key first
+        return positions[np.lexsort(keys[::-1])]
+
+
+class SiteReadModel:
+    """
+    In-memory columnar copy of the sites and their group memberships,
+    serving `get_all_sites` without a database round trip or ORM objects.
+
+    The sites are loaded at startup, then kept up to date from the change
+    notifications the write services send: each burst of notifications is
+    applied by re-reading just the sites and groups it names and patching
+    the columns and sorted indexes for those sites only. Reads never wait
+    for a change: they use the latest published snapshot. When
+    notifications may have been missed, the model reloads everything and
+    reads go to the database meanwhile. Fuzzy name search (`q`) always
+    goes to the database.
+    """
+
+    def __init__(self, retry_delay: float = 5.0, poll_interval: float = 1.0) -> None:
+        self.retry_delay = retry_delay
+        # How often an idle model checks whether it has missed notifications
+        self.poll_interval = poll_interval
+        self.ready = False
+        self._groups: dict[int, dict[str, Any]] = {}
+        self._snapshot = SiteColumns.build([])
+        # Receipt time of the oldest change not visible in the snapshot
+        self._unreflected_since: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def lag_seconds(self) -> float:
+        """
+        Consistency lag: time since the oldest change notification whose
+        change is not visible to reads yet, 0 when up to date.
+        """
+        since = self._unreflected_since
+        return 0.0 if since is None else max(time.monotonic() - since, 0.0)
+
+    def can_serve(self, filters: dict[str, Any]) -> bool:
+        return self.ready and not filters.get("q")
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="site-read-model")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.ready = False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Subscribe before loading so that no change falls in between
+                async with broadcaster.subscribe() as subscriber:
+                    async with async_session_maker() as session:
+                        await self.load(session)
+                    self.ready = True
+                    logger.info(
+                        f"Site read model loaded {len(self._snapshot.slots)} sites"
+                    )
+                    while not subscriber.overflowed:
+                        try:
+                            payload = await asyncio.wait_for(
+                                subscriber.queue.get(), timeout=self.poll_interval
+                            )
+                        except asyncio.TimeoutError:
+                            continue
+                        drained_at = time.monotonic()
+                        if self._unreflected_since is None:
+                            self._unreflected_since = drained_at
+                        payloads = [payload]
+                        while not subscriber.queue.empty():
+                            payloads.append(subscriber.queue.get_nowait())
+                        async with async_session_maker() as session:
+                            await self.apply(payloads, session)
+                        # Changes queued meanwhile arrived after the drain
+                        self._unreflected_since = (
+                            None if subscriber.queue.empty() else drained_at
+                        )
+                    logger.warning("Site read model missed changes, reloading")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Site read model failed, reloading")
+                await asyncio.sleep(self.retry_delay)
+            finally:
+                self.ready = False
+                self._unreflected_since = None
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Replace the whole model with the current content of the database.
+        """
+        sites = (await session.execute(select(*SITE_COLUMNS))).mappings().all()
+        groups = (await session.execute(select(Group.id, Group.name, Group.type))).all()
+        links = (
+            await session.execute(
+                select(site_group_table.c.site_id, site_group_table.c.group_id)
+            )
+        ).all()
+
+        site_groups: dict[int, list[int]] = {}
+        for site_id, group_id in links:
+            site_groups.setdefault(site_id, []).append(group_id)
+        self._groups = {
+            group.id: {"id": group.id, "name": group.name, "type": group.type}
+            for group in groups
+        }
+        records = [
+            (dict(site), tuple(sorted(site_groups.get(site["id"], ()))))
+            for site in sites
+        ]
+        self._snapshot = await run_in_threadpool(SiteColumns.build, records)
+
+    async def apply(self, payloads: Iterable[str], session: AsyncSession) -> None:
+        """
+        Apply a burst of change notifications: re-read the sites and groups
+        they name, dropping those that no longer exist, and publish a
+        patched snapshot.
+        """
+        site_ids: set[int] = set()
+        group_ids: set[int] = set()
+        for payload in payloads:
+            event = json.loads(payload)
+            if event.get("entity") in ("site", "site_group"):
+                site_ids.add(event["id"])
+            elif event.get("entity") == "group":
+                group_ids.add(event["id"])
+
+        snapshot = self._snapshot
+        changes: dict[int, SiteRecord | None] = {}
+        if group_ids:
+            id_array = literal(sorted(group_ids), postgresql.ARRAY(Integer))
+            result = await session.execute(
+                select(Group.id, Group.name, Group.type).where(
+                    Group.id == any_(id_array)
+                )
+            )
+            rows = result.all()
+            for group in rows:
+                self._groups[group.id] = {
+                    "id": group.id,
+                    "name": group.name,
+                    "type": group.type,
+                }
+            deleted = group_ids - {group.id for group in rows}
+            if deleted:
+                for group_id in deleted:
+                    self._groups.pop(group_id, None)
+                # Their links went with them (ON DELETE CASCADE)
+                affected = [
+                    slot
+                    for slot in snapshot.slots.values()
+                    if deleted.intersection(snapshot.group_ids[slot])
+                ]
+                for site, groups in snapshot.records(affected):
+                    kept = tuple(g for g in groups if g not in deleted)
+                    changes[site["id"]] = (site, kept)
+
+        if site_ids:
+            id_array = literal(sorted(site_ids), postgresql.ARRAY(Integer))
+            sites = (
+                (
+                    await session.execute(
+                        select(*SITE_COLUMNS).where(Site.id == any_(id_array))
+                    )
+                )
+                .mappings()
+                .all()
+            )
+            links = (
+                await session.execute(
+                    select(site_group_table.c.site_id, site_group_table.c.group_id)
+                    .where(site_group_table.c.site_id == any_(id_array))
+                    .order_by(site_group_table.c.group_id)
+                )
+            ).all()
+            site_groups: dict[int, list[int]] = {}
+            for site_id, group_id in links:
+                site_groups.setdefault(site_id, []).append(group_id)
+            for site_id in site_ids:
+                changes[site_id] = None
+            for site in sites:
+                changes[site["id"]] = (
+                    dict(site),
+                    tuple(site_groups.get(site["id"], ())),
+                )
+
+        if changes:
+            # Only this task patches: reads keep using the current snapshot
+            self._snapshot = await run_in_threadpool(snapshot.patch, changes)
+
+    def _site(self, record: SiteRecord) -> dict[str, Any]:
+        site, group_ids = record
+        groups = [self._groups[g] for g in group_ids if g in self._groups]
+        return {**site, "groups": groups}
+
+    async def list_sites(
+        self,
+        sort_keys: Sequence[tuple[str, bool]],
+        limit: int | None = None,
+        offset: int = 0,
+        **filters: Any,
+    ) -> list[dict[str, Any]]:
+        """
+        Sites matching `filters` (as for `get_all_sites`, without `q`), in
+        `sort_keys` order and paged, shaped like `SiteResponse`.
+        """
+        columns = self._snapshot
+        slots = columns.select(sort_keys, **_selection(filters))
+        end = None if limit is None else offset + limit
+        page = slots[offset:end].tolist()
+
+        # Dicts are built for the page only
+        def materialize() -> list[dict[str, Any]]:
+            return [self._site(record) for record in columns.records(page)]
+
+        if len(page) >= get_settings().encoding_offload_min_items:
+            return await run_in_threadpool(materialize)
+        return materialize()
+
+    async def count_sites(self, **filters: Any) -> int:
+        return len(self._snapshot.select([("id", False)], **_selection(filters)))
+
+
+def _selection(filters: dict[str, Any]) -> dict[str, Any]:
+    """
+    Map `get_all_sites` filters to `SiteColumns.select` arguments.
+    """
+    return {
+        "country": filters.get("country"),
+        "ranges": {
+            field: (filters.get(f"{field}_from"), filters.get(f"{field}_to"))
+            for field in SORTED_FIELDS[1:]
+        },
+    }
+
+
+site_read_model = SiteReadModel()
@@ -0,0 +1,350 @@
+import functools
+import json
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+@dataclass
+class Span:
+    """
+    One timed operation of a trace. Spans of a trace share its `spans`
+    list, in which each span is appended when it ends.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    spans: list["Span"]
+    kind: str = "internal"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    error: str | None = None
+
+    def end(self, error: BaseException | None = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = repr(error)
+        self.spans.append(self)
+
+
+# Innermost open span of the current request, if it is traced
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """
+    Trace id, parent span id and sampled flag of a W3C `traceparent`
+    header, or None when it is missing or malformed.
+    """
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or set(match[1]) == {"0"} or set(match[2]) == {"0"}:
+        return None
+    return match[1], match[2], bool(int(match[3], 16) & 1)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": SPAN_KINDS[span.kind],
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in span.attributes.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+    }
+    if span.parent_span_id:
+        data["parentSpanId"] = span.parent_span_id
+    return data
+
+
+def to_otlp(spans: list[Span], service_name: str) -> dict[str, Any]:
+    """
+    OTLP/JSON `ExportTraceServiceRequest` body for finished spans.
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": _otlp_value(service_name)}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [_otlp_span(span) for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileSpanExporter:
+    """
+    Append each batch of spans as one OTLP/JSON line, the format read by the
+    OpenTelemetry Collector's `otlpjsonfile` receiver.
+    """
+
+    def __init__(self, path: str, service_name: str) -> None:
+        self.path = Path(path)
+        self.service_name = service_name
+
+    def export(self, spans: list[Span]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as traces:
+            traces.write(json.dumps(to_otlp(spans, self.service_name)) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """
+    POST each batch of spans as OTLP/JSON to a collector's `/v1/traces`
+    endpoint.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(to_otlp(spans, self.service_name)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """
+    Minimal tracer. Traces are started for HTTP requests by the tracing
+    middleware; service functions and SQL statements only add spans inside
+    an active trace, so background work is not traced.
+
+    A trace is queued in one piece once its root span ends, and exported by
+    a dedicated thread in batches of up to `batch_size` traces, so a slow
+    collector never holds a request or a threadpool worker. When
+    `queue_size` traces are already waiting, new ones are dropped.
+    """
+
+    def __init__(self) -> None:
+        self.exporter: FileSpanExporter | OTLPHttpSpanExporter | None = None
+        self.sample_rate = 1.0
+        self.batch_size = 64
+        self.dropped = 0
+        self._queue: queue.Queue[list[Span] | None] = queue.Queue(maxsize=1000)
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+
+    def configure(
+        self,
+        exporter: FileSpanExporter | OTLPHttpSpanExporter,
+        sample_rate: float,
+        queue_size: int = 1000,
+        batch_size: int = 64,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def start_trace(
+        self,
+        name: str,
+        traceparent: str | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> Span | None:
+        """
+        Root span of a request, continuing the caller's trace when a valid
+        `traceparent` is given. The caller's sampling decision wins over
+        the sample rate. Returns None when the request is not traced.
+        """
+        if self.exporter is None:
+            return None
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_span_id, sampled = parent
+        else:
+            trace_id, parent_span_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        return Span(
+            name,
+            trace_id,
+            secrets.token_hex(8),
+            parent_span_id,
+            spans=[],
+            kind="server",
+            attributes=attributes or {},
+        )
+
+    def start_span(
+        self, name: str, kind: str = "internal", **attributes: Any
+    ) -> Span | None:
+        """
+        Child of the current span, or None outside of a trace. The span
+        does not become current: use `span` for that.
+        """
+        parent = current_span.get()
+        if parent is None:
+            return None
+        return Span(
+            name,
+            parent.trace_id,
+            secrets.token_hex(8),
+            parent.span_id,
+            spans=parent.spans,
+            kind=kind,
+            attributes=attributes,
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """
+        Time the block as a child of the current span, and make it current.
+        """
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(exc)
+            raise
+        else:
+            span.end()
+        finally:
+            current_span.reset(token)
+
+    def submit(self, spans: list[Span]) -> None:
+        """
+        Queue the spans of a finished trace for export, without blocking.
+        """
+        if self.exporter is None:
+            return
+        self._start_worker()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Trace export queue full, {self.dropped} dropped")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Export the queued traces and stop the exporter thread, waiting at
+        most `timeout` seconds.
+        """
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Trace export queue still full at shutdown")
+            return
+        worker.join(timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        """
+        Hand finished spans to the exporter. Blocking: only called from the
+        exporter thread. Failures are logged, not raised.
+        """
+        if self.exporter is None:
+            return
+        try:
+            self.exporter.export(spans)
+        except Exception as exc:
+            logger.warning(f"Could not export {len(spans)} spans: {exc}")
+
+    def _start_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._export_queued, name="trace-exporter", daemon=True
+                )
+                self._worker.start()
+
+    def _export_queued(self) -> None:
+        stopping = False
+        # After the stop marker, export what is still queued, then return
+        while not (stopping and self._queue.empty()):
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [trace for trace in batch if trace is not None]
+            spans = [span for trace in batch for span in trace]
+            if spans:
+                self.export(spans)
+
+
+tracer = Tracer()
+
+
+def traced(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """
+    Decorator wrapping each call of an async function in a span named after
+    it, e.g. `services.site.create_site`.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with tracer.span(name):
+            return await func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,98 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from infrastructure.db import async_session_maker
+from logger import get_logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+# create_many(items, session) returns, per item, its result or the
+# exception to raise to its caller
+CreateMany = Callable[[list[dict], AsyncSession], Awaitable[list[Any]]]
+CreateOne = Callable[[dict, AsyncSession], Awaitable[Any]]
+
+
+class WriteBatcher:
+    """
+    Group commit for create requests: items submitted within `max_delay`
+    seconds of each other (at most `max_size` of them) are validated and
+    written by one `create_many` call in a single transaction, so they share
+    one commit. Each caller gets its own result or exception back.
+
+    When the batch fails, its items are retried one by one with
+    `create_one`, so a bad row only fails its own request. The batch runs in
+    its own task: a caller that disconnects does not cancel it, and `drain`
+    waits for the batches in flight at shutdown.
+    """
+
+    def __init__(
+        self,
+        create_many: CreateMany,
+        create_one: CreateOne,
+        max_delay: float = 0.005,
+        max_size: int = 100,
+    ) -> None:
+        self.create_many = create_many
+        self.create_one = create_one
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, item: dict) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await asyncio.shield(future)
+
+    async def drain(self) -> None:
+        """
+        Write the pending items now and wait for every batch in flight.
+        """
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        results = await self._create([item for item, _ in batch])
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _create(self, items: list[dict]) -> list[Any]:
+        try:
+            async with async_session_maker() as session:
+                return await self.create_many(items, session)
+        except Exception:
+            # The transaction was rolled back: nothing of the batch is written
+            logger.exception(f"Batch of {len(items)} writes failed, retrying each")
+
+        results: list[Any] = []
+        for item in items:
+            try:
+                async with async_session_maker() as session:
+                    results.append(await self.create_one(dict(item), session))
+            except Exception as exc:
+                results.append(exc)
+        return results
@@ -1,12 +1,114 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from config import get_settings
 from fastapi import FastAPI
+from infrastructure.job_runner import job_runner
+from infrastructure.notifications import broadcaster
+from infrastructure.periodic import PeriodicTask
+from infrastructure.site_read_model import site_read_model
+from infrastructure.tracing import FileSpanExporter, OTLPHttpSpanExporter, tracer
+from middlewares.admission import AdmissionControlMiddleware, RouteClass
+from middlewares.compression import CompressionMiddleware
+from middlewares.profiling import ProfilingMiddleware
+from middlewares.tracing import TracingMiddleware
+from routes.change import router as change_router
+from routes.event import router as event_router
+from routes.export import router as export_router
+from routes.group import group_batcher
 from routes.group import router as group_router
+from routes.job import router as job_router
+from routes.projection import router as projection_router
 from routes.site import router as site_router
+from routes.site import site_batcher
+from services.site_stats import fold_site_stats
+from starlette.concurrency import run_in_threadpool
+
+settings = get_settings()
+site_stats_folder = PeriodicTask(
+    "site-stats-fold", settings.site_stats_fold_interval_seconds, fold_site_stats
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await job_runner.start()
+    await broadcaster.start()
+    await site_stats_folder.start()
+    if settings.site_read_model_enabled:
+        await site_read_model.start()
+    yield
+    for batcher in (site_batcher, group_batcher):
+        if batcher is not None:
+            await batcher.drain()
+    await site_read_model.stop()
+    await site_stats_folder.stop()
+    await broadcaster.stop()
+    await job_runner.stop()
+    await run_in_threadpool(tracer.stop)
+
+
+app = FastAPI(title="Python Technical Test", lifespan=lifespan)
 
-app = FastAPI(title="Python Technical Test")
+# Middlewares
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    offload_size=settings.compression_offload_size,
+)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    route_classes={
+        "read": RouteClass(
+            settings.admission_read_limit, settings.admission_max_waiting
+        ),
+        "write": RouteClass(
+            settings.admission_write_limit, settings.admission_max_waiting
+        ),
+        "export": RouteClass(
+            settings.admission_export_limit,
+            settings.admission_max_waiting,
+            statement_timeout_ms=settings.export_statement_timeout_ms,
+        ),
+    },
+    wait_timeout=settings.admission_wait_timeout_seconds,
+    retry_after=settings.admission_retry_after_seconds,
+)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.profiling_output_dir,
+        header=settings.profiling_header,
+        token=settings.profiling_token,
+        sample_rate=settings.profiling_sample_rate,
+        interval=settings.profiling_interval_seconds,
+        output_format=settings.profiling_format,
+    )
+if settings.tracing_enabled:
+    if settings.tracing_exporter == "otlp":
+        exporter = OTLPHttpSpanExporter(
+            settings.tracing_otlp_endpoint, settings.tracing_service_name
+        )
+    else:
+        exporter = FileSpanExporter(
+            settings.tracing_file_path, settings.tracing_service_name
+        )
+    tracer.configure(
+        exporter,
+        settings.tracing_sample_rate,
+        queue_size=settings.tracing_export_queue_size,
+        batch_size=settings.tracing_export_batch_size,
+    )
+    app.add_middleware(TracingMiddleware, tracer=tracer)
 
 # Routers
 app.include_router(site_router)
 app.include_router(group_router)
+app.include_router(job_router)
+app.include_router(change_router)
+app.include_router(event_router)
+app.include_router(export_router)
+app.include_router(projection_router)
 
 
 @app.get("/")
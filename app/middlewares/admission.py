@@ -0,0 +1,116 @@
+import asyncio
+
+from fastapi.responses import JSONResponse
+from infrastructure.db import query_origin, statement_timeout_ms
+from logger import get_logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = get_logger(__name__)
+
+# Paths that never hold a database connection
+UNLIMITED_PATHS = ("/docs", "/redoc", "/openapi.json", "/events")
+
+
+def classify_route(method: str, path: str) -> str | None:
+    """
+    Route class of a request: 'export', 'read' or 'write', or None for
+    requests that do not use the database.
+    """
+    if path == "/" or path.startswith(UNLIMITED_PATHS):
+        return None
+    if path.startswith("/exports"):
+        return "export"
+    if method in ("GET", "HEAD") or path.endswith("/batch-get"):
+        return "read"
+    return "write"
+
+
+class RouteClass:
+    """
+    Concurrency budget shared by one class of DB-bound routes: at most
+    `limit` requests run at once and at most `max_waiting` more queue for a
+    slot. Requests run with `statement_timeout` set to `statement_timeout_ms`
+    when given, otherwise with the connection default.
+    """
+
+    def __init__(
+        self, limit: int, max_waiting: int, statement_timeout_ms: int | None = None
+    ) -> None:
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.statement_timeout_ms = statement_timeout_ms
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, wait_timeout: float) -> bool:
+        """
+        Take a slot, waiting at most `wait_timeout` seconds. Returns False
+        at once when the queue is full, or when the wait times out.
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        return True
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load before it reaches the connection pool.
+
+    Each DB-bound request takes a slot of its route class for its whole
+    lifetime, streamed bodies included. Once a class's slots and queue are
+    full, or a queued request waits longer than `wait_timeout`, the request
+    is answered with 503 and a `Retry-After` header instead of piling up on
+    the pool. Keep the sum of the class limits within the pool size.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_classes: dict[str, RouteClass],
+        wait_timeout: float = 2.0,
+        retry_after: int = 1,
+    ) -> None:
+        self.app = app
+        self.route_classes = route_classes
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = classify_route(scope["method"], scope["path"])
+        route_class = self.route_classes.get(name)
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await route_class.acquire(self.wait_timeout):
+            logger.warning(f"Shedding {scope['method']} {scope['path']} ({name})")
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later."},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        token = statement_timeout_ms.set(route_class.statement_timeout_ms)
+        origin_token = query_origin.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_origin.reset(origin_token)
+            statement_timeout_ms.reset(token)
+            route_class.release()
@@ -0,0 +1,127 @@
+import gzip
+from collections.abc import Callable
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Codecs in server preference order; zstd and brotli are used when installed
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {}
+try:
+    import zstandard
+
+    COMPRESSORS["zstd"] = zstandard.ZstdCompressor(level=3).compress
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+try:
+    import brotli
+
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=6)
+
+# Streaming responses must reach the client chunk by chunk
+UNBUFFERED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/vnd.apache.arrow.stream",
+    "application/vnd.apache.parquet",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Pick the best available codec for an `Accept-Encoding` header, honouring
+    q-values and breaking ties with the order of `COMPRESSORS`.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if token:
+            weights[token] = weight
+
+    best, best_weight = None, 0.0
+    for name in COMPRESSORS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies of at least `minimum_size` bytes with the best
+    codec the client accepts (zstd, br or gzip).
+
+    Bodies of `offload_size` bytes or more are compressed in the threadpool so
+    multi-megabyte listings do not block the event loop. Event streams and
+    responses that are already encoded pass through untouched.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, offload_size: int = 262_144
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or content_type.startswith(
+                    UNBUFFERED_CONTENT_TYPES
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start_message["headers"])
+            if len(body) >= self.minimum_size:
+                compress = COMPRESSORS[encoding]
+                if len(body) >= self.offload_size:
+                    body = await run_in_threadpool(compress, body)
+                else:
+                    body = compress(body)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
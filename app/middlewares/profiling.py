@@ -0,0 +1,116 @@
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from logger import get_logger
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import PstatsRenderer, SpeedscopeRenderer
+
+    # format -> (renderer, file suffix)
+    PROFILE_FORMATS = {
+        "speedscope": (SpeedscopeRenderer, "speedscope.json"),
+        "pstats": (PstatsRenderer, "pstats"),
+    }
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+    PROFILE_FORMATS = {}
+
+logger = get_logger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests with pyinstrument's sampling profiler and save
+    one file per request in `output_dir`, either speedscope JSON (a
+    flamegraph viewer format) or pstats.
+
+    A request is profiled when it carries the `header` header with the value
+    `token` or, failing that, with probability `sample_rate`. Without a
+    token the header is ignored, so clients cannot force profiling on a
+    server that only samples. The profile follows the request's task across awaits, so
+    it covers routing, services, SQLAlchemy and serialization; work offloaded
+    to the threadpool shows up as time spent awaiting it. The file name is
+    returned in the `X-Profile-Id` response header.
+
+    The middleware is only installed when profiling is enabled, so it costs
+    nothing otherwise.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str,
+        header: str = "X-Profile",
+        token: str | None = None,
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        output_format: str = "speedscope",
+    ) -> None:
+        if Profiler is None:
+            raise RuntimeError(
+                "Request profiling requires pyinstrument (the `profiling` extra)"
+            )
+        if output_format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format: {output_format}")
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.header = header.lower()
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.output_format = output_format
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.token is not None and (
+            Headers(scope=scope).get(self.header) == self.token
+        ):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _profile_name(self, scope: Scope) -> str:
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        _, suffix = PROFILE_FORMATS[self.output_format]
+        return (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{path}-"
+            f"{uuid.uuid4().hex[:8]}.{suffix}"
+        )
+
+    def _save(self, profiler: "Profiler", name: str) -> None:
+        renderer, _ = PROFILE_FORMATS[self.output_format]
+        output = profiler.output(renderer())
+        # Binary renderers hand back bytes smuggled in a str
+        (self.output_dir / name).write_bytes(
+            output.encode("utf-8", errors="surrogateescape")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = self._profile_name(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = name
+            await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            await run_in_threadpool(self._save, profiler, name)
+            logger.info(
+                f"Profiled {scope['method']} {scope['path']} "
+                f"({profiler.last_session.duration:.3f}s) to {name}"
+            )
@@ -0,0 +1,51 @@
+from infrastructure.tracing import TRACEPARENT_HEADER, Tracer, current_span
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class TracingMiddleware:
+    """
+    Open the root span of each traced HTTP request.
+
+    An incoming W3C `traceparent` header is continued: the request span
+    becomes a child of the caller's span. The span covers the whole
+    exchange, streamed bodies included, and the trace id is returned in the
+    `X-Trace-Id` response header. The trace is queued for export once the
+    response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        span = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            Headers(scope=scope).get(TRACEPARENT_HEADER),
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message)["X-Trace-Id"] = span.trace_id
+            await send(message)
+
+        token = current_span.set(span)
+        error: BaseException | None = None
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            current_span.reset(token)
+            span.end(error)
+            self.tracer.submit(span.spans)
@@ -0,0 +1,105 @@
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from typing import Any
+
+import msgpack
+from config import get_settings
+from fastapi import Request, Response
+from infrastructure.single_flight import SingleFlight
+from infrastructure.tracing import tracer
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = (
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/vnd.msgpack",
+)
+
+# In-flight list queries, shared by identical concurrent requests
+list_flights = SingleFlight()
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """
+    Whether the client asked for MessagePack in its `Accept` header.
+    """
+    for item in request.headers.get("accept", "").split(","):
+        media_type, _, params = item.strip().partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            return params.strip() not in ("q=0", "q=0.0")
+    return False
+
+
+async def encode_list(
+    items: Sequence[Any], adapter: TypeAdapter, use_msgpack: bool
+) -> bytes:
+    """
+    Validate `items` against `adapter` and encode them as JSON or
+    MessagePack.
+
+    Lists of `encoding_offload_min_items` items or more are validated and
+    encoded in the threadpool to keep the event loop responsive.
+    """
+
+    def encode() -> bytes:
+        data = adapter.validate_python(items, from_attributes=True)
+        if use_msgpack:
+            return msgpack.packb(adapter.dump_python(data, mode="json"))
+        return adapter.dump_json(data)
+
+    with tracer.span(
+        "serialize", items=len(items), format="msgpack" if use_msgpack else "json"
+    ):
+        if len(items) >= get_settings().encoding_offload_min_items:
+            return await run_in_threadpool(encode)
+        return encode()
+
+
+def list_response(
+    body: bytes, use_msgpack: bool, headers: dict[str, str] | None = None
+) -> Response:
+    return Response(
+        content=body,
+        media_type=MSGPACK_MEDIA_TYPES[0] if use_msgpack else JSON_MEDIA_TYPE,
+        headers={**(headers or {}), "Vary": "Accept"},
+    )
+
+
+def list_key(listing: str, params: dict[str, Any]) -> Hashable:
+    """
+    Normalized coalescing key of a listing: parameters left at None do not
+    count, and the parameter order does not matter.
+    """
+    return listing, tuple(
+        sorted((name, value) for name, value in params.items() if value is not None)
+    )
+
+
+async def coalesced_list_response(
+    request: Request,
+    key: Hashable,
+    load: Callable[[], Awaitable[tuple[Sequence[Any], dict[str, str]]]],
+    adapter: TypeAdapter,
+) -> Response:
+    """
+    Encode the listing loaded by `load()` (items and headers) as JSON or,
+    when the client accepts it, MessagePack.
+
+    Concurrent requests with the same `key` and encoding share one `load()`
+    call and one encoded body, so a burst of identical listings costs one
+    query. `key` must capture every parameter of the listing. A request
+    that joins a call started before its own last write may not see that
+    write.
+
+    `load()` must not use the request's session: it may outlive the request
+    that started it.
+    """
+    use_msgpack = accepts_msgpack(request)
+
+    async def load_and_encode() -> tuple[bytes, dict[str, str]]:
+        items, headers = await load()
+        return await encode_list(items, adapter, use_msgpack), headers
+
+    body, headers = await list_flights.do((key, use_msgpack), load_and_encode)
+    return list_response(body, use_msgpack, headers)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from infrastructure.db import get_session
+from schemas.change import ChangeFeedResponse
+from services.change import get_changes
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+session_dep = Depends(get_session)
+
+
+@router.get("/", response_model=ChangeFeedResponse)
+async def list_changes(
+    since: str | None = Query(
+        None, description="Cursor returned as next_cursor by the previous call"
+    ),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum changes"),
+    session: AsyncSession = session_dep,
+):
+    """
+    Ordered inserts, updates and deletes of sites, groups and their links
+    since a cursor. Omit `since` to read the feed from the start.
+    """
+    return await get_changes(session, since, limit)
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from config import get_settings
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from infrastructure.models.change_log import ChangeEntityEnum
+from infrastructure.notifications import RESYNC_EVENT, broadcaster
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+entity_query = Query(None, description="Only stream changes of this entity")
+
+
+@router.get("/")
+async def stream_events(
+    request: Request, entity: ChangeEntityEnum | None = entity_query
+):
+    """
+    Server-Sent Events stream of site and group changes.
+
+    Each `change` event carries `{"entity", "operation", "id"}` (plus
+    `related_ids` for links: a `site_group` event names the site and its
+    groups, a `group_group` event the parent and its children). Links
+    removed by deleting a site or group travel with that delete event.
+
+    A `resync` event means events were missed because the client fell
+    behind or the server lost its database listener; the stream then ends
+    and the client should catch up from GET /changes.
+    """
+    keepalive = get_settings().events_keepalive_seconds
+
+    async def event_stream():
+        async with broadcaster.subscribe() as subscriber:
+            while True:
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield f"event: {RESYNC_EVENT}\ndata: {{}}\n\n"
+                    return
+                try:
+                    payload = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=keepalive
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if entity and json.loads(payload).get("entity") != entity.value:
+                    continue
+                yield f"event: change\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
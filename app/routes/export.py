@@ -0,0 +1,40 @@
+from config import get_settings
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from infrastructure.db import async_session_maker
+from services.export import (
+    EXPORT_FILE_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    ExportFormatEnum,
+    ExportTableEnum,
+    export_table,
+)
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+format_query = Query(ExportFormatEnum.arrow, description="arrow or parquet")
+
+
+@router.get("/{table}")
+async def export_table_endpoint(
+    table: ExportTableEnum, format: ExportFormatEnum = format_query
+):
+    """
+    Download a table as an Arrow IPC stream or a Parquet file.
+
+    The body is streamed batch by batch straight from a database cursor.
+    """
+    batch_size = get_settings().export_batch_size
+
+    async def export_stream():
+        # The request's session is closed before a streamed body is sent
+        async with async_session_maker() as session:
+            async for chunk in export_table(table, format, session, batch_size):
+                yield chunk
+
+    filename = f"{table.value}.{EXPORT_FILE_EXTENSIONS[format]}"
+    return StreamingResponse(
+        export_stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,12 +1,30 @@
-from fastapi import APIRouter, Depends, Query
-from infrastructure.db import get_session
+from config import get_settings
+from fastapi import APIRouter, Depends, Query, Request
+from infrastructure.db import async_session_maker, get_session
 from infrastructure.models.group import GroupTypeEnum
-from schemas.group import GroupCreate, GroupResponse, GroupUpdate
+from infrastructure.write_batcher import WriteBatcher
+from pydantic import TypeAdapter
+from responses import coalesced_list_response, list_key
+from schemas.group import (
+    BidCurveBatchResponse,
+    BidCurveResponse,
+    GroupBatchGetRequest,
+    GroupBatchGetResponse,
+    GroupCreate,
+    GroupResponse,
+    GroupUpdate,
+)
+from services.bid_curve import get_bid_curve, get_bid_curves
+from services.counting import CountModeEnum
 from services.group import (
     add_child_groups,
+    count_groups,
     create_group,
+    create_groups,
     delete_group,
     get_all_groups,
+    get_group_by_id,
+    get_groups_by_ids,
     remove_child_groups,
     update_group,
 )
@@ -15,29 +33,124 @@ from sqlalchemy.ext.asyncio import AsyncSession
 router = APIRouter(prefix="/groups", tags=["Groups"])
 
 session_dep = Depends(get_session)
+settings = get_settings()
+group_batcher = (
+    WriteBatcher(
+        create_groups,
+        create_group,
+        max_delay=settings.write_batch_max_delay_ms / 1000,
+        max_size=settings.write_batch_max_size,
+    )
+    if settings.write_batching_enabled
+    else None
+)
+group_list_adapter = TypeAdapter(list[GroupResponse])
 group_type_query = Query(None, description="Filter groups by type")
+count_query = Query(
+    None,
+    description=(
+        "Return the total in X-Total-Count: 'exact' (COUNT(*)) or "
+        "'estimate' (planner statistics, for large unfiltered listings)"
+    ),
+)
 
 
 @router.get("/", response_model=list[GroupResponse])
 async def list_groups(
+    request: Request,
     group_type: GroupTypeEnum | None = group_type_query,
     sort_by: str | None = Query(
         None, description="Field to sort by (e.g., 'name' or 'id')"
     ),
     order: str = Query("asc", description="Sort order: 'asc' or 'desc'"),
-    session: AsyncSession = session_dep,
+    q: str | None = Query(
+        None, min_length=1, description="Fuzzy search on name, ranked by similarity"
+    ),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size"),
+    offset: int = Query(0, ge=0, description="Number of groups to skip"),
+    count: CountModeEnum | None = count_query,
 ):
     """
-    Retrieve all groups with optional filters and sorting.
+    Retrieve all groups with optional filters, search, sorting and paging.
+    With `count`, the total number of matching groups is returned in the
+    `X-Total-Count` header. Send `Accept: application/msgpack` for a
+    MessagePack body. Identical concurrent requests share one query.
+    """
+    params = {
+        "group_type": group_type,
+        "sort_by": sort_by,
+        "order": order,
+        "q": q,
+        "limit": limit,
+        "offset": offset,
+        "count": count,
+    }
+
+    async def load() -> tuple[list, dict[str, str]]:
+        async with async_session_maker() as session:
+            groups = await get_all_groups(
+                session, group_type, sort_by, order, q=q, limit=limit, offset=offset
+            )
+            headers = {}
+            if count:
+                total = await count_groups(session, count, group_type=group_type, q=q)
+                headers["X-Total-Count"] = str(total)
+        return groups, headers
+
+    return await coalesced_list_response(
+        request, list_key("groups", params), load, group_list_adapter
+    )
+
+
+@router.post("/batch-get", response_model=GroupBatchGetResponse)
+async def batch_get_groups(
+    data: GroupBatchGetRequest, session: AsyncSession = session_dep
+):
+    """
+    Fetch many groups by ID in two queries. IDs that do not exist are listed
+    in `missing_ids`.
+    """
+    groups, missing_ids = await get_groups_by_ids(data.ids, session)
+    return {"groups": groups, "missing_ids": missing_ids}
+
+
+@router.post("/bid-curves/batch-get", response_model=BidCurveBatchResponse)
+async def batch_get_bid_curves(
+    data: GroupBatchGetRequest, session: AsyncSession = session_dep
+):
+    """
+    Bid curves of many groups in two queries. IDs that do not exist are
+    listed in `missing_ids`.
+    """
+    curves, missing_ids = await get_bid_curves(data.ids, session)
+    return {"curves": curves, "missing_ids": missing_ids}
+
+
+@router.get("/{group_id}/bid-curve", response_model=BidCurveResponse)
+async def group_bid_curve(group_id: int, session: AsyncSession = session_dep):
+    """
+    Aggregated stepwise bid curve of a group's sites, descendant groups
+    included, from their minimum and maximum power.
+    """
+    return await get_bid_curve(group_id, session)
+
+
+@router.get("/{group_id}", response_model=GroupResponse)
+async def get_group(group_id: int, session: AsyncSession = session_dep):
+    """
+    Retrieve a group by ID.
     """
-    return await get_all_groups(session, group_type, sort_by, order)
+    return await get_group_by_id(group_id, session)
 
 
 @router.post("/", response_model=GroupResponse, status_code=201)
 async def create_new_group(data: GroupCreate, session: AsyncSession = session_dep):
     """
-    Create a new group with business logic:
+    Create a new group. With write batching enabled, concurrent creates are
+    committed together.
     """
+    if group_batcher is not None:
+        return await group_batcher.submit(data.model_dump())
     return await create_group(data.model_dump(), session)
 
 
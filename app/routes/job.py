@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends
+from infrastructure.db import get_session
+from infrastructure.models.job import JobKindEnum
+from schemas.job import JobResponse, SiteBulkUpdate
+from schemas.site import SiteCreate
+from services.job import cancel_job, get_job, submit_job
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+session_dep = Depends(get_session)
+
+
+@router.post("/site-import", response_model=JobResponse, status_code=202)
+async def submit_site_import(
+    sites: list[SiteCreate], session: AsyncSession = session_dep
+):
+    """
+    Import many sites in the background, with all business rules applied.
+    """
+    params = {"sites": [site.model_dump(mode="json") for site in sites]}
+    return await submit_job(JobKindEnum.site_import, params, session)
+
+
+@router.post("/site-update", response_model=JobResponse, status_code=202)
+async def submit_site_update(data: SiteBulkUpdate, session: AsyncSession = session_dep):
+    """
+    Apply the same changes to many sites in the background.
+    """
+    params = {
+        "site_ids": data.site_ids,
+        "changes": data.changes.model_dump(mode="json", exclude_unset=True),
+    }
+    return await submit_job(JobKindEnum.site_update, params, session)
+
+
+@router.post("/site-revalidation", response_model=JobResponse, status_code=202)
+async def submit_site_revalidation(session: AsyncSession = session_dep):
+    """
+    Re-check all existing sites against the business rules in the background.
+    """
+    return await submit_job(JobKindEnum.site_revalidation, {}, session)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: int, session: AsyncSession = session_dep):
+    """
+    Poll the status and progress of a job.
+    """
+    return await get_job(job_id, session)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_existing_job(job_id: int, session: AsyncSession = session_dep):
+    """
+    Cancel a pending job or ask a running job to stop.
+    """
+    return await cancel_job(job_id, session)
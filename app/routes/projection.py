@@ -0,0 +1,33 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from infrastructure.db import get_session
+from infrastructure.models.site import CountryEnum
+from schemas.projection import ProjectionLevelEnum, ProjectionResponse
+from services.projection import get_projection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/projections", tags=["Projections"])
+
+session_dep = Depends(get_session)
+date_from_query = Query(..., alias="from", description="First date (inclusive)")
+date_to_query = Query(..., alias="to", description="Last date (inclusive)")
+level_query = Query(
+    ProjectionLevelEnum.country, description="Aggregate per site, group or country"
+)
+country_query = Query(None, description="Restrict to one country")
+
+
+@router.get("/", response_model=ProjectionResponse)
+async def projections(
+    date_from: date = date_from_query,
+    date_to: date = date_to_query,
+    level: ProjectionLevelEnum = level_query,
+    country: CountryEnum | None = country_query,
+    session: AsyncSession = session_dep,
+):
+    """
+    Projected minimum and maximum deliverable energy (MWh) between two
+    dates, per site, group or country, returned as parallel arrays.
+    """
+    return await get_projection(session, date_from, date_to, level, country)
@@ -1,32 +1,235 @@
-from fastapi import APIRouter, Depends, Query
-from infrastructure.db import get_session
-from schemas.site import SiteCreate, SiteResponse, SiteUpdate
-from services.site import create_site, delete_site, get_all_sites, update_site
+from datetime import date
+
+from config import get_settings
+from fastapi import APIRouter, Depends, Query, Request
+from infrastructure.db import async_session_maker, get_session
+from infrastructure.models.site import CountryEnum
+from infrastructure.site_read_model import site_read_model
+from infrastructure.write_batcher import WriteBatcher
+from pydantic import TypeAdapter
+from responses import coalesced_list_response, list_key
+from schemas.site import (
+    CapacityTimelinePoint,
+    SiteAvailability,
+    SiteBatchGetRequest,
+    SiteBatchGetResponse,
+    SiteCountryStatsResponse,
+    SiteCreate,
+    SiteResponse,
+    SiteUpdate,
+    TimelineGranularityEnum,
+)
+from services.counting import CountModeEnum
+from services.site import (
+    count_sites,
+    create_site,
+    create_sites,
+    delete_site,
+    get_all_sites,
+    get_available_installation_dates,
+    get_capacity_timeline,
+    get_site_by_id,
+    get_sites_by_ids,
+    update_site,
+)
+from services.site_stats import get_site_stats
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/sites", tags=["Sites"])
 
 session_dep = Depends(get_session)
+settings = get_settings()
+site_batcher = (
+    WriteBatcher(
+        create_sites,
+        create_site,
+        max_delay=settings.write_batch_max_delay_ms / 1000,
+        max_size=settings.write_batch_max_size,
+    )
+    if settings.write_batching_enabled
+    else None
+)
+site_list_adapter = TypeAdapter(list[SiteResponse])
+installation_date_from_query = Query(
+    None, description="Earliest installation date (inclusive)"
+)
+installation_date_to_query = Query(
+    None, description="Latest installation date (inclusive)"
+)
+granularity_query = Query(
+    TimelineGranularityEnum.month, description="Bucket size: day, week or month"
+)
+timeline_country_query = Query(None, description="Restrict to one country")
+availability_country_query = Query(..., description="Country of the new site")
+date_from_query = Query(..., alias="from", description="First date (inclusive)")
+date_to_query = Query(..., alias="to", description="Last date (inclusive)")
+count_query = Query(
+    None,
+    description=(
+        "Return the total in X-Total-Count: 'exact' (COUNT(*)) or "
+        "'estimate' (planner statistics, for large unfiltered listings)"
+    ),
+)
 
 
 @router.get("/", response_model=list[SiteResponse])
 async def list_sites(
+    request: Request,
     country: str | None = Query(None, description="Filter by country (FR or IT)"),
-    sort_by: str | None = Query("installation_date", description="Field to sort by"),
+    sort_by: str | None = Query(
+        "installation_date",
+        description=(
+            "Field to sort by, '-' prefix for descending (id, "
+            "installation_date, max_power_megawatt, min_power_megawatt), "
+            "optionally followed by ',id' in the same direction. Range "
+            "filters are only allowed on this field."
+        ),
+    ),
     order: str | None = Query("asc", description="Sort order: asc or desc"),
+    installation_date_from: date | None = installation_date_from_query,
+    installation_date_to: date | None = installation_date_to_query,
+    max_power_megawatt_from: float | None = Query(
+        None, description="Lower bound on max power (inclusive)"
+    ),
+    max_power_megawatt_to: float | None = Query(
+        None, description="Upper bound on max power (inclusive)"
+    ),
+    min_power_megawatt_from: float | None = Query(
+        None, description="Lower bound on min power (inclusive)"
+    ),
+    min_power_megawatt_to: float | None = Query(
+        None, description="Upper bound on min power (inclusive)"
+    ),
+    q: str | None = Query(
+        None, min_length=1, description="Fuzzy search on name, ranked by similarity"
+    ),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size"),
+    offset: int = Query(0, ge=0, description="Number of sites to skip"),
+    count: CountModeEnum | None = count_query,
+):
+    """
+    Retrieve all sites with optional filtering, search, sorting and paging.
+    With `count`, the total number of matching sites is returned in the
+    `X-Total-Count` header. Send `Accept: application/msgpack` for a
+    MessagePack body. Identical concurrent requests share one query.
+    Listings served by the in-memory read model report its consistency lag
+    in the `X-Read-Model-Lag-Ms` header.
+    """
+    filters = {
+        "country": country,
+        "q": q,
+        "installation_date_from": installation_date_from,
+        "installation_date_to": installation_date_to,
+        "max_power_megawatt_from": max_power_megawatt_from,
+        "max_power_megawatt_to": max_power_megawatt_to,
+        "min_power_megawatt_from": min_power_megawatt_from,
+        "min_power_megawatt_to": min_power_megawatt_to,
+    }
+    params = {
+        **filters,
+        "sort_by": sort_by,
+        "order": order,
+        "limit": limit,
+        "offset": offset,
+        "count": count,
+    }
+
+    async def load() -> tuple[list, dict[str, str]]:
+        headers = {}
+        from_memory = site_read_model.can_serve(filters)
+        async with async_session_maker() as session:
+            sites = await get_all_sites(
+                session,
+                sort_by=sort_by,
+                order=order,
+                limit=limit,
+                offset=offset,
+                **filters,
+            )
+            if count:
+                total = await count_sites(session, count, **filters)
+                headers["X-Total-Count"] = str(total)
+        if from_memory:
+            lag_ms = site_read_model.lag_seconds * 1000
+            headers["X-Read-Model-Lag-Ms"] = str(round(lag_ms))
+        return sites, headers
+
+    return await coalesced_list_response(
+        request, list_key("sites", params), load, site_list_adapter
+    )
+
+
+@router.get("/capacity-timeline", response_model=list[CapacityTimelinePoint])
+async def capacity_timeline(
+    granularity: TimelineGranularityEnum = granularity_query,
+    country: CountryEnum | None = timeline_country_query,
+    session: AsyncSession = session_dep,
+):
+    """
+    Cumulative installed capacity per country over time.
+    """
+    return await get_capacity_timeline(session, granularity, country)
+
+
+@router.get("/availability", response_model=SiteAvailability)
+async def installation_availability(
+    country: CountryEnum = availability_country_query,
+    date_from: date = date_from_query,
+    date_to: date = date_to_query,
     session: AsyncSession = session_dep,
 ):
     """
-    Retrieve all sites with optional filtering and sorting.
+    List the installation dates that satisfy the country rules in a range
+    (free days for France, weekends for Italy).
+    """
+    available_dates = await get_available_installation_dates(
+        session, country, date_from, date_to
+    )
+    return SiteAvailability(
+        country=country,
+        date_from=date_from,
+        date_to=date_to,
+        available_dates=available_dates,
+    )
+
+
+@router.get("/stats", response_model=list[SiteCountryStatsResponse])
+async def site_stats(session: AsyncSession = session_dep):
+    """
+    Per-country site counts, total and average power, and average
+    efficiency / useful energy.
+    """
+    return await get_site_stats(session)
+
+
+@router.post("/batch-get", response_model=SiteBatchGetResponse)
+async def batch_get_sites(
+    data: SiteBatchGetRequest, session: AsyncSession = session_dep
+):
+    """
+    Fetch many sites by ID in two queries. IDs that do not exist are listed
+    in `missing_ids`.
+    """
+    sites, missing_ids = await get_sites_by_ids(data.ids, session)
+    return {"sites": sites, "missing_ids": missing_ids}
+
+
+@router.get("/{site_id}", response_model=SiteResponse)
+async def get_site(site_id: int, session: AsyncSession = session_dep):
+    """
+    Retrieve a site by ID.
     """
-    return await get_all_sites(session, country=country, sort_by=sort_by, order=order)
+    return await get_site_by_id(site_id, session)
 
 
 @router.post("/", response_model=SiteResponse, status_code=201)
 async def create_new_site(data: SiteCreate, session: AsyncSession = session_dep):
     """
-    Create a new site with all business rules applied.
+    Create a new site with all business rules applied. With write batching
+    enabled, concurrent creates are committed together.
     """
+    if site_batcher is not None:
+        return await site_batcher.submit(data.model_dump())
     return await create_site(data.model_dump(), session)
 
 
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Any
+
+from infrastructure.models.change_log import ChangeEntityEnum, ChangeOperationEnum
+from pydantic import BaseModel
+
+
+class ChangeEntry(BaseModel):
+    """
+    One change of a site, group or association row.
+
+    `data` holds the current columns of a site or group for inserts and
+    updates (None once the row is gone). For association rows, `entity_id`
+    is the site / parent group id and `related_id` the group / child group id.
+    """
+
+    cursor: str
+    entity: ChangeEntityEnum
+    operation: ChangeOperationEnum
+    entity_id: int
+    related_id: int | None = None
+    changed_at: datetime
+    data: dict[str, Any] | None = None
+
+
+class ChangeFeedResponse(BaseModel):
+    """
+    A page of the change feed. Pass `next_cursor` as `since` to continue.
+    """
+
+    changes: list[ChangeEntry]
+    next_cursor: str | None
+    has_more: bool
@@ -43,3 +43,33 @@ class GroupResponse(GroupBase):
             [c.id for c in obj.child_groups] if obj.child_groups else []
         )
         return cls.model_validate(data)
+
+
+class GroupBatchGetRequest(BaseModel):
+    ids: list[int] = Field(..., example=[1, 2, 3])
+
+
+class GroupBatchGetResponse(BaseModel):
+    groups: list[GroupResponse]
+    missing_ids: list[int]
+
+
+class BidCurveResponse(BaseModel):
+    """
+    Stepwise bid curve of a group as parallel arrays, one entry per member
+    site (descendant groups included) in merit order. After step k the group
+    can offer any volume between `cumulative_min_megawatt[k]` and
+    `cumulative_max_megawatt[k]`.
+    """
+
+    group_id: int
+    site_ids: list[int]
+    min_power_megawatt: list[float]
+    max_power_megawatt: list[float]
+    cumulative_min_megawatt: list[float]
+    cumulative_max_megawatt: list[float]
+
+
+class BidCurveBatchResponse(BaseModel):
+    curves: list[BidCurveResponse]
+    missing_ids: list[int]
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any
+
+from infrastructure.models.job import JobKindEnum, JobStatusEnum
+from pydantic import BaseModel, ConfigDict, Field
+
+from .site import SiteUpdate
+
+
+class SiteBulkUpdate(BaseModel):
+    """
+    Schema for applying the same changes to many sites in a background job.
+    """
+
+    site_ids: list[int] = Field(..., min_length=1, example=[1, 2, 3])
+    changes: SiteUpdate
+
+
+class JobResponse(BaseModel):
+    """
+    Response schema for a background job.
+    """
+
+    id: int
+    kind: JobKindEnum
+    status: JobStatusEnum
+    processed: int = 0
+    total: int | None = None
+    cancel_requested: bool = False
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
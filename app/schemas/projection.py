@@ -0,0 +1,29 @@
+import enum
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class ProjectionLevelEnum(str, enum.Enum):
+    site = "site"
+    group = "group"
+    country = "country"
+
+
+class ProjectionResponse(BaseModel):
+    """
+    Projected energy over a date range, aggregated at one level. The lists
+    are columns: entry i of each list belongs to `keys[i]` (a site id, a
+    group id or a country code).
+    """
+
+    date_from: date
+    date_to: date
+    level: ProjectionLevelEnum
+    keys: list[int] | list[str]
+    site_counts: list[int]
+    operating_days: list[int]
+    min_energy_mwh: list[float]
+    max_energy_mwh: list[float]
+    total_min_energy_mwh: float
+    total_max_energy_mwh: float
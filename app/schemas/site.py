@@ -1,3 +1,4 @@
+import enum
 from datetime import date
 
 from infrastructure.models.site import CountryEnum
@@ -42,3 +43,56 @@ class SiteResponse(SiteBase):
     groups: list[GroupResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SiteBatchGetRequest(BaseModel):
+    ids: list[int] = Field(..., example=[1, 2, 3])
+
+
+class SiteBatchGetResponse(BaseModel):
+    sites: list[SiteResponse]
+    missing_ids: list[int]
+
+
+class TimelineGranularityEnum(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class CapacityTimelinePoint(BaseModel):
+    """
+    Installed capacity of one country in one period, with the running total
+    since the first installation.
+    """
+
+    country: CountryEnum
+    period: date
+    installed_megawatt: float
+    cumulative_megawatt: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SiteAvailability(BaseModel):
+    """
+    Dates in a range on which a site of the given country can be installed.
+    """
+
+    country: CountryEnum
+    date_from: date
+    date_to: date
+    available_dates: list[date]
+
+
+class SiteCountryStatsResponse(BaseModel):
+    """
+    Summary statistics of the sites of one country.
+    """
+
+    country: CountryEnum
+    site_count: int
+    total_max_power_megawatt: float
+    average_max_power_megawatt: float | None
+    average_efficiency: float | None
+    average_useful_energy_at_1_megawatt: float | None
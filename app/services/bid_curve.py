@@ -0,0 +1,153 @@
+from collections.abc import Sequence
+
+import numpy as np
+from exceptions import BusinessLogicException
+from infrastructure.models.associations import group_group_table, site_group_table
+from infrastructure.models.group import Group
+from infrastructure.models.site import Site
+from infrastructure.tracing import traced
+from logger import get_logger
+from sqlalchemy import Integer, and_, any_, func, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+logger = get_logger(__name__)
+
+
+def _members_query(group_ids: list[int]):
+    """
+    One row holding, as aligned arrays, every (group, site) pair where the
+    site belongs to the group or to one of its descendants, with the site's
+    power ratings. A site reached through several paths is listed once.
+    """
+    id_array = literal(group_ids, postgresql.ARRAY(Integer))
+    tree = (
+        select(Group.id.label("root_id"), Group.id.label("group_id"))
+        .where(Group.id == any_(id_array))
+        .cte("tree", recursive=True)
+    )
+    # UNION (not UNION ALL) drops groups already reached from the same root
+    tree = tree.union(
+        select(tree.c.root_id, group_group_table.c.child_group_id).join(
+            group_group_table, group_group_table.c.parent_group_id == tree.c.group_id
+        )
+    )
+    members = (
+        select(
+            tree.c.root_id,
+            Site.id.label("site_id"),
+            Site.min_power_megawatt,
+            Site.max_power_megawatt,
+        )
+        .distinct()
+        .join(site_group_table, site_group_table.c.group_id == tree.c.group_id)
+        .join(
+            Site,
+            and_(
+                Site.id == site_group_table.c.site_id,
+                Site.country == site_group_table.c.site_country,
+            ),
+        )
+        .subquery()
+    )
+    return select(
+        func.array_agg(members.c.root_id),
+        func.array_agg(members.c.site_id),
+        func.array_agg(members.c.min_power_megawatt),
+        func.array_agg(members.c.max_power_megawatt),
+    )
+
+
+def compute_bid_curves(
+    group_ids: list[int], columns: Sequence[list | None]
+) -> list[dict]:
+    """
+    Build the stepwise bid curve of each group in `group_ids` from the
+    member arrays of `_members_query`, for all groups at once.
+
+    Sites are stacked in merit order: lowest `min_power_megawatt` first, then
+    highest `max_power_megawatt`, then id. Step k commits the first k + 1
+    sites, after which the group can offer any volume between
+    `cumulative_min_megawatt[k]` and `cumulative_max_megawatt[k]`.
+    """
+    roots, site_ids, min_power, max_power = (
+        np.array(column or [], dtype=dtype)
+        for column, dtype in zip(
+            columns, (np.int64, np.int64, np.float64, np.float64), strict=True
+        )
+    )
+    # np.lexsort sorts by the last key first
+    order = np.lexsort((site_ids, -max_power, min_power, roots))
+    roots, site_ids = roots[order], site_ids[order]
+    min_power, max_power = min_power[order], max_power[order]
+
+    # Cumulative sums restarted at each group: subtract the running total
+    # reached before the group's first step
+    boundaries = np.flatnonzero(np.diff(roots)) + 1
+    starts = np.r_[0, boundaries] if len(roots) else boundaries
+    ends = np.r_[boundaries, len(roots)] if len(roots) else boundaries
+    cumulative = []
+    for values in (min_power, max_power):
+        running = np.cumsum(values)
+        offsets = np.repeat(running[starts] - values[starts], ends - starts)
+        cumulative.append(running - offsets)
+
+    bounds = {
+        int(roots[start]): (start, end) for start, end in zip(starts, ends, strict=True)
+    }
+    curves = []
+    for group_id in group_ids:
+        start, end = bounds.get(group_id, (0, 0))
+        curves.append(
+            {
+                "group_id": group_id,
+                "site_ids": site_ids[start:end].tolist(),
+                "min_power_megawatt": min_power[start:end].tolist(),
+                "max_power_megawatt": max_power[start:end].tolist(),
+                "cumulative_min_megawatt": cumulative[0][start:end].tolist(),
+                "cumulative_max_megawatt": cumulative[1][start:end].tolist(),
+            }
+        )
+    return curves
+
+
+@traced
+async def get_bid_curves(
+    group_ids: list[int], session: AsyncSession
+) -> tuple[list[dict], list[int]]:
+    """
+    Bid curves of many groups, descendant groups' sites included, in two
+    queries however many groups are asked for. Returns the curves in request
+    order and the IDs that do not exist.
+    """
+    logger.info(f"Computing bid curves of {len(group_ids)} groups")
+    ids = list(dict.fromkeys(group_ids))
+    if not ids:
+        return [], []
+
+    result = await session.execute(
+        select(Group.id).where(
+            Group.id == any_(literal(ids, postgresql.ARRAY(Integer)))
+        )
+    )
+    existing = set(result.scalars().all())
+    found = [i for i in ids if i in existing]
+    missing = [i for i in ids if i not in existing]
+    if not found:
+        return [], missing
+
+    columns = (await session.execute(_members_query(found))).one()
+    curves = await run_in_threadpool(compute_bid_curves, found, columns)
+    return curves, missing
+
+
+@traced
+async def get_bid_curve(group_id: int, session: AsyncSession) -> dict:
+    """
+    Bid curve of one group, descendant groups' sites included.
+    """
+    curves, _ = await get_bid_curves([group_id], session)
+    if not curves:
+        raise BusinessLogicException(status_code=404, detail="Group not found")
+    return curves[0]
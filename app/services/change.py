@@ -0,0 +1,89 @@
+from exceptions import BusinessLogicException
+from infrastructure.models.change_log import (
+    ChangeEntityEnum,
+    ChangeLog,
+    ChangeOperationEnum,
+)
+from infrastructure.models.group import Group
+from infrastructure.models.site import Site
+from infrastructure.tracing import traced
+from logger import get_logger
+from sqlalchemy import BigInteger, Text, cast, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+ENTITY_MODELS = {ChangeEntityEnum.site: Site, ChangeEntityEnum.group: Group}
+
+
+def encode_cursor(change: ChangeLog) -> str:
+    return f"{change.txid}-{change.id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        txid, change_id = (int(part) for part in cursor.split("-"))
+    except ValueError:
+        raise BusinessLogicException(detail=f"Invalid cursor: {cursor}") from None
+    return txid, change_id
+
+
+@traced
+async def get_changes(
+    session: AsyncSession, since: str | None = None, limit: int = 1000
+) -> dict:
+    """
+    Return the changes recorded after the `since` cursor, oldest first.
+
+    Only changes of transactions older than every transaction still running
+    are returned, so a change can never be committed behind a cursor that a
+    client has already read past. The current columns of changed sites and
+    groups are attached with one query per entity type.
+    """
+    logger.info(f"Fetching changes since {since} (limit: {limit})")
+    visible_horizon = cast(
+        cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger
+    )
+    query = select(ChangeLog).where(ChangeLog.txid < visible_horizon)
+    if since:
+        query = query.where(
+            tuple_(ChangeLog.txid, ChangeLog.id) > tuple_(*decode_cursor(since))
+        )
+    query = query.order_by(ChangeLog.txid, ChangeLog.id).limit(limit + 1)
+
+    result = await session.execute(query)
+    changes = result.scalars().all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    current_rows: dict[ChangeEntityEnum, dict[int, dict]] = {}
+    for entity, model in ENTITY_MODELS.items():
+        ids = {
+            change.entity_id
+            for change in changes
+            if change.entity == entity
+            and change.operation != ChangeOperationEnum.delete
+        }
+        if not ids:
+            continue
+        result = await session.execute(
+            select(*model.__table__.columns).where(model.id.in_(ids))
+        )
+        current_rows[entity] = {row["id"]: dict(row) for row in result.mappings()}
+
+    return {
+        "changes": [
+            {
+                "cursor": encode_cursor(change),
+                "entity": change.entity,
+                "operation": change.operation,
+                "entity_id": change.entity_id,
+                "related_id": change.related_id,
+                "changed_at": change.changed_at,
+                "data": current_rows.get(change.entity, {}).get(change.entity_id),
+            }
+            for change in changes
+        ],
+        "next_cursor": encode_cursor(changes[-1]) if changes else since,
+        "has_more": has_more,
+    }
@@ -0,0 +1,74 @@
+import enum
+import json
+
+from logger import get_logger
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+
+class CountModeEnum(str, enum.Enum):
+    exact = "exact"
+    estimate = "estimate"
+
+
+async def _estimate_rows(session: AsyncSession, query: Select) -> int | None:
+    """
+    Return the planner's row estimate for `query`, or None when Postgres has
+    no statistics yet.
+
+    Unfiltered queries read `pg_class.reltuples`; filtered ones take the
+    top-level "Plan Rows" of `EXPLAIN (FORMAT JSON)`. Neither touches the
+    table data.
+
+    A partitioned table such as `sites` keeps reltuples at -1 because
+    autovacuum never analyzes partitioned parents, so the estimate is the
+    sum over its leaf partitions (relkind 'r'), or the table itself when it
+    is not partitioned. Partitions never analyzed yet (-1) are left out.
+    """
+    if query.whereclause is None:
+        table_name = query.get_final_froms()[0].name
+        result = await session.execute(
+            text(
+                "SELECT sum(reltuples)::bigint FROM pg_class "
+                "WHERE (oid = CAST(:table_name AS regclass) OR oid IN ("
+                "SELECT relid FROM pg_partition_tree(CAST(:table_name AS regclass))"
+                ")) AND relkind = 'r' AND reltuples >= 0"
+            ),
+            {"table_name": table_name},
+        )
+        reltuples = result.scalar()
+        if reltuples is None:
+            return None
+        return int(reltuples)
+
+    statement = query.compile(
+        dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+    session: AsyncSession, query: Select, mode: CountModeEnum = CountModeEnum.exact
+) -> int:
+    """
+    Count the rows matched by a filtered, unsorted and unpaged select.
+
+    `exact` runs a `COUNT(*)`. `estimate` answers from planner statistics
+    in constant time and falls back to an exact count when none exist yet.
+    """
+    if mode == CountModeEnum.estimate:
+        estimate = await _estimate_rows(session, query)
+        if estimate is not None:
+            return estimate
+        logger.info("No planner statistics available, falling back to exact count")
+
+    result = await session.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar_one()
@@ -0,0 +1,183 @@
+import enum
+from collections.abc import AsyncIterator, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from infrastructure.models.associations import group_group_table, site_group_table
+from infrastructure.models.group import Group
+from infrastructure.models.site import Site
+from logger import get_logger
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    Integer,
+    Row,
+    String,
+    Table,
+    cast,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+logger = get_logger(__name__)
+
+
+class ExportTableEnum(str, enum.Enum):
+    sites = "sites"
+    groups = "groups"
+    site_group = "site_group"
+    group_group = "group_group"
+
+
+class ExportFormatEnum(str, enum.Enum):
+    arrow = "arrow"
+    parquet = "parquet"
+
+
+EXPORT_TABLES: dict[ExportTableEnum, Table] = {
+    ExportTableEnum.sites: Site.__table__,
+    ExportTableEnum.groups: Group.__table__,
+    ExportTableEnum.site_group: site_group_table,
+    ExportTableEnum.group_group: group_group_table,
+}
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatEnum.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormatEnum.parquet: "application/vnd.apache.parquet",
+}
+
+EXPORT_FILE_EXTENSIONS = {
+    ExportFormatEnum.arrow: "arrows",
+    ExportFormatEnum.parquet: "parquet",
+}
+
+
+def _arrow_type(column: Column) -> pa.DataType:
+    """
+    Map a column type to its Arrow type. Enums are exported as their labels.
+    """
+    column_type = column.type
+    if isinstance(column_type, String):  # Enum is a String subtype
+        return pa.string()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    raise TypeError(f"No Arrow type for column {column.table.name}.{column.name}")
+
+
+def export_schema(table: Table) -> pa.Schema:
+    """
+    Arrow schema of an exported table, one field per column in table order.
+    """
+    return pa.schema(
+        [
+            pa.field(column.name, _arrow_type(column), nullable=column.nullable)
+            for column in table.columns
+        ]
+    )
+
+
+def _export_query(table: Table):
+    """
+    Plain column select in primary key order. Enum columns are cast to text
+    in SQL so rows carry bare strings rather than Python enum members.
+    """
+    columns = [
+        (
+            cast(column, String).label(column.name)
+            if isinstance(column.type, Enum)
+            else column
+        )
+        for column in table.columns
+    ]
+    return select(*columns).order_by(*table.primary_key.columns)
+
+
+class _ChunkSink:
+    """
+    Minimal writable file that buffers what Arrow writes until drained, so
+    an export can be sent or saved batch by batch.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _open_writer(fmt: ExportFormatEnum, sink: _ChunkSink, schema: pa.Schema):
+    if fmt == ExportFormatEnum.parquet:
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+def _write_rows(writer, schema: pa.Schema, rows: Sequence[Row]) -> None:
+    """
+    Transpose a partition of rows into columns and write them as one record
+    batch (one row group for Parquet).
+    """
+    columns = list(zip(*rows, strict=True))
+    batch = pa.RecordBatch.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for values, field in zip(columns, schema, strict=True)
+        ],
+        schema=schema,
+    )
+    writer.write_batch(batch)
+
+
+async def export_table(
+    table: ExportTableEnum,
+    fmt: ExportFormatEnum,
+    session: AsyncSession,
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a table as an Arrow IPC stream or a Parquet file.
+
+    Rows are fetched through a server-side cursor `batch_size` at a time and
+    converted straight into Arrow record batches, without ORM objects. The
+    conversion and encoding run in the threadpool. Each yielded chunk is the
+    encoded output of one batch; concatenated they form the complete file.
+    """
+    logger.info(f"Exporting {table.value} as {fmt.value}")
+    schema = export_schema(EXPORT_TABLES[table])
+    sink = _ChunkSink()
+    writer = _open_writer(fmt, sink, schema)
+
+    result = await session.stream(
+        _export_query(EXPORT_TABLES[table]).execution_options(yield_per=batch_size)
+    )
+    row_count = 0
+    async for rows in result.partitions():
+        await run_in_threadpool(_write_rows, writer, schema, rows)
+        row_count += len(rows)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+    logger.info(f"Exported {row_count} rows from {table.value}")
@@ -1,31 +1,80 @@
 from exceptions import BusinessLogicException
+from infrastructure.models.associations import group_group_table, site_group_table
 from infrastructure.models.group import Group, GroupTypeEnum
+from infrastructure.notifications import notify_clause
+from infrastructure.tracing import traced
 from logger import get_logger
 from schemas.group import GroupResponse
-from sqlalchemy import select
+from services.counting import CountModeEnum, count_rows
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Integer,
+    RowMapping,
+    Select,
+    any_,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 logger = get_logger(__name__)
 
+# Transaction-level advisory lock taken by every edit adding group links.
+# Two concurrent edits each passing the cycle check on their own (A under B
+# and B under A) would together close a cycle, so they run one at a time.
+GROUP_HIERARCHY_LOCK = 0x67726F7570  # "group"
 
+
+def _filtered_groups_query(
+    group_type: GroupTypeEnum | None = None, q: str | None = None
+) -> Select:
+    """
+    Build the filtered (unsorted, unpaged) group query shared by listing
+    and counting.
+    """
+    query = select(Group)
+
+    if group_type:
+        query = query.where(Group.type == group_type)
+
+    if q:
+        # Trigram match served by the ix_groups_name_trgm GIN index
+        query = query.where(literal(q).op("<%")(Group.name))
+
+    return query
+
+
+@traced
 async def get_all_groups(
     session: AsyncSession,
     group_type: GroupTypeEnum | None = None,
     sort_by: str | None = None,
     order: str = "asc",
+    q: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
 ) -> list[GroupResponse]:
     logger.info(
-        f"Fetching groups with filters - type: {group_type}, "
-        f"sort_by: {sort_by}, order: {order}"
+        f"Fetching groups with filters - type: {group_type}, q: {q}, "
+        f"sort_by: {sort_by}, order: {order}, limit: {limit}, offset: {offset}"
     )
 
-    query = select(Group).options(
+    query = _filtered_groups_query(group_type, q).options(
         selectinload(Group.sites), selectinload(Group.child_groups)
     )
 
-    if group_type:
-        query = query.where(Group.type == group_type)
+    if q:
+        query = query.order_by(func.word_similarity(q, Group.name).desc())
 
     if sort_by:
         sort_column = getattr(Group, sort_by, None)
@@ -35,102 +84,330 @@ async def get_all_groups(
             sort_column = sort_column.desc()
         query = query.order_by(sort_column)
 
+    if q or limit is not None or offset:
+        # Stable tie-breaker so pages never overlap
+        query = query.order_by(Group.id)
+    if limit is not None:
+        query = query.limit(limit)
+    if offset:
+        query = query.offset(offset)
+
     result = await session.execute(query)
     groups = result.scalars().all()
     return [GroupResponse.from_orm(g) for g in groups]
 
 
+@traced
+async def count_groups(
+    session: AsyncSession,
+    mode: CountModeEnum = CountModeEnum.exact,
+    group_type: GroupTypeEnum | None = None,
+    q: str | None = None,
+) -> int:
+    """
+    Count the groups matching the same filters as `get_all_groups`.
+    """
+    logger.info(f"Counting groups ({mode.value}) - type: {group_type}, q: {q}")
+    return await count_rows(session, _filtered_groups_query(group_type, q), mode)
+
+
+def _group_link_ids() -> list[ColumnElement]:
+    """
+    Correlated subqueries returning a group's site IDs and child group IDs,
+    for use next to the group's columns in a SELECT or RETURNING list.
+    """
+
+    def ids(column: ColumnElement, owner: ColumnElement, label: str):
+        return func.coalesce(
+            select(postgresql.array_agg(aggregate_order_by(column, column)))
+            .where(owner == Group.id)
+            .correlate(Group)
+            .scalar_subquery(),
+            literal([], postgresql.ARRAY(Integer)),
+        ).label(label)
+
+    return [
+        ids(site_group_table.c.site_id, site_group_table.c.group_id, "sites"),
+        ids(
+            group_group_table.c.child_group_id,
+            group_group_table.c.parent_group_id,
+            "child_groups",
+        ),
+    ]
+
+
+async def _get_group_snapshot(group_id: int, session: AsyncSession) -> RowMapping:
+    """
+    Load a group's columns and link IDs in one query, raising 404 if the
+    group does not exist.
+    """
+    result = await session.execute(
+        select(*Group.__table__.c, *_group_link_ids()).where(Group.id == group_id)
+    )
+    row = result.mappings().first()
+    if not row:
+        raise BusinessLogicException(status_code=404, detail="Group not found")
+    return row
+
+
+@traced
+async def get_group_by_id(group_id: int, session: AsyncSession) -> GroupResponse:
+    """
+    Retrieve a single group with its site and child group IDs.
+    """
+    logger.info(f"Fetching group with ID: {group_id}")
+    return GroupResponse.model_validate(
+        dict(await _get_group_snapshot(group_id, session))
+    )
+
+
+@traced
+async def get_groups_by_ids(
+    group_ids: list[int], session: AsyncSession
+) -> tuple[list[GroupResponse], list[int]]:
+    """
+    Fetch many groups by ID with one query for the groups and one for their
+    site and child group links, however many IDs are given. Returns the
+    found groups in request order and the IDs that do not exist.
+    """
+    logger.info(f"Fetching {len(group_ids)} groups by ID")
+    ids = list(dict.fromkeys(group_ids))
+    if not ids:
+        return [], []
+    id_array = literal(ids, postgresql.ARRAY(Integer))
+
+    groups = Group.__table__
+    result = await session.execute(
+        select(*groups.c).where(groups.c.id == any_(id_array))
+    )
+    rows = {
+        row["id"]: dict(row, sites=[], child_groups=[]) for row in result.mappings()
+    }
+
+    if rows:
+        site_links = select(
+            literal("sites").label("link"),
+            site_group_table.c.group_id.label("group_id"),
+            site_group_table.c.site_id.label("linked_id"),
+        ).where(site_group_table.c.group_id == any_(id_array))
+        child_links = select(
+            literal("child_groups"),
+            group_group_table.c.parent_group_id,
+            group_group_table.c.child_group_id,
+        ).where(group_group_table.c.parent_group_id == any_(id_array))
+        links = union_all(site_links, child_links).subquery()
+        result = await session.execute(
+            select(links).order_by(links.c.group_id, links.c.link, links.c.linked_id)
+        )
+        for link, group_id, linked_id in result:
+            rows[group_id][link].append(linked_id)
+
+    found = [GroupResponse.model_validate(rows[i]) for i in ids if i in rows]
+    missing = [i for i in ids if i not in rows]
+    return found, missing
+
+
+def _insert_group_statement(data: dict):
+    groups = Group.__table__
+    return (
+        insert(groups)
+        .values(**data)
+        .returning(*groups.c, notify_clause("group", "insert", groups.c.id))
+    )
+
+
+@traced
 async def create_group(data: dict, session: AsyncSession) -> GroupResponse:
     logger.info(f"Creating group with data: {data}")
-    group = Group(**data)
-    session.add(group)
+    result = await session.execute(_insert_group_statement(data))
+    row = result.mappings().one()
     await session.commit()
-    await session.refresh(group, attribute_names=["sites", "child_groups"])
-    logger.info(f"Group created with ID: {group.id}")
-    return GroupResponse.from_orm(group)
+    logger.info(f"Group created with ID: {row['id']}")
+    # A new group has no sites or children yet
+    return GroupResponse.model_validate(dict(row))
+
 
+@traced
+async def create_groups(
+    items: list[dict], session: AsyncSession
+) -> list[GroupResponse]:
+    """
+    Create several groups in one transaction, sharing a single commit.
+    """
+    logger.info(f"Creating a batch of {len(items)} groups")
+    created = []
+    for data in items:
+        result = await session.execute(_insert_group_statement(data))
+        created.append(GroupResponse.model_validate(result.mappings().one()))
+    await session.commit()
+    return created
 
+
+@traced
 async def update_group(
     group_id: int, data: dict, session: AsyncSession
 ) -> GroupResponse:
     logger.info(f"Updating group {group_id} with data: {data}")
+    if not data:
+        return GroupResponse.model_validate(
+            dict(await _get_group_snapshot(group_id, session))
+        )
+
+    groups = Group.__table__
     result = await session.execute(
-        select(Group)
-        .where(Group.id == group_id)
-        .options(selectinload(Group.sites), selectinload(Group.child_groups))
+        update(groups)
+        .where(groups.c.id == group_id)
+        .values(**data)
+        .returning(
+            *groups.c, *_group_link_ids(), notify_clause("group", "update", groups.c.id)
+        )
     )
-    group = result.scalars().first()
-    if not group:
+    row = result.mappings().first()
+    if not row:
         raise BusinessLogicException(status_code=404, detail="Group not found")
-
-    for field, value in data.items():
-        setattr(group, field, value)
-
     await session.commit()
-    await session.refresh(group, attribute_names=["sites", "child_groups"])
-    return GroupResponse.from_orm(group)
+    return GroupResponse.model_validate(dict(row))
 
 
+@traced
 async def delete_group(group_id: int, session: AsyncSession) -> None:
+    """
+    Delete a group in one statement; its site and child/parent group links
+    go with it through ON DELETE CASCADE. Sites and other groups are kept.
+    """
     logger.info(f"Deleting group with ID: {group_id}")
-    result = await session.execute(select(Group).where(Group.id == group_id))
-    group = result.scalars().first()
-    if not group:
+    groups = Group.__table__
+    result = await session.execute(
+        delete(groups)
+        .where(groups.c.id == group_id)
+        .returning(groups.c.id, notify_clause("group", "delete", groups.c.id))
+    )
+    if result.first() is None:
         raise BusinessLogicException(status_code=404, detail="Group not found")
-
-    await session.delete(group)
     await session.commit()
     logger.info(f"Group {group_id} deleted")
 
 
+async def _creates_cycle(
+    group_id: int, child_group_ids: set[int], session: AsyncSession
+) -> bool:
+    """
+    Check in a single query whether linking the given children under
+    `group_id` would close a cycle in the hierarchy.
+
+    A cycle appears when one of the children is `group_id` itself or one of
+    its ancestors, so the walk goes upwards from `group_id` only and never
+    touches the (potentially huge) subtrees below the children. `UNION`
+    deduplicates visited nodes, which keeps the walk finite even if the
+    table already contains a cycle.
+    """
+    if group_id in child_group_ids:
+        return True
+
+    edges = group_group_table.alias("edges")
+    ancestors = (
+        select(group_group_table.c.parent_group_id.label("id"))
+        .where(group_group_table.c.child_group_id == group_id)
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union(
+        select(edges.c.parent_group_id).join(
+            ancestors, edges.c.child_group_id == ancestors.c.id
+        )
+    )
+    result = await session.execute(
+        select(ancestors.c.id).where(ancestors.c.id.in_(child_group_ids)).limit(1)
+    )
+    return result.scalars().first() is not None
+
+
+def _notify_links(links: CTE, operation: str, group_id: int) -> Select:
+    """
+    Run the `links` write CTE (returning `child_group_id`) and notify the
+    child links it wrote, in one statement; no row, no notification.
+    """
+    child_ids = func.array_agg(
+        aggregate_order_by(links.c.child_group_id, links.c.child_group_id)
+    )
+    return (
+        select(notify_clause("group_group", operation, group_id, child_ids))
+        .select_from(links)
+        .having(func.count() > 0)
+    )
+
+
+@traced
 async def add_child_groups(
     group_id: int, child_group_ids: list[int], session: AsyncSession
 ) -> GroupResponse:
     logger.info(f"Adding child groups {child_group_ids} to group {group_id}")
 
-    # Load parent group
-    result = await session.execute(
-        select(Group)
-        .where(Group.id == group_id)
-        .options(selectinload(Group.child_groups))
-    )
-    group = result.scalars().first()
-    if not group:
-        raise BusinessLogicException(status_code=404, detail="Group not found")
+    # Load parent group with its current links
+    group = await _get_group_snapshot(group_id, session)
 
-    # Load child groups and validate
-    result = await session.execute(select(Group).where(Group.id.in_(child_group_ids)))
-    child_groups = result.scalars().all()
+    child_ids = set(child_group_ids)
+    if group_id in child_ids:
+        raise BusinessLogicException(detail="A group cannot be its own child.")
 
-    if len(child_groups) != len(child_group_ids):
+    # Validate child groups exist
+    result = await session.execute(select(Group.id).where(Group.id.in_(child_ids)))
+    if len(set(result.scalars().all())) != len(child_ids):
         raise BusinessLogicException(detail="Some child groups not found.")
 
-    # Add new child groups
-    for child in child_groups:
-        if child not in group.child_groups:
-            group.child_groups.append(child)
+    if child_ids:
+        # Held until commit; read committed re-reads the links after waiting
+        await session.execute(select(func.pg_advisory_xact_lock(GROUP_HIERARCHY_LOCK)))
+        if await _creates_cycle(group_id, child_ids, session):
+            raise BusinessLogicException(
+                detail="Linking these child groups would create a cycle."
+            )
+
+        # Add new child groups, skipping links that already exist; only the
+        # links actually inserted are notified, and nothing if there are none
+        new_links = (
+            pg_insert(group_group_table)
+            .values(
+                [
+                    {"parent_group_id": group_id, "child_group_id": child_id}
+                    for child_id in child_ids
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(group_group_table.c.child_group_id)
+            .cte("new_links")
+        )
+        await session.execute(_notify_links(new_links, "insert", group_id))
 
     await session.commit()
-    await session.refresh(group, attribute_names=["sites", "child_groups"])
-    return GroupResponse.from_orm(group)
+    return GroupResponse.model_validate(
+        {**group, "child_groups": sorted(set(group["child_groups"]) | child_ids)}
+    )
 
 
+@traced
 async def remove_child_groups(
     group_id: int, child_group_ids: list[int], session: AsyncSession
 ) -> GroupResponse:
     logger.info(f"Removing child groups {child_group_ids} from group {group_id}")
 
-    result = await session.execute(
-        select(Group)
-        .where(Group.id == group_id)
-        .options(selectinload(Group.child_groups))
-    )
-    group = result.scalars().first()
-    if not group:
-        raise BusinessLogicException(status_code=404, detail="Group not found")
+    group = await _get_group_snapshot(group_id, session)
 
-    group.child_groups = [c for c in group.child_groups if c.id not in child_group_ids]
+    child_ids = set(child_group_ids)
+    removed_links = (
+        delete(group_group_table)
+        .where(
+            group_group_table.c.parent_group_id == group_id,
+            group_group_table.c.child_group_id.in_(child_ids),
+        )
+        .returning(group_group_table.c.child_group_id)
+        .cte("removed_links")
+    )
+    await session.execute(_notify_links(removed_links, "delete", group_id))
 
     await session.commit()
-    await session.refresh(group, attribute_names=["sites", "child_groups"])
-    return GroupResponse.from_orm(group)
+    return GroupResponse.model_validate(
+        {
+            **group,
+            "child_groups": [c for c in group["child_groups"] if c not in child_ids],
+        }
+    )
@@ -0,0 +1,285 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from config import get_settings
+from exceptions import BusinessLogicException
+from infrastructure.db import async_session_maker
+from infrastructure.job_runner import JobContext, job_runner
+from infrastructure.models.associations import site_group_table
+from infrastructure.models.group import Group, GroupTypeEnum
+from infrastructure.models.job import Job, JobKindEnum, JobStatusEnum
+from infrastructure.models.site import CountryEnum, Site
+from infrastructure.tracing import traced
+from logger import get_logger
+from schemas.site import SiteCreate, SiteUpdate
+from services.site import (
+    WEEKEND_DAYS,
+    create_site,
+    create_sites,
+    update_site,
+    update_sites,
+)
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+# Keep job results small enough to poll cheaply
+MAX_REPORTED_ITEMS = 1000
+
+
+@traced
+async def submit_job(kind: JobKindEnum, params: dict, session: AsyncSession) -> Job:
+    """
+    Store a new pending job and wake the workers.
+
+    The backlog is bounded: submissions are refused with a 503 once
+    `job_max_pending` jobs are waiting.
+    """
+    logger.info(f"Submitting {kind.value} job")
+    result = await session.execute(
+        select(func.count()).where(Job.status == JobStatusEnum.pending)
+    )
+    if result.scalar_one() >= get_settings().job_max_pending:
+        raise BusinessLogicException(
+            status_code=503, detail="Too many pending jobs, retry later."
+        )
+
+    job = Job(
+        kind=kind,
+        params=params,
+        status=JobStatusEnum.pending,
+        processed=0,
+        cancel_requested=False,
+    )
+    session.add(job)
+    await session.commit()
+    job_runner.notify()
+    logger.info(f"Job {job.id} submitted")
+    return job
+
+
+@traced
+async def get_job(job_id: int, session: AsyncSession) -> Job:
+    """
+    Retrieve a job and its progress by ID.
+    """
+    job = await session.get(Job, job_id, populate_existing=True)
+    if not job:
+        raise BusinessLogicException(status_code=404, detail="Job not found")
+    return job
+
+
+@traced
+async def cancel_job(job_id: int, session: AsyncSession) -> Job:
+    """
+    Cancel a pending job right away, or ask a running job to stop at its
+    next checkpoint.
+    """
+    logger.info(f"Cancelling job {job_id}")
+    result = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatusEnum.pending)
+        .values(
+            status=JobStatusEnum.cancelled,
+            cancel_requested=True,
+            finished_at=func.now(),
+        )
+        .returning(Job.id)
+    )
+    if result.scalars().first() is None:
+        result = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatusEnum.running)
+            .values(cancel_requested=True)
+            .returning(Job.id)
+        )
+        if result.scalars().first() is None:
+            job = await get_job(job_id, session)
+            raise BusinessLogicException(
+                status_code=409, detail=f"Job already {job.status.value}."
+            )
+    await session.commit()
+    return await get_job(job_id, session)
+
+
+async def _write_chunk(
+    write_many: Callable[[list, AsyncSession], Awaitable[list]],
+    write_one: Callable[[Any, AsyncSession], Awaitable[Any]],
+    items: list,
+) -> list:
+    """
+    Write a chunk in one transaction with `write_many`. If the transaction
+    fails in the database (e.g. a concurrent write took a French date),
+    nothing of the chunk is written and each item is retried in its own
+    transaction, so one bad item only fails itself.
+    """
+    try:
+        async with async_session_maker() as session:
+            return await write_many(items, session)
+    except SQLAlchemyError:
+        logger.exception(f"Chunk of {len(items)} writes failed, retrying each")
+
+    results: list = []
+    for item in items:
+        async with async_session_maker() as session:
+            try:
+                results.append(await write_one(item, session))
+            except BusinessLogicException as exc:
+                results.append(exc)
+    return results
+
+
+@job_runner.handler(JobKindEnum.site_import)
+async def _run_site_import(params: dict, context: JobContext) -> dict:
+    """
+    Create sites chunk by chunk with the regular business rules, one
+    transaction per chunk. A rejected site is reported and skipped; it does
+    not fail the job.
+    """
+    items = params["sites"]
+    chunk_size = get_settings().job_chunk_size
+    created_ids, errors = [], []
+
+    await context.checkpoint(0, len(items))
+    for start in range(0, len(items), chunk_size):
+        chunk = [
+            SiteCreate.model_validate(item).model_dump()
+            for item in items[start : start + chunk_size]
+        ]
+        results = await _write_chunk(
+            create_sites, lambda data, session: create_site(dict(data), session), chunk
+        )
+        for index, result in enumerate(results, start):
+            if isinstance(result, BusinessLogicException):
+                errors.append({"index": index, "detail": result.detail})
+            else:
+                created_ids.append(result.id)
+        await context.checkpoint(min(start + chunk_size, len(items)))
+
+    return {
+        "created": len(created_ids),
+        "created_ids": created_ids[:MAX_REPORTED_ITEMS],
+        "failed": len(errors),
+        "errors": errors[:MAX_REPORTED_ITEMS],
+    }
+
+
+@job_runner.handler(JobKindEnum.site_update)
+async def _run_site_update(params: dict, context: JobContext) -> dict:
+    """
+    Apply the same changes to many sites, chunk by chunk, with the regular
+    business rules and one transaction per chunk.
+    """
+    site_ids = params["site_ids"]
+    changes = SiteUpdate.model_validate(params["changes"]).model_dump(
+        exclude_unset=True
+    )
+    chunk_size = get_settings().job_chunk_size
+    updated, errors = 0, []
+
+    await context.checkpoint(0, len(site_ids))
+    for start in range(0, len(site_ids), chunk_size):
+        chunk = site_ids[start : start + chunk_size]
+        results = await _write_chunk(
+            lambda ids, session: update_sites(ids, changes, session),
+            lambda site_id, session: update_site(site_id, changes, session),
+            chunk,
+        )
+        for site_id, result in zip(chunk, results, strict=True):
+            if isinstance(result, BusinessLogicException):
+                errors.append({"site_id": site_id, "detail": result.detail})
+            else:
+                updated += 1
+        await context.checkpoint(min(start + chunk_size, len(site_ids)))
+
+    return {
+        "updated": updated,
+        "failed": len(errors),
+        "errors": errors[:MAX_REPORTED_ITEMS],
+    }
+
+
+@job_runner.handler(JobKindEnum.site_revalidation)
+async def _run_site_revalidation(params: dict, context: JobContext) -> dict:
+    """
+    Re-check every existing site against the business rules, walking the
+    table in id order (keyset pagination) with one short read per chunk.
+    """
+    chunk_size = get_settings().job_chunk_size
+    violations = []
+
+    async with async_session_maker() as session:
+        result = await session.execute(select(func.count()).select_from(Site))
+        total = result.scalar_one()
+    await context.checkpoint(0, total)
+
+    last_id, processed = 0, 0
+    while True:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Site.id, Site.country, Site.installation_date)
+                .where(Site.id > last_id)
+                .order_by(Site.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            site_ids = [row.id for row in rows]
+
+            # Rule: Italian sites must be installed on weekends
+            for row in rows:
+                if (
+                    row.country == CountryEnum.IT
+                    and row.installation_date.weekday() not in WEEKEND_DAYS
+                ):
+                    violations.append({"site_id": row.id, "rule": "italian_weekend"})
+
+            # Rule: Only one French site per day
+            french_dates = {
+                row.installation_date for row in rows if row.country == CountryEnum.FR
+            }
+            if french_dates:
+                result = await session.execute(
+                    select(Site.installation_date)
+                    .where(
+                        Site.country == CountryEnum.FR,
+                        Site.installation_date.in_(french_dates),
+                    )
+                    .group_by(Site.installation_date)
+                    .having(func.count() > 1)
+                )
+                shared_dates = set(result.scalars().all())
+                violations.extend(
+                    {"site_id": row.id, "rule": "french_one_per_day"}
+                    for row in rows
+                    if row.country == CountryEnum.FR
+                    and row.installation_date in shared_dates
+                )
+
+            # Rule: No group3 association
+            result = await session.execute(
+                select(site_group_table.c.site_id)
+                .join(Group, Group.id == site_group_table.c.group_id)
+                .where(
+                    site_group_table.c.site_id.in_(site_ids),
+                    Group.type == GroupTypeEnum.group3,
+                )
+                .distinct()
+            )
+            violations.extend(
+                {"site_id": site_id, "rule": "group3_link"}
+                for site_id in result.scalars().all()
+            )
+
+        last_id = site_ids[-1]
+        processed += len(rows)
+        await context.checkpoint(processed, max(total, processed))
+
+    return {
+        "checked": processed,
+        "violation_count": len(violations),
+        "violations": violations[:MAX_REPORTED_ITEMS],
+    }
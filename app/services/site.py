@@ -1,44 +1,315 @@
+from collections.abc import Iterable
+from datetime import date, timedelta
+from typing import Any
+
 from exceptions import BusinessLogicException
+from infrastructure.models.associations import site_group_table
 from infrastructure.models.group import Group, GroupTypeEnum
 from infrastructure.models.site import CountryEnum, Site
+from infrastructure.notifications import notify_clause
+from infrastructure.site_read_model import site_read_model
+from infrastructure.tracing import traced
 from logger import get_logger
-from sqlalchemy import and_, select
+from schemas.site import SiteResponse, TimelineGranularityEnum
+from services.counting import CountModeEnum, count_rows
+from sqlalchemy import (
+    JSON,
+    ColumnElement,
+    Date,
+    DateTime,
+    Integer,
+    Select,
+    and_,
+    any_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 logger = get_logger(__name__)
 
+WEEKEND_DAYS = (5, 6)  # 5=Saturday, 6=Sunday
+MAX_AVAILABILITY_DAYS = 366
+
+
+# Sortable fields. Each one is backed by a (field, id) b-tree index on every
+# country partition, and the listing grammar is limited to what those
+# indexes return as is: one sort field, optionally followed by `id` in the
+# same direction (the tie-breaker is added otherwise), and range filters on
+# that field only. Such a listing is an ordered index scan, forwards or
+# backwards, bounded by the range: of one partition with the country
+# filter, merged across partitions without it. Anything else would need a
+# sort or row-by-row filtering on top of the index and is refused.
+SITE_SORT_FIELDS = {
+    "id": Site.id,
+    "installation_date": Site.installation_date,
+    "max_power_megawatt": Site.max_power_megawatt,
+    "min_power_megawatt": Site.min_power_megawatt,
+}
+SITE_RANGE_FIELDS = ("installation_date", "max_power_megawatt", "min_power_megawatt")
+
+
+def parse_sort_keys(sort_by: str, order: str = "asc") -> list[tuple[str, bool]]:
+    """
+    Turn a sort spec (e.g. "installation_date" or "-max_power_megawatt,-id")
+    into (field, descending) pairs. A leading '-' sorts that key descending;
+    other keys follow `order`. Only one field is allowed, optionally followed
+    by `id` in the same direction, see `SITE_SORT_FIELDS`.
+    """
+    keys: list[tuple[str, bool]] = []
+    for raw_key in sort_by.split(","):
+        key = raw_key.strip()
+        descending = order == "desc"
+        if key.startswith("-"):
+            key, descending = key[1:], True
+        if key not in SITE_SORT_FIELDS or key in dict(keys):
+            raise BusinessLogicException(detail=f"Invalid sort field: {raw_key}")
+        keys.append((key, descending))
+    if len(keys) > 2 or (len(keys) == 2 and keys[1] != ("id", keys[0][1])):
+        raise BusinessLogicException(
+            detail="Sort by one field, optionally followed by id in the same "
+            "direction."
+        )
+    return keys
+
+
+def check_range_filters(sort_keys: list[tuple[str, bool]], filters: dict) -> None:
+    """
+    Refuse range filters on another field than the sort field: no single
+    index could serve both.
+    """
+    sort_field = sort_keys[0][0]
+    ranged = {
+        field
+        for field in SITE_RANGE_FIELDS
+        if filters.get(f"{field}_from") is not None
+        or filters.get(f"{field}_to") is not None
+    }
+    others = sorted(ranged - {sort_field})
+    if others:
+        raise BusinessLogicException(
+            detail=f"Range filters are only allowed on the sort field "
+            f"({sort_field}), not on {', '.join(others)}."
+        )
+
+
+def parse_site_sort(sort_by: str, order: str = "asc") -> list:
+    """
+    Turn a sort spec into ORDER BY clauses, see `parse_sort_keys`. A final
+    `id` tie-breaker in the direction of the sort field keeps paging stable
+    and matches the (field, id) index order.
+    """
+    keys = parse_sort_keys(sort_by, order)
+    clauses = [
+        SITE_SORT_FIELDS[key].desc() if descending else SITE_SORT_FIELDS[key].asc()
+        for key, descending in keys
+    ]
+    if "id" not in dict(keys):
+        first_descending = keys[0][1]
+        clauses.append(Site.id.desc() if first_descending else Site.id.asc())
+    return clauses
+
+
+def _filtered_sites_query(
+    country: CountryEnum | None = None,
+    q: str | None = None,
+    installation_date_from: date | None = None,
+    installation_date_to: date | None = None,
+    max_power_megawatt_from: float | None = None,
+    max_power_megawatt_to: float | None = None,
+    min_power_megawatt_from: float | None = None,
+    min_power_megawatt_to: float | None = None,
+) -> Select:
+    """
+    Build the filtered (unsorted, unpaged) site query shared by listing
+    and counting. Range bounds (`*_from` / `*_to`) are inclusive.
+    """
+    query = select(Site)
+
+    if country:
+        query = query.where(Site.country == country)
+
+    ranges = {
+        Site.installation_date: (installation_date_from, installation_date_to),
+        Site.max_power_megawatt: (max_power_megawatt_from, max_power_megawatt_to),
+        Site.min_power_megawatt: (min_power_megawatt_from, min_power_megawatt_to),
+    }
+    for column, (lower, upper) in ranges.items():
+        if lower is not None:
+            query = query.where(column >= lower)
+        if upper is not None:
+            query = query.where(column <= upper)
+
+    if q:
+        query = query.where(literal(q).op("<%")(Site.name))
 
+    return query
+
+
+@traced
 async def get_all_sites(
     session: AsyncSession,
-    country: CountryEnum | None = None,
     sort_by: str | None = None,
     order: str = "asc",
-) -> list[Site]:
+    limit: int | None = None,
+    offset: int = 0,
+    **filters: Any,
+) -> list[Site] | list[dict]:
     """
-    Retrieve all sites with optional filtering and sorting.
+    Retrieve all sites with optional filtering, fuzzy name search, sorting
+    and pagination.
+
+    `filters` are the keyword arguments of `_filtered_sites_query` (country,
+    q and the inclusive range bounds). `sort_by` is one field of
+    `SITE_SORT_FIELDS`, and range bounds may only be set on that field, see
+    `parse_sort_keys` and `check_range_filters`.
+
+    When `q` is given, sites are matched on name with trigram word similarity
+    (served by the `ix_sites_name_trgm` GIN index) and ranked by similarity
+    before any other sort. Other listings are served by the in-memory
+    `site_read_model` when it is enabled and loaded, as `SiteResponse`
+    shaped dicts.
     """
     logger.info(
-        f"Fetching sites with filters - country: {country}, "
-        "sort_by: {sort_by}, order: {order}"
+        f"Fetching sites with filters - {filters}, "
+        f"sort_by: {sort_by}, order: {order}, limit: {limit}, offset: {offset}"
     )
-    query = select(Site).options(selectinload(Site.groups))  # Eager load groups
+    sort_keys = parse_sort_keys(sort_by or "id", order)
+    check_range_filters(sort_keys, filters)
+    if site_read_model.can_serve(filters):
+        return await site_read_model.list_sites(sort_keys, limit, offset, **filters)
 
-    if country:
-        query = query.where(Site.country == country)
+    query = _filtered_sites_query(**filters).options(
+        selectinload(Site.groups)  # Eager load groups
+    )
 
-    if sort_by:
-        sort_column = getattr(Site, sort_by, None)
-        if not sort_column:
-            raise BusinessLogicException(detail=f"Invalid sort field: {sort_by}")
-        if order == "desc":
-            sort_column = sort_column.desc()
-        query = query.order_by(sort_column)
+    q = filters.get("q")
+    if q:
+        query = query.order_by(func.word_similarity(q, Site.name).desc())
+
+    query = query.order_by(*parse_site_sort(sort_by or "id", order))
+    if limit is not None:
+        query = query.limit(limit)
+    if offset:
+        query = query.offset(offset)
 
     result = await session.execute(query)
     return result.scalars().all()
 
 
+@traced
+async def count_sites(
+    session: AsyncSession, mode: CountModeEnum = CountModeEnum.exact, **filters: Any
+) -> int:
+    """
+    Count the sites matching the same filters as `get_all_sites`. Counts
+    served by the read model are exact whatever the mode.
+    """
+    logger.info(f"Counting sites ({mode.value}) with filters - {filters}")
+    if site_read_model.can_serve(filters):
+        return await site_read_model.count_sites(**filters)
+    return await count_rows(session, _filtered_sites_query(**filters), mode)
+
+
+@traced
+async def get_capacity_timeline(
+    session: AsyncSession,
+    granularity: TimelineGranularityEnum = TimelineGranularityEnum.month,
+    country: CountryEnum | None = None,
+) -> list[dict]:
+    """
+    Compute installed `max_power_megawatt` per country and period, with the
+    cumulative total per country, in a single aggregate + window query.
+    """
+    logger.info(
+        f"Computing capacity timeline - granularity: {granularity}, "
+        f"country: {country}"
+    )
+    # The unit is rendered inline (it comes from the enum) so that the SELECT
+    # and GROUP BY expressions are identical for Postgres.
+    period = cast(
+        func.date_trunc(
+            literal_column(f"'{granularity.value}'"),
+            cast(Site.installation_date, DateTime),
+        ),
+        Date,
+    ).label("period")
+    installed = func.sum(Site.max_power_megawatt)
+
+    query = (
+        select(
+            Site.country,
+            period,
+            installed.label("installed_megawatt"),
+            func.sum(installed)
+            .over(partition_by=Site.country, order_by=period)
+            .label("cumulative_megawatt"),
+        )
+        .group_by(Site.country, period)
+        .order_by(Site.country, period)
+    )
+    if country:
+        query = query.where(Site.country == country)
+
+    result = await session.execute(query)
+    return result.mappings().all()
+
+
+@traced
+async def get_available_installation_dates(
+    session: AsyncSession, country: CountryEnum, date_from: date, date_to: date
+) -> list[date]:
+    """
+    List the dates in [date_from, date_to] on which a site of `country` can be
+    installed without breaking a business rule:
+    - France: days without a French site, from one range scan on the
+      (installation_date, id) index of the FR partition.
+    - Italy: weekend days, no database access needed.
+    - Other countries: every day.
+    """
+    logger.info(
+        f"Fetching available installation dates - country: {country}, "
+        f"from: {date_from}, to: {date_to}"
+    )
+    if date_to < date_from:
+        raise BusinessLogicException(detail="'from' must not be after 'to'.")
+    span = (date_to - date_from).days + 1
+    if span > MAX_AVAILABILITY_DAYS:
+        raise BusinessLogicException(
+            detail=f"Date range cannot exceed {MAX_AVAILABILITY_DAYS} days."
+        )
+
+    days = [date_from + timedelta(days=offset) for offset in range(span)]
+
+    if country == CountryEnum.FR:
+        result = await session.execute(
+            select(Site.installation_date)
+            .where(
+                Site.country == CountryEnum.FR,
+                Site.installation_date.between(date_from, date_to),
+            )
+            .distinct()
+        )
+        taken = set(result.scalars().all())
+        return [day for day in days if day not in taken]
+
+    if country == CountryEnum.IT:
+        return [day for day in days if day.weekday() in WEEKEND_DAYS]
+
+    return days
+
+
+@traced
 async def get_site_by_id(site_id: int, session: AsyncSession) -> Site:
     """
     Retrieve a single site by ID.
@@ -53,12 +324,150 @@ async def get_site_by_id(site_id: int, session: AsyncSession) -> Site:
     return site
 
 
-async def create_site(data: dict, session: AsyncSession) -> Site:
+@traced
+async def get_sites_by_ids(
+    site_ids: list[int], session: AsyncSession
+) -> tuple[list[SiteResponse], list[int]]:
+    """
+    Fetch many sites by ID with one query for the sites and one for their
+    groups, however many IDs are given. Returns the found sites in request
+    order and the IDs that do not exist.
+    """
+    logger.info(f"Fetching {len(site_ids)} sites by ID")
+    ids = list(dict.fromkeys(site_ids))
+    if not ids:
+        return [], []
+    id_array = literal(ids, postgresql.ARRAY(Integer))
+
+    sites = Site.__table__
+    result = await session.execute(select(*sites.c).where(sites.c.id == any_(id_array)))
+    rows = {row["id"]: dict(row, groups=[]) for row in result.mappings()}
+
+    if rows:
+        result = await session.execute(
+            select(site_group_table.c.site_id, Group.id, Group.name, Group.type)
+            .join(Group, Group.id == site_group_table.c.group_id)
+            .where(site_group_table.c.site_id == any_(id_array))
+            .order_by(site_group_table.c.site_id, Group.id)
+        )
+        for site_id, group_id, name, group_type in result:
+            rows[site_id]["groups"].append(
+                {"id": group_id, "name": name, "type": group_type}
+            )
+
+    found = [SiteResponse.model_validate(rows[i]) for i in ids if i in rows]
+    missing = [i for i in ids if i not in rows]
+    return found, missing
+
+
+def _site_groups_json() -> ColumnElement:
+    """
+    Correlated subquery aggregating a site's groups as a JSON array, for use
+    in the RETURNING list of a write on `sites`.
+    """
+    group = func.json_build_object(
+        "id", Group.id, "name", Group.name, "type", Group.type
+    )
+    return type_coerce(
+        select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(group, Group.id)),
+                literal_column("'[]'::json"),
+            )
+        )
+        .select_from(site_group_table)
+        .join(Group, Group.id == site_group_table.c.group_id)
+        .where(site_group_table.c.site_id == Site.id)
+        .correlate(Site)
+        .scalar_subquery(),
+        JSON,
+    ).label("groups")
+
+
+def _french_date_taken(installation_date: date) -> BusinessLogicException:
+    return BusinessLogicException(
+        detail=f"A French site already exists for date {installation_date}"
+    )
+
+
+def _check_italian_weekend(data: dict) -> None:
+    # Rule: Italian sites must be installed on weekends
+    if data.get("country") == CountryEnum.IT:
+        if data.get("installation_date").weekday() not in WEEKEND_DAYS:
+            raise BusinessLogicException(
+                detail="Italian sites must be installed on weekends."
+            )
+
+
+async def _load_groups(group_ids: Iterable[int], session: AsyncSession) -> dict:
+    ids = set(group_ids)
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(Group.id, Group.name, Group.type).where(Group.id.in_(ids))
+    )
+    return {row.id: row for row in result}
+
+
+def _linked_groups(group_ids: list[int], found: dict) -> list[dict]:
+    # Rule: No group3 association
+    groups = []
+    for gid in group_ids:
+        group = found.get(gid)
+        if not group:
+            raise BusinessLogicException(detail=f"Group {gid} not found.")
+        if group.type == GroupTypeEnum.group3:
+            raise BusinessLogicException(detail="Cannot link site to group3.")
+        groups.append({"id": group.id, "name": group.name, "type": group.type})
+    return groups
+
+
+def _insert_site_statement(data: dict, group_ids: list[int]):
+    """
+    Single statement inserting a site, its group links and the change
+    notifications (`site`, and `site_group` with the linked group ids),
+    returning the new site row.
+    """
+    sites = Site.__table__
+    new_site = (
+        insert(sites)
+        .values(**data)
+        .returning(*sites.c, notify_clause("site", "insert", sites.c.id))
+        .cte("new_site")
+    )
+    statement = select(new_site)
+    if group_ids:
+        statement = statement.add_cte(
+            insert(site_group_table)
+            .from_select(
+                ["site_id", "site_country", "group_id"],
+                select(
+                    new_site.c.id,
+                    new_site.c.country,
+                    func.unnest(literal(group_ids, postgresql.ARRAY(Integer))),
+                ),
+            )
+            .cte("new_links")
+        )
+        statement = statement.add_columns(
+            notify_clause("site_group", "insert", new_site.c.id, group_ids).label(
+                "links_notified"
+            )
+        )
+    return statement
+
+
+@traced
+async def create_site(data: dict, session: AsyncSession) -> SiteResponse:
     """
     Create a new site with business logic:
     - Only one French site can be installed per day.
     - Italian sites must be installed on weekends.
     - No site can be linked to a group of type 'group3'.
+
+    The site row, its group links and the change notification are written
+    by a single statement; the response is built from its RETURNING row and
+    the groups already loaded for validation.
     """
     logger.info(f"Creating site with data: {data}")
     country = data.get("country")
@@ -74,63 +483,108 @@ async def create_site(data: dict, session: AsyncSession) -> Site:
         )
         result = await session.execute(query)
         if result.scalars().first():
-            raise BusinessLogicException(
-                detail=f"A French site already exists for date {installation_date}"
-            )
+            raise _french_date_taken(installation_date)
 
-    # Rule: Italian sites must be installed on weekends
-    if country == CountryEnum.IT:
-        if installation_date.weekday() not in (5, 6):  # 5=Saturday, 6=Sunday
-            raise BusinessLogicException(
-                detail="Italian sites must be installed on weekends."
-            )
+    _check_italian_weekend(data)
 
-    # Rule: No group3 association
-    group_ids = data.pop("group_ids", [])
-    groups = []
-    if group_ids:
-        for gid in group_ids:
-            result = await session.execute(select(Group).where(Group.id == gid))
-            group = result.scalars().first()
-            if not group:
-                raise BusinessLogicException(detail=f"Group {gid} not found.")
-            if group.type == GroupTypeEnum.group3:
-                raise BusinessLogicException(detail="Cannot link site to group3.")
-            groups.append(group)
-
-    site = Site(**data)
-    site.groups = groups
-
-    session.add(site)
+    group_ids = list(dict.fromkeys(data.pop("group_ids", None) or []))
+    groups = _linked_groups(group_ids, await _load_groups(group_ids, session))
+
+    result = await session.execute(_insert_site_statement(data, group_ids))
+    row = result.mappings().one()
     await session.commit()
 
-    result = await session.execute(
-        select(Site).options(selectinload(Site.groups)).where(Site.id == site.id)
+    logger.info(f"Site created with ID: {row['id']}")
+    return SiteResponse.model_validate({**row, "groups": groups})
+
+
+@traced
+async def create_sites(
+    items: list[dict], session: AsyncSession
+) -> list[SiteResponse | BusinessLogicException]:
+    """
+    Create several sites in one transaction, with the rules of
+    `create_site` checked for the whole batch in two queries. Within the
+    batch, the first French site of a day wins and later ones fail as if it
+    were already stored. Returns, per item, the created site or the
+    exception for its caller. `items` are left unchanged.
+    """
+    logger.info(f"Creating a batch of {len(items)} sites")
+    french_dates = {
+        data.get("installation_date")
+        for data in items
+        if data.get("country") == CountryEnum.FR
+    }
+    taken: set[date] = set()
+    if french_dates:
+        result = await session.execute(
+            select(Site.installation_date)
+            .where(
+                Site.country == CountryEnum.FR, Site.installation_date.in_(french_dates)
+            )
+            .distinct()
+        )
+        taken = set(result.scalars().all())
+    found = await _load_groups(
+        (gid for data in items for gid in data.get("group_ids") or []), session
     )
-    site = result.scalar_one()
 
-    logger.info(f"Site created with ID: {site.id}")
-    return site
+    results: list[SiteResponse | BusinessLogicException | None] = [None] * len(items)
+    for index, item in enumerate(items):
+        data = dict(item)
+        group_ids = list(dict.fromkeys(data.pop("group_ids", None) or []))
+        french = data.get("country") == CountryEnum.FR
+        try:
+            if french and data.get("installation_date") in taken:
+                raise _french_date_taken(data.get("installation_date"))
+            _check_italian_weekend(data)
+            groups = _linked_groups(group_ids, found)
+        except BusinessLogicException as exc:
+            results[index] = exc
+            continue
+        if french:
+            taken.add(data.get("installation_date"))
 
+        result = await session.execute(_insert_site_statement(data, group_ids))
+        row = result.mappings().one()
+        results[index] = SiteResponse.model_validate({**row, "groups": groups})
 
-async def update_site(site_id: int, data: dict, session: AsyncSession) -> Site:
+    await session.commit()
+    logger.info(
+        f"Created {sum(isinstance(r, SiteResponse) for r in results)} of "
+        f"{len(items)} sites"
+    )
+    return results
+
+
+async def _update_site_row(
+    site_id: int, data: dict, session: AsyncSession
+) -> SiteResponse:
     """
-    Update an existing site with business logic.
+    Check the business rules for the new values and UPDATE the site,
+    leaving the commit to the caller.
     """
-    logger.info(f"Updating site {site_id} with data: {data}")
-    site = await get_site_by_id(site_id, session)
+    # Group links are not editable through this endpoint
+    values = {field: value for field, value in data.items() if field != "group_ids"}
+
+    if "country" in values or "installation_date" in values:
+        result = await session.execute(
+            select(Site.country, Site.installation_date).where(Site.id == site_id)
+        )
+        current = result.first()
+        if not current:
+            raise BusinessLogicException(status_code=404, detail="Site not found")
 
-    if "country" in data or "installation_date" in data:
         # Apply country/date constraints again
-        country = data.get("country", site.country)
-        installation_date = data.get("installation_date", site.installation_date)
+        country = values.get("country", current.country)
+        installation_date = values.get("installation_date", current.installation_date)
 
         if country == CountryEnum.FR:
             query = select(Site).where(
                 and_(
                     Site.country == CountryEnum.FR,
                     Site.installation_date == installation_date,
-                    Site.id != site.id,
+                    Site.id != site_id,
                 )
             )
             result = await session.execute(query)
@@ -139,29 +593,89 @@ async def update_site(site_id: int, data: dict, session: AsyncSession) -> Site:
                     detail=f"A French site already exists for date {installation_date}"
                 )
 
-        if country == CountryEnum.IT and installation_date.weekday() not in (5, 6):
+        if (
+            country == CountryEnum.IT
+            and installation_date.weekday() not in WEEKEND_DAYS
+        ):
             raise BusinessLogicException(
                 detail="Italian sites must be installed on weekends."
             )
 
-    for field, value in data.items():
-        setattr(site, field, value)
-
-    await session.commit()
+    if not values:
+        site = await get_site_by_id(site_id, session)
+        return SiteResponse.model_validate(site, from_attributes=True)
 
+    sites = Site.__table__
     result = await session.execute(
-        select(Site).options(selectinload(Site.groups)).where(Site.id == site.id)
+        update(sites)
+        .where(sites.c.id == site_id)
+        .values(**values)
+        .returning(
+            *sites.c, _site_groups_json(), notify_clause("site", "update", sites.c.id)
+        )
     )
-    site = result.scalar_one()
+    row = result.mappings().first()
+    if not row:
+        raise BusinessLogicException(status_code=404, detail="Site not found")
+    return SiteResponse.model_validate(dict(row))
+
+
+@traced
+async def update_site(site_id: int, data: dict, session: AsyncSession) -> SiteResponse:
+    """
+    Update an existing site with business logic.
+
+    The UPDATE returns the new row together with the site's groups, so the
+    response needs no re-select after commit.
+    """
+    logger.info(f"Updating site {site_id} with data: {data}")
+    site = await _update_site_row(site_id, data, session)
+    await session.commit()
     return site
 
 
+@traced
+async def update_sites(
+    site_ids: list[int], data: dict, session: AsyncSession
+) -> list[SiteResponse | BusinessLogicException]:
+    """
+    Apply the same changes to several sites in one transaction, with the
+    rules of `update_site` checked site by site against the batch's earlier
+    updates. Returns, per site, the updated site or the exception for its
+    caller.
+    """
+    logger.info(f"Updating a batch of {len(site_ids)} sites with data: {data}")
+    results: list[SiteResponse | BusinessLogicException] = []
+    for site_id in site_ids:
+        try:
+            results.append(await _update_site_row(site_id, data, session))
+        except BusinessLogicException as exc:
+            # Raised before the UPDATE or when it matched nothing: the
+            # transaction holds no partial write of this site
+            results.append(exc)
+
+    await session.commit()
+    logger.info(
+        f"Updated {sum(isinstance(r, SiteResponse) for r in results)} of "
+        f"{len(site_ids)} sites"
+    )
+    return results
+
+
+@traced
 async def delete_site(site_id: int, session: AsyncSession) -> None:
     """
-    Delete a site.
+    Delete a site in one statement; its group links go with it through
+    ON DELETE CASCADE.
     """
     logger.info(f"Deleting site with ID: {site_id}")
-    site = await get_site_by_id(site_id, session)
-    await session.delete(site)
+    sites = Site.__table__
+    result = await session.execute(
+        delete(sites)
+        .where(sites.c.id == site_id)
+        .returning(sites.c.id, notify_clause("site", "delete", sites.c.id))
+    )
+    if result.first() is None:
+        raise BusinessLogicException(status_code=404, detail="Site not found")
     await session.commit()
     logger.info(f"Site {site_id} deleted")
@@ -0,0 +1,179 @@
+import math
+
+from infrastructure.models.site import CountryEnum, Site
+from infrastructure.models.site_stats import SiteCountryStats, SiteCountryStatsDelta
+from infrastructure.tracing import traced
+from logger import get_logger
+from sqlalchemy import Select, delete, func, insert, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = get_logger(__name__)
+
+STATS_FIELDS = (
+    "site_count",
+    "total_max_power_megawatt",
+    "efficiency_sum",
+    "efficiency_count",
+    "useful_energy_sum",
+    "useful_energy_count",
+)
+# Float sums are maintained by +/- deltas, so allow for rounding noise
+DRIFT_RELATIVE_TOLERANCE = 1e-9
+DRIFT_ABSOLUTE_TOLERANCE = 1e-6
+
+
+def _average(total: float, count: int) -> float | None:
+    return total / count if count else None
+
+
+def _stored_site_stats_query() -> Select:
+    """
+    Per-country stats as maintained: the summary plus the deltas appended by
+    the `sites_country_stats_*` triggers since the last fold.
+    """
+    parts = union_all(
+        *(
+            select(model.country, *(getattr(model, field) for field in STATS_FIELDS))
+            for model in (SiteCountryStats, SiteCountryStatsDelta)
+        )
+    ).subquery()
+    return select(
+        parts.c.country,
+        *(func.sum(parts.c[field]).label(field) for field in STATS_FIELDS),
+    ).group_by(parts.c.country)
+
+
+@traced
+async def get_site_stats(session: AsyncSession) -> list[dict]:
+    """
+    Return the per-country summary maintained by the `sites_country_stats_*`
+    triggers. This reads one row per country plus the deltas not folded yet,
+    whatever the fleet size.
+    """
+    logger.info("Fetching per-country site stats")
+    query = _stored_site_stats_query()
+    result = await session.execute(
+        query.having(query.selected_columns.site_count > 0).order_by(
+            query.selected_columns.country
+        )
+    )
+    return [
+        {
+            "country": stats["country"],
+            "site_count": stats["site_count"],
+            "total_max_power_megawatt": stats["total_max_power_megawatt"],
+            "average_max_power_megawatt": _average(
+                stats["total_max_power_megawatt"], stats["site_count"]
+            ),
+            "average_efficiency": _average(
+                stats["efficiency_sum"], stats["efficiency_count"]
+            ),
+            "average_useful_energy_at_1_megawatt": _average(
+                stats["useful_energy_sum"], stats["useful_energy_count"]
+            ),
+        }
+        for stats in result.mappings().all()
+    ]
+
+
+async def fold_site_stats(session: AsyncSession) -> None:
+    """
+    Move the pending deltas into the summary in one statement, so reads stay
+    one row per country. Summary rows are locked in country order, so
+    concurrent folds cannot deadlock; deltas appended meanwhile are left for
+    the next fold.
+    """
+    deltas = SiteCountryStatsDelta.__table__
+    folded = delete(deltas).returning(*deltas.c).cte("folded")
+    statement = pg_insert(SiteCountryStats).from_select(
+        ["country", *STATS_FIELDS],
+        select(folded.c.country, *(func.sum(folded.c[field]) for field in STATS_FIELDS))
+        .group_by(folded.c.country)
+        .order_by(folded.c.country),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[SiteCountryStats.country],
+        set_={
+            field: getattr(SiteCountryStats, field) + statement.excluded[field]
+            for field in STATS_FIELDS
+        },
+    ).add_cte(folded)
+    await session.execute(statement)
+    await session.commit()
+
+
+async def _compute_site_stats(session: AsyncSession) -> dict[CountryEnum, dict]:
+    """
+    Recompute the summary from scratch with a full scan of `sites`.
+    """
+    result = await session.execute(
+        select(
+            Site.country,
+            func.count().label("site_count"),
+            func.sum(Site.max_power_megawatt).label("total_max_power_megawatt"),
+            func.coalesce(func.sum(Site.efficiency), 0).label("efficiency_sum"),
+            func.count(Site.efficiency).label("efficiency_count"),
+            func.coalesce(func.sum(Site.useful_energy_at_1_megawatt), 0).label(
+                "useful_energy_sum"
+            ),
+            func.count(Site.useful_energy_at_1_megawatt).label("useful_energy_count"),
+        ).group_by(Site.country)
+    )
+    return {row["country"]: dict(row) for row in result.mappings().all()}
+
+
+@traced
+async def verify_site_stats(session: AsyncSession, fix: bool = False) -> list[dict]:
+    """
+    Compare the maintained summary with a full recomputation and return one
+    entry per drifted field. With `fix`, the summary is rebuilt from the
+    recomputation in the same transaction.
+
+    A plain check runs in a REPEATABLE READ snapshot so concurrent writes
+    cannot show up as false drift; a fix locks `sites` against writes instead,
+    so the rebuilt rows stay exact, and drops the pending deltas with them.
+    """
+    logger.info(f"Verifying per-country site stats (fix: {fix})")
+    if fix:
+        await session.execute(text("LOCK TABLE sites IN SHARE MODE"))
+    else:
+        await session.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+
+    actual = await _compute_site_stats(session)
+    result = await session.execute(_stored_site_stats_query())
+    stored = {
+        stats["country"]: {field: stats[field] for field in STATS_FIELDS}
+        for stats in result.mappings().all()
+    }
+
+    drifts = []
+    for country in sorted(set(actual) | set(stored)):
+        for field in STATS_FIELDS:
+            actual_value = actual.get(country, {}).get(field, 0)
+            stored_value = stored.get(country, {}).get(field, 0)
+            if not math.isclose(
+                stored_value,
+                actual_value,
+                rel_tol=DRIFT_RELATIVE_TOLERANCE,
+                abs_tol=DRIFT_ABSOLUTE_TOLERANCE,
+            ):
+                drifts.append(
+                    {
+                        "country": country,
+                        "field": field,
+                        "stored": stored_value,
+                        "actual": actual_value,
+                    }
+                )
+
+    if drifts:
+        logger.warning(f"Site stats drift detected: {drifts}")
+    if fix:
+        # Deltas first, in the same order as a fold
+        await session.execute(delete(SiteCountryStatsDelta))
+        await session.execute(delete(SiteCountryStats))
+        if actual:
+            await session.execute(insert(SiteCountryStats), list(actual.values()))
+    await session.commit()
+    return drifts
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from infrastructure.models.associations import group_group_table, site_group_table
+from infrastructure.models.group import Group, GroupTypeEnum
+from infrastructure.models.site import CountryEnum, Site
+from sqlalchemy import MetaData, create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def orm_session():
+    """
+    Synchronous session on an in-memory SQLite database holding the site,
+    group and link tables, with foreign keys (and their ON DELETE CASCADE)
+    enforced as in Postgres.
+    """
+    engine = create_engine("sqlite://")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, _: connection.execute("PRAGMA foreign_keys = ON"),
+    )
+    # SQLite cannot autoincrement the (id, country) key: create copies of the
+    # tables with plain ids, the mapped tables are left untouched
+    metadata = MetaData()
+    for table in (Group.__table__, Site.__table__, site_group_table, group_group_table):
+        table.to_metadata(metadata)
+    metadata.tables["sites"].c.id.autoincrement = False
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_deleting_a_site_keeps_its_groups(orm_session: Session) -> None:
+    """
+    Test an ORM delete of a site leaves its groups alone; the link rows go
+    through the database's ON DELETE CASCADE.
+    """
+    group = Group(id=7, name="Group 7", type=GroupTypeEnum.group1)
+    site = Site(
+        id=1,
+        name="Site 1",
+        country=CountryEnum.FR,
+        installation_date=date(2026, 1, 5),
+        max_power_megawatt=10.5,
+        min_power_megawatt=2.0,
+        groups=[group],
+    )
+    orm_session.add(site)
+    orm_session.commit()
+
+    orm_session.delete(site)
+    orm_session.commit()
+
+    assert orm_session.get(Group, 7) is not None
+    links = orm_session.scalar(select(func.count()).select_from(site_group_table))
+    assert links == 0
@@ -0,0 +1,55 @@
+import pytest
+from infrastructure.notifications import ChangeBroadcaster, notify_clause
+from sqlalchemy import select
+
+
+def test_notify_clause_builds_the_event_payload() -> None:
+    """
+    Test notify_clause sends the entity, operation and id as a JSON payload
+    on the change channel.
+    """
+    statement = select(notify_clause("site", "insert", 5))
+
+    assert "pg_notify" in str(statement)
+    assert "json_build_object" in str(statement)
+    assert list(statement.compile().params.values()) == [
+        "entity_changes",
+        "entity",
+        "site",
+        "operation",
+        "insert",
+        "id",
+        5,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_fans_out_to_all_subscribers() -> None:
+    """
+    Test every subscriber receives each published event.
+    """
+    broadcaster = ChangeBroadcaster(queue_size=10)
+    async with broadcaster.subscribe() as first, broadcaster.subscribe() as second:
+        assert broadcaster.subscriber_count == 2
+        broadcaster.publish("event")
+        assert first.queue.get_nowait() == "event"
+        assert second.queue.get_nowait() == "event"
+    assert broadcaster.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_overflows_without_blocking_others() -> None:
+    """
+    Test a full subscriber is flagged for resync while others keep receiving.
+    """
+    broadcaster = ChangeBroadcaster(queue_size=2)
+    async with broadcaster.subscribe() as slow, broadcaster.subscribe() as fast:
+        for n in range(3):
+            broadcaster.publish(str(n))
+            if n < 2:
+                fast.queue.get_nowait()
+
+        assert slow.overflowed is True
+        assert slow.queue.qsize() == 2
+        assert fast.overflowed is False
+        assert fast.queue.get_nowait() == "2"
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from infrastructure.periodic import PeriodicTask
+
+
+def session_factory() -> MagicMock:
+    """Helper mocking async_session_maker with a fresh mock session per call."""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=MagicMock())
+    context.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=context)
+
+
+@pytest.mark.asyncio
+async def test_periodic_task_keeps_running_after_a_failure(monkeypatch: Any) -> None:
+    """
+    Test the function runs every interval and a failed run does not stop it.
+    """
+    monkeypatch.setattr(
+        "infrastructure.periodic.async_session_maker", session_factory()
+    )
+    func = AsyncMock(side_effect=[RuntimeError("boom"), None, None])
+    task = PeriodicTask("test", 0.01, func)
+
+    await task.start()
+    try:
+        for _ in range(100):
+            if func.await_count >= 3:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await task.stop()
+
+    assert func.await_count == 3
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from infrastructure.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    """
+    Test callers with the same key share one call and different keys don't.
+    """
+    flight = SingleFlight()
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    def make_call(key: str):
+        async def call() -> str:
+            calls.append(key)
+            await release.wait()
+            return f"result-{key}"
+
+        return call
+
+    waiters = [asyncio.ensure_future(flight.do("a", make_call("a"))) for _ in range(5)]
+    other = asyncio.ensure_future(flight.do("b", make_call("b")))
+    await asyncio.sleep(0)
+    assert flight.in_flight == 2
+
+    release.set()
+    assert await asyncio.gather(*waiters) == ["result-a"] * 5
+    assert await other == "result-b"
+    assert calls == ["a", "b"]
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_and_key_is_released() -> None:
+    """
+    Test a failed call raises for every caller and the next call runs anew.
+    """
+    flight = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeed() -> str:
+        return "ok"
+
+    assert await flight.do("k", succeed) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call() -> None:
+    """
+    Test the call keeps running for the others when one caller goes away.
+    """
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call() -> str:
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", call))
+    second = asyncio.ensure_future(flight.do("k", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
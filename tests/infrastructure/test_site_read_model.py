@@ -0,0 +1,329 @@
+import asyncio
+import json
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from infrastructure.models.group import GroupTypeEnum
+from infrastructure.models.site import CountryEnum
+from infrastructure.notifications import ChangeBroadcaster
+from infrastructure.site_read_model import SiteColumns, SiteReadModel
+from services.site import get_all_sites
+
+
+def _site(site_id: int, **overrides) -> dict:
+    site = {
+        "id": site_id,
+        "name": f"Site {site_id}",
+        "country": CountryEnum.FR if site_id % 2 else CountryEnum.IT,
+        "installation_date": date(2024, 1, 1) + timedelta(days=site_id % 7),
+        "max_power_megawatt": float(site_id % 5 + 10),
+        "min_power_megawatt": float(site_id % 3),
+        "useful_energy_at_1_megawatt": None,
+        "efficiency": None,
+    }
+    site.update(overrides)
+    return site
+
+
+def _result(rows: list, mappings: bool = False) -> MagicMock:
+    result = MagicMock()
+    if mappings:
+        result.mappings.return_value.all.return_value = rows
+    else:
+        result.all.return_value = rows
+    return result
+
+
+def _group(group_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=group_id, name=f"Group {group_id}", type=GroupTypeEnum.group1
+    )
+
+
+async def _loaded_model(mock_session, sites, groups=(), links=()) -> SiteReadModel:
+    mock_session.execute.side_effect = [
+        _result(sites, mappings=True),
+        _result(list(groups)),
+        _result(list(links)),
+    ]
+    model = SiteReadModel()
+    await model.load(mock_session)
+    model.ready = True
+    return model
+
+
+def _reference(sites: list[dict], sort_keys, **filters) -> list[int]:
+    """Filter and sort the sites the way the SQL query does."""
+    matching = [
+        site
+        for site in sites
+        if (not filters.get("country") or site["country"] == filters["country"])
+        and all(
+            (
+                filters.get(f"{field}_from") is None
+                or site[field] >= filters[f"{field}_from"]
+            )
+            and (
+                filters.get(f"{field}_to") is None
+                or site[field] <= filters[f"{field}_to"]
+            )
+            for field in (
+                "installation_date",
+                "max_power_megawatt",
+                "min_power_megawatt",
+            )
+        )
+    ]
+    keys = list(sort_keys)
+    if "id" not in dict(keys):
+        keys.append(("id", keys[0][1]))
+    # Stable sorts, least significant key first
+    for field, descending in reversed(keys):
+        matching.sort(key=lambda site: site[field], reverse=descending)
+    return [site["id"] for site in matching]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sort_keys, filters",
+    [
+        ([("id", False)], {}),
+        ([("installation_date", True)], {"country": CountryEnum.FR}),
+        (
+            [("installation_date", False), ("max_power_megawatt", True)],
+            {
+                "installation_date_from": date(2024, 1, 2),
+                "installation_date_to": date(2024, 1, 5),
+            },
+        ),
+        (
+            [("min_power_megawatt", True), ("id", False)],
+            {"max_power_megawatt_from": 11.0, "min_power_megawatt_to": 1.0},
+        ),
+        ([("max_power_megawatt", False)], {"max_power_megawatt_to": 12.5}),
+    ],
+)
+async def test_listing_matches_the_database_order(
+    mock_session, sort_keys, filters
+) -> None:
+    """
+    Test filtering, multi-key sorting (with the id tie-breaker) and paging
+    from memory give the same sites as the SQL query would.
+    """
+    random.seed(7)
+    sites = [_site(site_id) for site_id in random.sample(range(1, 500), 120)]
+    model = await _loaded_model(mock_session, sites)
+
+    expected = _reference(sites, sort_keys, **filters)
+    listed = await model.list_sites(sort_keys, **filters)
+    page = await model.list_sites(sort_keys, limit=10, offset=5, **filters)
+
+    assert [site["id"] for site in listed] == expected
+    assert [site["id"] for site in page] == expected[5:15]
+    assert await model.count_sites(**filters) == len(expected)
+
+
+@pytest.mark.asyncio
+async def test_sites_carry_their_groups(mock_session) -> None:
+    """Test listed sites are shaped like SiteResponse, groups included."""
+    model = await _loaded_model(
+        mock_session, [_site(1), _site(2)], groups=[_group(7)], links=[(1, 7)]
+    )
+
+    sites = await model.list_sites([("id", False)])
+
+    assert sites[0]["groups"] == [
+        {"id": 7, "name": "Group 7", "type": GroupTypeEnum.group1}
+    ]
+    assert sites[1]["groups"] == []
+    assert sites[1]["name"] == "Site 2"
+
+
+@pytest.mark.asyncio
+async def test_changes_are_applied_incrementally(mock_session) -> None:
+    """
+    Test a burst of notifications re-reads only the named sites and groups:
+    updated sites are replaced, deleted sites and groups are dropped.
+    """
+    model = await _loaded_model(
+        mock_session,
+        [_site(1), _site(2), _site(3)],
+        groups=[_group(7), _group(8)],
+        links=[(1, 7), (1, 8)],
+    )
+    await model.list_sites([("id", False)])
+
+    mock_session.execute.side_effect = [
+        _result([]),  # group 8 was deleted
+        _result([_site(1, max_power_megawatt=99.0), _site(4)], mappings=True),
+        _result([(1, 7)]),
+    ]
+    payloads = [
+        json.dumps({"entity": "site", "operation": "update", "id": 1}),
+        json.dumps({"entity": "site", "operation": "delete", "id": 2}),
+        json.dumps({"entity": "site", "operation": "insert", "id": 4}),
+        json.dumps({"entity": "group", "operation": "delete", "id": 8}),
+    ]
+    await model.apply(payloads, mock_session)
+
+    sites = await model.list_sites([("max_power_megawatt", True)])
+    assert [site["id"] for site in sites] == [1, 4, 3]
+    assert sites[0]["max_power_megawatt"] == 99.0
+    assert [group["id"] for group in sites[0]["groups"]] == [7]
+    assert mock_session.execute.call_count == 3 + 3
+
+
+@pytest.mark.asyncio
+async def test_updated_group_stays_on_its_sites(mock_session) -> None:
+    """Test a renamed group is updated in place, not dropped from its sites."""
+    model = await _loaded_model(
+        mock_session, [_site(1)], groups=[_group(7)], links=[(1, 7)]
+    )
+    renamed = SimpleNamespace(id=7, name="Renamed", type=GroupTypeEnum.group2)
+    mock_session.execute.side_effect = [_result([renamed])]
+
+    await model.apply(
+        [json.dumps({"entity": "group", "operation": "update", "id": 7})], mock_session
+    )
+
+    sites = await model.list_sites([("id", False)])
+    assert sites[0]["groups"] == [
+        {"id": 7, "name": "Renamed", "type": GroupTypeEnum.group2}
+    ]
+
+
+def test_patched_snapshot_matches_a_rebuild() -> None:
+    """
+    Test patching the columns and sorted indexes with inserts, updates and
+    deletes (reusing freed slots) gives the same listings and sites as
+    building them from scratch.
+    """
+    random.seed(3)
+    sites = {site_id: _site(site_id) for site_id in range(1, 200)}
+    columns = SiteColumns.build([(site, ()) for site in sites.values()])
+    for _ in range(20):
+        changes = {}
+        for site_id in random.sample(range(1, 260), 15):
+            if site_id in sites and random.random() < 0.4:
+                del sites[site_id]
+                changes[site_id] = None
+            else:
+                sites[site_id] = _site(
+                    site_id,
+                    max_power_megawatt=float(random.randint(1, 9)),
+                    efficiency=random.choice((None, 0.25)),
+                )
+                changes[site_id] = (sites[site_id], (site_id % 3,))
+        columns = columns.patch(changes)
+
+    rebuilt = SiteColumns.build([(site, ()) for site in sites.values()])
+    for sort_keys in (
+        [("id", False)],
+        [("max_power_megawatt", True)],
+        [("installation_date", False), ("min_power_megawatt", True)],
+    ):
+        ranges = {"max_power_megawatt": (3.0, 7.0)}
+        patched = columns.ids[columns.select(sort_keys, CountryEnum.FR, ranges)]
+        expected = rebuilt.ids[rebuilt.select(sort_keys, CountryEnum.FR, ranges)]
+        assert patched.tolist() == expected.tolist()
+    # Sites read back from the typed columns as they were written
+    records = columns.records(list(columns.slots.values()))
+    assert {site["id"]: site for site, _ in records} == sites
+    # Freed slots are reused rather than left to accumulate
+    assert len(columns.countries) == len(sites) + len(columns.free)
+
+
+@pytest.mark.asyncio
+async def test_lag_covers_changes_until_they_are_visible(monkeypatch) -> None:
+    """
+    Test the consistency lag counts from the oldest received change while
+    it is being applied, and drops to 0 once it is visible to reads.
+    """
+    broadcaster = ChangeBroadcaster(queue_size=10)
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__ = AsyncMock()
+    session_maker.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr("infrastructure.site_read_model.broadcaster", broadcaster)
+    monkeypatch.setattr(
+        "infrastructure.site_read_model.async_session_maker", session_maker
+    )
+    release = asyncio.Event()
+
+    async def apply(payloads, session):
+        await release.wait()
+
+    model = SiteReadModel(poll_interval=0.01)
+    model.load = AsyncMock()
+    model.apply = apply
+
+    await model.start()
+    try:
+        await asyncio.sleep(0.02)
+        assert model.lag_seconds == 0.0
+        broadcaster.publish(json.dumps({"entity": "site", "id": 1}))
+        await asyncio.sleep(0.02)
+        assert model.lag_seconds > 0
+        release.set()
+        await asyncio.sleep(0.02)
+        assert model.lag_seconds == 0.0
+    finally:
+        await model.stop()
+
+
+@pytest.mark.asyncio
+async def test_get_all_sites_uses_the_read_model(mock_session, monkeypatch) -> None:
+    """
+    Test get_all_sites is served from memory when the read model is ready,
+    and from the database for fuzzy search.
+    """
+    model = await _loaded_model(mock_session, [_site(1), _site(2)])
+    monkeypatch.setattr("services.site.site_read_model", model)
+    mock_session.execute.reset_mock()
+
+    sites = await get_all_sites(mock_session, sort_by="id", order="desc")
+    assert [site["id"] for site in sites] == [2, 1]
+    mock_session.execute.assert_not_called()
+
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    mock_session.execute.side_effect = [result]
+    assert await get_all_sites(mock_session, q="site") == []
+    mock_session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_missed_notifications_trigger_a_reload(monkeypatch) -> None:
+    """
+    Test the model applies notifications as they come, and reloads from
+    scratch once it has missed some.
+    """
+    broadcaster = ChangeBroadcaster(queue_size=2)
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__ = AsyncMock()
+    session_maker.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr("infrastructure.site_read_model.broadcaster", broadcaster)
+    monkeypatch.setattr(
+        "infrastructure.site_read_model.async_session_maker", session_maker
+    )
+    model = SiteReadModel(poll_interval=0.01)
+    model.load = AsyncMock()
+    model.apply = AsyncMock()
+
+    await model.start()
+    try:
+        await asyncio.sleep(0.05)
+        assert model.ready
+        broadcaster.publish(json.dumps({"entity": "site", "id": 1}))
+        await asyncio.sleep(0.05)
+        model.apply.assert_awaited_once()
+
+        broadcaster._resync_all()
+        await asyncio.sleep(0.05)
+        assert model.load.await_count == 2
+        assert model.ready
+    finally:
+        await model.stop()
+    assert broadcaster.subscriber_count == 0
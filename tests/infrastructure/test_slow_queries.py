@@ -0,0 +1,81 @@
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from infrastructure import db
+
+
+@pytest.fixture
+def slow_query_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(db.settings, "slow_query_threshold_ms", 100.0)
+    monkeypatch.setattr(db.settings, "slow_query_explain_sample_rate", 1.0)
+    monkeypatch.setattr(
+        db.settings, "slow_query_explain_path", str(tmp_path / "plans.jsonl")
+    )
+    return tmp_path / "plans.jsonl"
+
+
+def test_record_query_logs_slow_statements_with_origin(
+    slow_query_settings, monkeypatch, caplog
+) -> None:
+    """
+    Test only statements over the threshold are logged, with their origin
+    and truncated parameters, and that slow reads are sampled for EXPLAIN.
+    """
+    explained = []
+    monkeypatch.setattr(db, "schedule_explain", lambda *args: explained.append(args))
+    token = db.query_origin.set("GET /sites/")
+    try:
+        with caplog.at_level(logging.WARNING, logger=db.logger.name):
+            db.record_query("SELECT 1", (), 50.0)
+            db.record_query(
+                "SELECT * FROM sites WHERE id = ANY($1)", (list(range(1000)),), 250.0
+            )
+            db.record_query("UPDATE sites SET name = $1", ("x",), 250.0)
+    finally:
+        db.query_origin.reset(token)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 2
+    assert "250 ms, GET /sites/" in messages[0]
+    assert "chars)" in messages[0]
+    assert [args[0] for args in explained] == ["SELECT * FROM sites WHERE id = ANY($1)"]
+
+
+def test_record_query_disabled_with_zero_threshold(monkeypatch, caplog) -> None:
+    """
+    Test a threshold of 0 turns the slow-query log off.
+    """
+    monkeypatch.setattr(db.settings, "slow_query_threshold_ms", 0)
+    with caplog.at_level(logging.WARNING, logger=db.logger.name):
+        db.record_query("SELECT 1", (), 10_000.0)
+    assert caplog.records == []
+
+
+@pytest.mark.asyncio
+async def test_explain_query_appends_plan(slow_query_settings, monkeypatch) -> None:
+    """
+    Test the plan is captured in a read-only transaction and stored as a
+    JSON line.
+    """
+    connection = AsyncMock()
+    result = MagicMock()
+    result.scalar_one.return_value = [{"Plan": {"Node Type": "Seq Scan"}}]
+    connection.exec_driver_sql.side_effect = [MagicMock(), result]
+    fake_engine = MagicMock()
+    fake_engine.connect.return_value.__aenter__.return_value = connection
+    monkeypatch.setattr(db, "engine", fake_engine)
+
+    await db.explain_query("SELECT * FROM sites", (), 321.0, "GET /sites/")
+
+    statements = [call.args[0] for call in connection.exec_driver_sql.call_args_list]
+    assert statements == [
+        "SET TRANSACTION READ ONLY",
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM sites",
+    ]
+    connection.rollback.assert_awaited_once()
+    record = json.loads(slow_query_settings.read_text())
+    assert record["origin"] == "GET /sites/"
+    assert record["duration_ms"] == 321.0
+    assert record["plan"][0]["Plan"]["Node Type"] == "Seq Scan"
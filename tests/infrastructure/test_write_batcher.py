@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from exceptions import BusinessLogicException
+from infrastructure.write_batcher import WriteBatcher
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_batch() -> None:
+    """
+    Test items submitted together are created by one call, and each caller
+    gets its own result or exception.
+    """
+    batches: list[list[dict]] = []
+
+    async def create_many(items, session):
+        batches.append(items)
+        return [
+            BusinessLogicException(detail="rejected") if item["n"] == 2 else item["n"]
+            for item in items
+        ]
+
+    async def create_one(item, session):
+        raise AssertionError("not retried")
+
+    batcher = WriteBatcher(create_many, create_one, max_delay=0.01)
+    results = await asyncio.gather(
+        *(batcher.submit({"n": n}) for n in range(4)), return_exceptions=True
+    )
+
+    assert len(batches) == 1
+    assert results[:2] == [0, 1]
+    assert isinstance(results[2], BusinessLogicException)
+    assert results[3] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting() -> None:
+    """Test a batch reaching max_size is written at once."""
+    batches: list[int] = []
+
+    async def create_many(items, session):
+        batches.append(len(items))
+        return [item["n"] for item in items]
+
+    batcher = WriteBatcher(create_many, create_many, max_delay=60, max_size=2)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit({"n": n}) for n in range(4))), timeout=1
+    )
+    assert results == [0, 1, 2, 3]
+    assert batches == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_item_by_item() -> None:
+    """
+    Test a database error on the batch falls back to one create per item,
+    so only the bad item fails.
+    """
+
+    async def create_many(items, session):
+        raise OperationalError("INSERT", {}, Exception("deadlock"))
+
+    async def create_one(item, session):
+        if item["n"] == 1:
+            raise BusinessLogicException(detail="bad row")
+        return item["n"]
+
+    batcher = WriteBatcher(create_many, create_one, max_delay=0.01)
+    results = await asyncio.gather(
+        *(batcher.submit({"n": n}) for n in range(3)), return_exceptions=True
+    )
+    assert results[0] == 0
+    assert isinstance(results[1], BusinessLogicException)
+    assert results[2] == 2
+
+
+@pytest.mark.asyncio
+async def test_any_batch_error_is_retried_item_by_item() -> None:
+    """
+    Test an error other than a database one (e.g. validating a returned
+    row) also falls back to one create per item.
+    """
+
+    async def create_many(items, session):
+        raise ValueError("invalid row")
+
+    async def create_one(item, session):
+        return item["n"]
+
+    batcher = WriteBatcher(create_many, create_one, max_delay=0.01)
+    results = await asyncio.gather(*(batcher.submit({"n": n}) for n in range(3)))
+    assert results == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_drain_writes_pending_items() -> None:
+    """Test drain flushes waiting items and waits for their batch."""
+    written: list[int] = []
+
+    async def create_many(items, session):
+        await asyncio.sleep(0.01)
+        written.extend(item["n"] for item in items)
+        return [item["n"] for item in items]
+
+    batcher = WriteBatcher(create_many, create_many, max_delay=60)
+    submits = [asyncio.ensure_future(batcher.submit({"n": n})) for n in range(2)]
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(batcher.drain(), timeout=1)
+    assert written == [0, 1]
+    assert await asyncio.gather(*submits) == [0, 1]
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from infrastructure.db import apply_statement_timeout, statement_timeout_ms
+from middlewares.admission import AdmissionControlMiddleware, RouteClass, classify_route
+
+
+def make_client(route_classes: dict[str, RouteClass]) -> TestClient:
+    """Build a small app behind the admission control middleware."""
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        route_classes=route_classes,
+        wait_timeout=0.01,
+        retry_after=3,
+    )
+
+    @app.get("/")
+    async def root() -> Any:
+        return {"ok": True}
+
+    @app.get("/sites/")
+    async def sites() -> Any:
+        return {"statement_timeout_ms": statement_timeout_ms.get()}
+
+    return TestClient(app)
+
+
+def test_classify_route() -> None:
+    """Test requests are sorted into read, write and export classes."""
+    assert classify_route("GET", "/sites/") == "read"
+    assert classify_route("POST", "/sites/batch-get") == "read"
+    assert classify_route("PATCH", "/groups/1") == "write"
+    assert classify_route("GET", "/exports/sites") == "export"
+    assert classify_route("GET", "/events/") is None
+    assert classify_route("GET", "/") is None
+
+
+@pytest.mark.asyncio
+async def test_route_class_rejects_when_queue_is_full() -> None:
+    """Test a full class with no queue room rejects at once."""
+    route_class = RouteClass(limit=1, max_waiting=0)
+
+    assert await route_class.acquire(wait_timeout=1.0)
+    assert not await route_class.acquire(wait_timeout=1.0)
+    route_class.release()
+    assert await route_class.acquire(wait_timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_route_class_queues_with_bounded_wait() -> None:
+    """Test a queued request gets the slot when released, or times out."""
+    route_class = RouteClass(limit=1, max_waiting=1)
+    assert await route_class.acquire(wait_timeout=1.0)
+
+    assert not await route_class.acquire(wait_timeout=0.01)
+    assert route_class.waiting == 0
+
+    waiter = asyncio.ensure_future(route_class.acquire(wait_timeout=1.0))
+    await asyncio.sleep(0)
+    assert route_class.waiting == 1
+    route_class.release()
+    assert await waiter
+
+
+def test_middleware_sheds_with_retry_after() -> None:
+    """Test a saturated class answers 503 with Retry-After."""
+    client = make_client({"read": RouteClass(limit=0, max_waiting=0)})
+
+    response = client.get("/sites/")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+
+    # Requests that do not use the database are never shed
+    assert client.get("/").status_code == 200
+
+
+def test_middleware_sets_statement_timeout() -> None:
+    """Test an admitted request runs with its class's statement timeout."""
+    client = make_client(
+        {"read": RouteClass(limit=1, max_waiting=0, statement_timeout_ms=500)}
+    )
+
+    response = client.get("/sites/")
+    assert response.status_code == 200
+    assert response.json() == {"statement_timeout_ms": 500}
+    # The slot is released once the response is sent
+    assert client.get("/sites/").status_code == 200
+
+
+def test_statement_timeout_applied_per_transaction() -> None:
+    """Test SET LOCAL is only issued when the request overrides the default."""
+    connection = MagicMock()
+    apply_statement_timeout(connection)
+    connection.exec_driver_sql.assert_not_called()
+
+    token = statement_timeout_ms.set(0)
+    try:
+        apply_statement_timeout(connection)
+    finally:
+        statement_timeout_ms.reset(token)
+    connection.exec_driver_sql.assert_called_once_with(
+        "SET LOCAL statement_timeout = 0"
+    )
@@ -0,0 +1,69 @@
+import gzip
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from middlewares.compression import CompressionMiddleware, negotiate_encoding
+
+
+def make_client() -> TestClient:
+    """Build a small app behind the compression middleware."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, offload_size=1000)
+
+    @app.get("/small")
+    async def small() -> Any:
+        return PlainTextResponse("ok")
+
+    @app.get("/large")
+    async def large() -> Any:
+        return PlainTextResponse("x" * 5000)
+
+    @app.get("/events")
+    async def events() -> Any:
+        async def stream():
+            yield "data: " + "y" * 500 + "\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding_honours_q_values() -> None:
+    """Test the best accepted codec is chosen and q=0 excludes a codec."""
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+
+
+def test_large_body_is_compressed() -> None:
+    """Test bodies above the threshold are gzip compressed, in the threadpool."""
+    response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "x" * 5000
+
+
+def test_small_body_is_not_compressed() -> None:
+    """Test bodies below the threshold are sent as is."""
+    response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.text == "ok"
+
+
+def test_event_stream_passes_through() -> None:
+    """Test event streams are never buffered or compressed."""
+    response = make_client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.text.startswith("data: y")
+
+
+def test_gzip_payload_is_valid() -> None:
+    """Test the raw payload decompresses to the original body."""
+    client = make_client()
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as r:
+        raw = b"".join(r.iter_raw())
+    assert gzip.decompress(raw) == b"x" * 5000
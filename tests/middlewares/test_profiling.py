@@ -0,0 +1,71 @@
+import asyncio
+import json
+import pstats
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("pyinstrument")
+
+from middlewares.profiling import ProfilingMiddleware  # noqa: E402
+
+
+def make_client(output_dir: Path, **options: Any) -> TestClient:
+    """Build a small app behind the profiling middleware."""
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, output_dir=str(output_dir), **options)
+
+    @app.get("/groups/")
+    async def groups() -> Any:
+        # Long enough for the sampler to record something on a warm path
+        await asyncio.sleep(0.01)
+        return [{"id": i} for i in range(1000)]
+
+    return TestClient(app)
+
+
+def test_header_triggers_speedscope_profile(tmp_path: Path) -> None:
+    """Test a request with the profiling header is saved as speedscope JSON."""
+    client = make_client(tmp_path, token="secret")
+
+    response = client.get("/groups/", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    name = response.headers["x-profile-id"]
+    assert "GET-groups" in name
+    profile = json.loads((tmp_path / name).read_text())
+    assert "speedscope" in profile["$schema"]
+
+
+def test_unprofiled_requests_write_nothing(tmp_path: Path) -> None:
+    """Test requests without the header, or with a wrong token, are untouched."""
+    client = make_client(tmp_path, token="secret")
+
+    assert "x-profile-id" not in client.get("/groups/").headers
+    response = client.get("/groups/", headers={"X-Profile": "guess"})
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+    response = client.get("/groups/", headers={"X-Profile": "secret"})
+    assert "x-profile-id" in response.headers
+
+
+def test_header_is_ignored_without_a_token(tmp_path: Path) -> None:
+    """Test clients cannot force profiling when no token is configured."""
+    client = make_client(tmp_path)
+
+    response = client.get("/groups/", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sampling_writes_pstats(tmp_path: Path) -> None:
+    """Test sampled requests are profiled and pstats output is loadable."""
+    client = make_client(tmp_path, sample_rate=1.0, output_format="pstats")
+
+    response = client.get("/groups/")
+    name = response.headers["x-profile-id"]
+    assert name.endswith(".pstats")
+    pstats.Stats(str(tmp_path / name))
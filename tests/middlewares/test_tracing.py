@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from infrastructure.tracing import (
+    FileSpanExporter,
+    Span,
+    Tracer,
+    parse_traceparent,
+    traced,
+)
+from middlewares.tracing import TracingMiddleware
+
+PARENT_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+
+
+@traced
+async def load_groups() -> list[dict]:
+    return [{"id": i} for i in range(3)]
+
+
+@traced
+async def failing_service() -> None:
+    raise ValueError("boom")
+
+
+def make_client(path: Path, sample_rate: float = 1.0) -> tuple[TestClient, Tracer]:
+    """Build a small app behind the tracing middleware."""
+    tracer = Tracer()
+    tracer.configure(FileSpanExporter(str(path), "test"), sample_rate)
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.get("/groups/")
+    async def groups() -> Any:
+        return await load_groups()
+
+    @app.get("/fail")
+    async def fail() -> Any:
+        await failing_service()
+
+    return TestClient(app, raise_server_exceptions=False), tracer
+
+
+def read_spans(path: Path, tracer: Tracer) -> list[dict]:
+    tracer.stop()
+    traces = [json.loads(line) for line in path.read_text().splitlines()]
+    return [
+        span
+        for trace in traces
+        for scope in trace["resourceSpans"][0]["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+def test_request_and_service_spans_continue_incoming_trace(tmp_path: Path) -> None:
+    """
+    Test the request span continues the caller's trace and service calls
+    are exported as its children.
+    """
+    path = tmp_path / "traces.jsonl"
+    client, tracer = make_client(path, sample_rate=0.0)
+
+    response = client.get(
+        "/groups/", headers={"traceparent": f"00-{PARENT_TRACE_ID}-{PARENT_SPAN_ID}-01"}
+    )
+    assert response.status_code == 200
+    assert response.headers["x-trace-id"] == PARENT_TRACE_ID
+
+    service, request = read_spans(path, tracer)
+    assert request["name"] == "GET /groups/"
+    assert request["parentSpanId"] == PARENT_SPAN_ID
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in request[
+        "attributes"
+    ]
+    assert service["name"] == f"{__name__}.load_groups"
+    assert service["parentSpanId"] == request["spanId"]
+    assert {service["traceId"], request["traceId"]} == {PARENT_TRACE_ID}
+
+
+def test_failed_service_span_carries_error(tmp_path: Path) -> None:
+    """Test an exception raised in a service marks its span as failed."""
+    path = tmp_path / "traces.jsonl"
+    client, tracer = make_client(path)
+
+    assert client.get("/fail").status_code == 500
+    service = read_spans(path, tracer)[0]
+    assert service["status"] == {"code": 2, "message": "ValueError('boom')"}
+
+
+def test_unsampled_requests_are_not_traced(tmp_path: Path) -> None:
+    """
+    Test nothing is exported when the caller did not sample the trace, or
+    when the sample rate leaves the request out.
+    """
+    path = tmp_path / "traces.jsonl"
+    client, tracer = make_client(path, sample_rate=0.0)
+
+    response = client.get(
+        "/groups/", headers={"traceparent": f"00-{PARENT_TRACE_ID}-{PARENT_SPAN_ID}-00"}
+    )
+    assert "x-trace-id" not in response.headers
+    assert "x-trace-id" not in client.get("/groups/").headers
+    tracer.stop()
+    assert not path.exists()
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "garbage",
+        f"00-{'0' * 32}-{PARENT_SPAN_ID}-01",
+        f"01-{PARENT_TRACE_ID}-{PARENT_SPAN_ID}-01",
+    ],
+)
+def test_parse_traceparent_rejects_invalid_headers(header: str | None) -> None:
+    """Test missing, malformed and all-zero trace contexts are ignored."""
+    assert parse_traceparent(header) is None
+
+
+def test_slow_exporter_drops_traces_instead_of_blocking() -> None:
+    """
+    Test traces are exported in batches by the background thread, and
+    dropped without blocking when the queue is full.
+    """
+    release = threading.Event()
+    batches: list[int] = []
+
+    class SlowExporter:
+        def export(self, spans: list[Span]) -> None:
+            release.wait(5)
+            batches.append(len(spans))
+
+    tracer = Tracer()
+    tracer.configure(SlowExporter(), 1.0, queue_size=2, batch_size=10)
+    span = tracer.start_trace("GET /")
+    span.end()
+
+    started = time.monotonic()
+    for _ in range(6):
+        tracer.submit(span.spans)
+    assert time.monotonic() - started < 0.5
+    assert tracer.dropped >= 3
+
+    release.set()
+    tracer.stop()
+    assert sum(batches) == 6 - tracer.dropped
+    assert len(batches) <= 2
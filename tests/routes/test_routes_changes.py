@@ -0,0 +1,31 @@
+from typing import Any
+
+
+def test_list_changes_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /changes forwards the cursor and returns the feed page."""
+    captured: dict[str, Any] = {}
+
+    async def mock_get_changes(session: Any, since: Any, limit: int) -> dict:
+        captured.update(since=since, limit=limit)
+        return {
+            "changes": [
+                {
+                    "cursor": "900-4",
+                    "entity": "site",
+                    "operation": "delete",
+                    "entity_id": 5,
+                    "changed_at": "2026-10-19T00:00:00Z",
+                }
+            ],
+            "next_cursor": "900-4",
+            "has_more": False,
+        }
+
+    monkeypatch.setattr("routes.change.get_changes", mock_get_changes)
+
+    response = client.get("/changes/", params={"since": "900-3", "limit": 50})
+    assert response.status_code == 200
+    assert captured == {"since": "900-3", "limit": 50}
+    data = response.json()
+    assert data["next_cursor"] == "900-4"
+    assert data["changes"][0]["data"] is None
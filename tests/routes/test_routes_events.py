@@ -0,0 +1,27 @@
+from contextlib import asynccontextmanager
+from typing import Any
+
+from infrastructure.notifications import Subscriber
+
+
+def test_stream_events_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /events streams change events, then a resync on overflow."""
+    subscriber = Subscriber(queue_size=10)
+    subscriber.push('{"entity": "site", "operation": "insert", "id": 5}')
+    subscriber.push('{"entity": "group", "operation": "delete", "id": 2}')
+    subscriber.overflowed = True
+
+    @asynccontextmanager
+    async def mock_subscribe():
+        yield subscriber
+
+    monkeypatch.setattr("routes.event.broadcaster.subscribe", mock_subscribe)
+
+    with client.stream("GET", "/events/", params={"entity": "site"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    assert body == (
+        'event: change\ndata: {"entity": "site", "operation": "insert", "id": 5}\n\n'
+        "event: resync\ndata: {}\n\n"
+    )
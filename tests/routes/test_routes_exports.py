@@ -0,0 +1,43 @@
+from typing import Any
+
+
+def test_export_route_streams_arrow(client: Any, monkeypatch: Any) -> None:
+    """Test GET /exports/{table} streams the service output as an attachment."""
+    captured: dict[str, Any] = {}
+
+    async def mock_export_table(table, fmt, session, batch_size):
+        captured.update(table=table.value, fmt=fmt.value)
+        yield b"first"
+        yield b"second"
+
+    monkeypatch.setattr("routes.export.export_table", mock_export_table)
+
+    response = client.get("/exports/sites", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert captured == {"table": "sites", "fmt": "arrow"}
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="sites.arrows"'
+    )
+    assert response.content == b"firstsecond"
+
+
+def test_export_route_parquet_filename(client: Any, monkeypatch: Any) -> None:
+    """Test the Parquet format sets its media type and file extension."""
+
+    async def mock_export_table(table, fmt, session, batch_size):
+        yield b"PAR1"
+
+    monkeypatch.setattr("routes.export.export_table", mock_export_table)
+
+    response = client.get("/exports/group_group", params={"format": "parquet"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert "group_group.parquet" in response.headers["content-disposition"]
+
+
+def test_export_route_unknown_table(client: Any) -> None:
+    """Test only the exported tables are accepted."""
+    response = client.get("/exports/change_log")
+    assert response.status_code == 422
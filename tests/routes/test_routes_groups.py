@@ -113,3 +113,73 @@ def test_remove_child_groups_route(client: Any, monkeypatch: Any) -> None:
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == 1
+
+
+def test_get_group_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /groups/{group_id} returns the group."""
+
+    async def mock_get_group_by_id(group_id: int, session: Any) -> dict[str, Any]:
+        return {"id": group_id, "name": "G", "type": "group1", "sites": [3]}
+
+    monkeypatch.setattr("routes.group.get_group_by_id", mock_get_group_by_id)
+
+    response = client.get("/groups/4")
+    assert response.status_code == 200
+    assert response.json()["sites"] == [3]
+
+
+def test_batch_get_groups_route(client: Any, monkeypatch: Any) -> None:
+    """Test POST /groups/batch-get returns found groups and missing IDs."""
+
+    async def mock_get_groups_by_ids(group_ids: list[int], session: Any) -> tuple:
+        return [{"id": 1, "name": "G", "type": "group1"}], [2]
+
+    monkeypatch.setattr("routes.group.get_groups_by_ids", mock_get_groups_by_ids)
+
+    response = client.post("/groups/batch-get", json={"ids": [1, 2]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [group["id"] for group in data["groups"]] == [1]
+    assert data["missing_ids"] == [2]
+
+
+def test_group_bid_curve_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /groups/{group_id}/bid-curve returns the curve arrays."""
+
+    async def mock_get_bid_curve(group_id: int, session: Any) -> dict[str, Any]:
+        return {
+            "group_id": group_id,
+            "site_ids": [2, 1],
+            "min_power_megawatt": [1.0, 2.0],
+            "max_power_megawatt": [4.0, 10.0],
+            "cumulative_min_megawatt": [1.0, 3.0],
+            "cumulative_max_megawatt": [4.0, 14.0],
+        }
+
+    monkeypatch.setattr("routes.group.get_bid_curve", mock_get_bid_curve)
+
+    response = client.get("/groups/4/bid-curve")
+    assert response.status_code == 200
+    assert response.json()["cumulative_max_megawatt"] == [4.0, 14.0]
+
+
+def test_batch_get_bid_curves_route(client: Any, monkeypatch: Any) -> None:
+    """Test POST /groups/bid-curves/batch-get returns curves and missing IDs."""
+
+    async def mock_get_bid_curves(group_ids: list[int], session: Any) -> tuple:
+        empty = {
+            "site_ids": [],
+            "min_power_megawatt": [],
+            "max_power_megawatt": [],
+            "cumulative_min_megawatt": [],
+            "cumulative_max_megawatt": [],
+        }
+        return [{"group_id": 1, **empty}], [2]
+
+    monkeypatch.setattr("routes.group.get_bid_curves", mock_get_bid_curves)
+
+    response = client.post("/groups/bid-curves/batch-get", json={"ids": [1, 2]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [curve["group_id"] for curve in data["curves"]] == [1]
+    assert data["missing_ids"] == [2]
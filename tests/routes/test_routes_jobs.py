@@ -0,0 +1,80 @@
+from typing import Any
+
+from infrastructure.models.job import Job, JobKindEnum, JobStatusEnum
+
+
+def make_job(**overrides: Any) -> Job:
+    """Build a job ORM object for route responses."""
+    values = {
+        "id": 1,
+        "kind": JobKindEnum.site_import,
+        "status": JobStatusEnum.pending,
+        "processed": 0,
+        "cancel_requested": False,
+        **overrides,
+    }
+    return Job(**values)
+
+
+def test_submit_site_import_route(
+    client: Any, monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """Test POST /jobs/site-import accepts the sites and returns 202."""
+    captured: dict[str, Any] = {}
+
+    async def mock_submit_job(kind: Any, params: dict, session: Any) -> Job:
+        captured.update(kind=kind, params=params)
+        return make_job(kind=kind)
+
+    monkeypatch.setattr("routes.job.submit_job", mock_submit_job)
+
+    response = client.post("/jobs/site-import", json=[sample_site_data] * 3)
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    assert captured["kind"] == JobKindEnum.site_import
+    assert len(captured["params"]["sites"]) == 3
+    assert captured["params"]["sites"][0]["installation_date"] == "2025-07-01"
+
+
+def test_submit_site_update_route(client: Any, monkeypatch: Any) -> None:
+    """Test POST /jobs/site-update only forwards the fields that are set."""
+    captured: dict[str, Any] = {}
+
+    async def mock_submit_job(kind: Any, params: dict, session: Any) -> Job:
+        captured.update(params)
+        return make_job(kind=kind)
+
+    monkeypatch.setattr("routes.job.submit_job", mock_submit_job)
+
+    response = client.post(
+        "/jobs/site-update",
+        json={"site_ids": [1, 2], "changes": {"max_power_megawatt": 12.0}},
+    )
+    assert response.status_code == 202
+    assert captured == {"site_ids": [1, 2], "changes": {"max_power_megawatt": 12.0}}
+
+
+def test_get_job_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /jobs/{job_id} reports progress."""
+
+    async def mock_get_job(job_id: int, session: Any) -> Job:
+        return make_job(id=job_id, status=JobStatusEnum.running, processed=500)
+
+    monkeypatch.setattr("routes.job.get_job", mock_get_job)
+
+    response = client.get("/jobs/4")
+    assert response.status_code == 200
+    assert response.json()["processed"] == 500
+
+
+def test_cancel_job_route(client: Any, monkeypatch: Any) -> None:
+    """Test POST /jobs/{job_id}/cancel returns the updated job."""
+
+    async def mock_cancel_job(job_id: int, session: Any) -> Job:
+        return make_job(id=job_id, status=JobStatusEnum.running, cancel_requested=True)
+
+    monkeypatch.setattr("routes.job.cancel_job", mock_cancel_job)
+
+    response = client.post("/jobs/4/cancel")
+    assert response.status_code == 200
+    assert response.json()["cancel_requested"] is True
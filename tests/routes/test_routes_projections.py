@@ -0,0 +1,38 @@
+from typing import Any
+
+
+def test_projection_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /projections/ returns the projection columns."""
+    captured: dict[str, Any] = {}
+
+    async def mock_get_projection(session, date_from, date_to, level, country):
+        captured.update(level=level.value, country=country)
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "level": level,
+            "keys": [7, 8],
+            "site_counts": [2, 1],
+            "operating_days": [16, 2],
+            "min_energy_mwh": [312.0, 24.0],
+            "max_energy_mwh": [1488.0, 48.0],
+            "total_min_energy_mwh": 336.0,
+            "total_max_energy_mwh": 1536.0,
+        }
+
+    monkeypatch.setattr("routes.projection.get_projection", mock_get_projection)
+
+    response = client.get(
+        "/projections/",
+        params={"from": "2025-01-01", "to": "2025-01-10", "level": "group"},
+    )
+    assert response.status_code == 200
+    assert captured == {"level": "group", "country": None}
+    body = response.json()
+    assert body["keys"] == [7, 8]
+    assert body["max_energy_mwh"] == [1488.0, 48.0]
+
+
+def test_projection_route_requires_range(client: Any) -> None:
+    """Test the date range is mandatory."""
+    assert client.get("/projections/", params={"from": "2025-01-01"}).status_code == 422
@@ -1,5 +1,13 @@
+import asyncio
 from typing import Any
 
+import httpx
+import msgpack
+import pytest
+from exceptions import BusinessLogicException
+from infrastructure.write_batcher import WriteBatcher
+from main import app
+
 
 def test_list_sites_route(client: Any, monkeypatch: Any) -> None:
     """Test GET /sites returns an empty list."""
@@ -14,6 +22,23 @@ def test_list_sites_route(client: Any, monkeypatch: Any) -> None:
     assert isinstance(response.json(), list)
 
 
+def test_list_sites_route_search_params(client: Any, monkeypatch: Any) -> None:
+    """Test GET /sites forwards search and pagination parameters."""
+    captured: dict[str, Any] = {}
+
+    async def mock_get_all_sites(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        captured.update(kwargs)
+        return []
+
+    monkeypatch.setattr("routes.site.get_all_sites", mock_get_all_sites)
+
+    response = client.get("/sites/", params={"q": "Solar Plant", "limit": 5})
+    assert response.status_code == 200
+    assert captured["q"] == "Solar Plant"
+    assert captured["limit"] == 5
+    assert captured["offset"] == 0
+
+
 def test_create_site_route(
     client: Any, monkeypatch: Any, sample_site_data: dict[str, Any]
 ) -> None:
@@ -62,3 +87,210 @@ def test_delete_site_route(client: Any, monkeypatch: Any) -> None:
 
     response = client.delete("/sites/1")
     assert response.status_code == 204
+
+
+def test_list_sites_route_total_count_header(client: Any, monkeypatch: Any) -> None:
+    """Test GET /sites?count=exact returns the total in X-Total-Count."""
+
+    async def mock_get_all_sites(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        return []
+
+    async def mock_count_sites(session: Any, mode: Any, **filters: Any) -> int:
+        assert filters["country"] == "FR"
+        return 57
+
+    monkeypatch.setattr("routes.site.get_all_sites", mock_get_all_sites)
+    monkeypatch.setattr("routes.site.count_sites", mock_count_sites)
+
+    response = client.get("/sites/", params={"country": "FR", "count": "exact"})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "57"
+
+    response = client.get("/sites/")
+    assert "X-Total-Count" not in response.headers
+
+
+def test_capacity_timeline_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /sites/capacity-timeline returns the computed series."""
+
+    async def mock_get_capacity_timeline(
+        session: Any, granularity: Any, country: Any
+    ) -> list[dict[str, Any]]:
+        assert granularity == "day"
+        return [
+            {
+                "country": "IT",
+                "period": "2025-07-19",
+                "installed_megawatt": 4.0,
+                "cumulative_megawatt": 12.0,
+            }
+        ]
+
+    monkeypatch.setattr("routes.site.get_capacity_timeline", mock_get_capacity_timeline)
+
+    response = client.get(
+        "/sites/capacity-timeline", params={"granularity": "day", "country": "IT"}
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["cumulative_megawatt"] == 12.0
+
+
+def test_availability_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /sites/availability returns the free dates of the range."""
+
+    async def mock_get_available_installation_dates(
+        session: Any, country: Any, date_from: Any, date_to: Any
+    ) -> list[str]:
+        return ["2025-07-01", "2025-07-03"]
+
+    monkeypatch.setattr(
+        "routes.site.get_available_installation_dates",
+        mock_get_available_installation_dates,
+    )
+
+    response = client.get(
+        "/sites/availability",
+        params={"country": "FR", "from": "2025-07-01", "to": "2025-07-03"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["country"] == "FR"
+    assert data["available_dates"] == ["2025-07-01", "2025-07-03"]
+
+
+def test_site_stats_route(client: Any, monkeypatch: Any) -> None:
+    """Test GET /sites/stats returns the per-country summary."""
+
+    async def mock_get_site_stats(session: Any) -> list[dict[str, Any]]:
+        return [
+            {
+                "country": "FR",
+                "site_count": 2,
+                "total_max_power_megawatt": 30.0,
+                "average_max_power_megawatt": 15.0,
+                "average_efficiency": None,
+                "average_useful_energy_at_1_megawatt": 0.8,
+            }
+        ]
+
+    monkeypatch.setattr("routes.site.get_site_stats", mock_get_site_stats)
+
+    response = client.get("/sites/stats")
+    assert response.status_code == 200
+    assert response.json()[0]["average_max_power_megawatt"] == 15.0
+
+
+def test_list_sites_route_msgpack(
+    client: Any, monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """Test GET /sites answers in MessagePack when the client accepts it."""
+
+    async def mock_get_all_sites(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        return [{**sample_site_data, "id": 1}]
+
+    monkeypatch.setattr("routes.site.get_all_sites", mock_get_all_sites)
+
+    response = client.get("/sites/", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data[0]["id"] == 1
+    assert data[0]["installation_date"] == "2025-07-01"
+
+
+def test_get_site_route(
+    client: Any, monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """Test GET /sites/{site_id} returns the site."""
+
+    async def mock_get_site_by_id(site_id: int, session: Any) -> dict[str, Any]:
+        return {**sample_site_data, "id": site_id}
+
+    monkeypatch.setattr("routes.site.get_site_by_id", mock_get_site_by_id)
+
+    response = client.get("/sites/7")
+    assert response.status_code == 200
+    assert response.json()["id"] == 7
+
+
+def test_batch_get_sites_route(
+    client: Any, monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """Test POST /sites/batch-get returns found sites and missing IDs."""
+    captured: dict[str, Any] = {}
+
+    async def mock_get_sites_by_ids(site_ids: list[int], session: Any) -> tuple:
+        captured["ids"] = site_ids
+        return [{**sample_site_data, "id": 1}], [5]
+
+    monkeypatch.setattr("routes.site.get_sites_by_ids", mock_get_sites_by_ids)
+
+    response = client.post("/sites/batch-get", json={"ids": [1, 5]})
+    assert response.status_code == 200
+    assert captured["ids"] == [1, 5]
+    data = response.json()
+    assert [site["id"] for site in data["sites"]] == [1]
+    assert data["missing_ids"] == [5]
+
+
+@pytest.mark.asyncio
+async def test_list_sites_route_coalesces_identical_requests(
+    monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """Test identical concurrent listings share one service call."""
+    calls: list[dict[str, Any]] = []
+
+    async def mock_get_all_sites(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)
+        return [{**sample_site_data, "id": 1}]
+
+    monkeypatch.setattr("routes.site.get_all_sites", mock_get_all_sites)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        responses = await asyncio.gather(
+            *[ac.get("/sites/", params={"country": "FR"}) for _ in range(5)],
+            ac.get("/sites/", params={"country": "IT"}),
+        )
+
+    assert [response.status_code for response in responses] == [200] * 6
+    assert len({response.content for response in responses[:5]}) == 1
+    assert sorted(call["country"] for call in calls) == ["FR", "IT"]
+
+
+@pytest.mark.asyncio
+async def test_create_site_route_batches_concurrent_writes(
+    monkeypatch: Any, sample_site_data: dict[str, Any]
+) -> None:
+    """
+    Test concurrent creates go through one batch when write batching is on,
+    with a business rule error returned only to its own request.
+    """
+    batches: list[list[str]] = []
+
+    async def mock_create_sites(items: list[dict], session: Any) -> list[Any]:
+        batches.append([item["name"] for item in items])
+        return [
+            (
+                BusinessLogicException(detail="A French site already exists")
+                if index
+                else {**item, "id": 1}
+            )
+            for index, item in enumerate(items)
+        ]
+
+    monkeypatch.setattr(
+        "routes.site.site_batcher",
+        WriteBatcher(mock_create_sites, mock_create_sites, max_delay=0.05),
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        responses = await asyncio.gather(
+            ac.post("/sites/", json={**sample_site_data, "name": "A"}),
+            ac.post("/sites/", json={**sample_site_data, "name": "B"}),
+        )
+
+    assert len(batches) == 1 and sorted(batches[0]) == ["A", "B"]
+    assert sorted(response.status_code for response in responses) == [201, 400]
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+import pytest
+from exceptions import BusinessLogicException
+from services.bid_curve import compute_bid_curves, get_bid_curve, get_bid_curves
+
+# Aligned member arrays: root group, site id, min power, max power
+MEMBERS = (
+    [1, 1, 2, 1, 2],
+    [10, 11, 11, 12, 13],
+    [2.0, 1.0, 1.0, 1.0, 0.5],
+    [10.0, 4.0, 4.0, 6.0, 3.0],
+)
+
+
+def test_compute_bid_curves_merit_order_and_cumulative_sums() -> None:
+    """
+    Test each group's sites are stacked by min power then max power, with
+    cumulative sums restarting at every group, and that groups without
+    sites get an empty curve.
+    """
+    curve_1, curve_2, curve_3 = compute_bid_curves([1, 2, 3], MEMBERS)
+
+    assert curve_1["site_ids"] == [12, 11, 10]
+    assert curve_1["cumulative_min_megawatt"] == [1.0, 2.0, 4.0]
+    assert curve_1["cumulative_max_megawatt"] == [6.0, 10.0, 20.0]
+    assert curve_2["site_ids"] == [13, 11]
+    assert curve_2["min_power_megawatt"] == [0.5, 1.0]
+    assert curve_2["cumulative_max_megawatt"] == [3.0, 7.0]
+    assert curve_3 == {
+        "group_id": 3,
+        "site_ids": [],
+        "min_power_megawatt": [],
+        "max_power_megawatt": [],
+        "cumulative_min_megawatt": [],
+        "cumulative_max_megawatt": [],
+    }
+
+
+def test_compute_bid_curves_without_members() -> None:
+    """Test groups whose trees hold no site get empty curves."""
+    (curve,) = compute_bid_curves([5], (None, None, None, None))
+    assert curve["site_ids"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_bid_curves_walks_descendants(mock_session: MagicMock) -> None:
+    """
+    Test the batch runs one existence query and one recursive member query,
+    and reports missing IDs.
+    """
+    groups_result = MagicMock()
+    groups_result.scalars.return_value.all.return_value = [1, 2]
+    members_result = MagicMock()
+    members_result.one.return_value = MEMBERS
+    mock_session.execute.side_effect = [groups_result, members_result]
+
+    curves, missing = await get_bid_curves([2, 1, 9, 2], mock_session)
+
+    assert [curve["group_id"] for curve in curves] == [2, 1]
+    assert missing == [9]
+    assert mock_session.execute.call_count == 2
+    members_query = str(mock_session.execute.call_args_list[1].args[0])
+    assert "WITH RECURSIVE tree" in members_query
+    assert "UNION SELECT" in members_query
+
+
+@pytest.mark.asyncio
+async def test_get_bid_curve_not_found(mock_session: MagicMock) -> None:
+    """Test an unknown group raises a 404 without computing anything."""
+    groups_result = MagicMock()
+    groups_result.scalars.return_value.all.return_value = []
+    mock_session.execute.return_value = groups_result
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await get_bid_curve(9, mock_session)
+    assert exc_info.value.status_code == 404
+    mock_session.execute.assert_called_once()
@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from exceptions import BusinessLogicException
+from infrastructure.models.change_log import (
+    ChangeEntityEnum,
+    ChangeLog,
+    ChangeOperationEnum,
+)
+from services.change import get_changes
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def make_change(change_id: int, entity: ChangeEntityEnum, operation, **kwargs):
+    """Build a change log entry written by transaction 900."""
+    return ChangeLog(
+        id=change_id,
+        txid=900,
+        entity=entity,
+        operation=operation,
+        changed_at=NOW,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_changes_attaches_current_rows(mock_session: MagicMock) -> None:
+    """
+    Test changes come back in order with a cursor, the current site columns
+    and no data for deletes.
+    """
+    changes = [
+        make_change(1, ChangeEntityEnum.site, ChangeOperationEnum.insert, entity_id=5),
+        make_change(
+            2,
+            ChangeEntityEnum.site_group,
+            ChangeOperationEnum.insert,
+            entity_id=5,
+            related_id=3,
+        ),
+        make_change(3, ChangeEntityEnum.group, ChangeOperationEnum.delete, entity_id=8),
+    ]
+    changes_result = MagicMock()
+    changes_result.scalars.return_value.all.return_value = changes
+    sites_result = MagicMock()
+    sites_result.mappings.return_value = [{"id": 5, "name": "Solar Plant A"}]
+    mock_session.execute.side_effect = [changes_result, sites_result]
+
+    feed = await get_changes(mock_session, since="899-12", limit=10)
+
+    assert [c["cursor"] for c in feed["changes"]] == ["900-1", "900-2", "900-3"]
+    assert feed["changes"][0]["data"] == {"id": 5, "name": "Solar Plant A"}
+    assert feed["changes"][1]["related_id"] == 3
+    assert feed["changes"][2]["data"] is None
+    assert feed["next_cursor"] == "900-3"
+    assert feed["has_more"] is False
+
+    query = str(mock_session.execute.call_args_list[0].args[0])
+    assert "pg_snapshot_xmin(pg_current_snapshot())" in query
+    assert "(change_log.txid, change_log.id) >" in query
+
+
+@pytest.mark.asyncio
+async def test_get_changes_pages(mock_session: MagicMock) -> None:
+    """
+    Test an extra row signals more changes and the cursor stops at the page.
+    """
+    changes = [
+        make_change(i, ChangeEntityEnum.group, ChangeOperationEnum.delete, entity_id=i)
+        for i in (1, 2, 3)
+    ]
+    changes_result = MagicMock()
+    changes_result.scalars.return_value.all.return_value = changes
+    mock_session.execute.return_value = changes_result
+
+    feed = await get_changes(mock_session, limit=2)
+
+    assert len(feed["changes"]) == 2
+    assert feed["next_cursor"] == "900-2"
+    assert feed["has_more"] is True
+
+
+@pytest.mark.asyncio
+async def test_get_changes_empty_keeps_cursor(mock_session: MagicMock) -> None:
+    """
+    Test an empty page hands the same cursor back.
+    """
+    changes_result = MagicMock()
+    changes_result.scalars.return_value.all.return_value = []
+    mock_session.execute.return_value = changes_result
+
+    feed = await get_changes(mock_session, since="900-3")
+
+    assert feed == {"changes": [], "next_cursor": "900-3", "has_more": False}
+
+
+@pytest.mark.asyncio
+async def test_get_changes_invalid_cursor_raises(mock_session: MagicMock) -> None:
+    """
+    Test a malformed cursor is rejected.
+    """
+    with pytest.raises(BusinessLogicException, match="Invalid cursor"):
+        await get_changes(mock_session, since="not-a-cursor")
@@ -0,0 +1,84 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from infrastructure.models.site import CountryEnum, Site
+from services.counting import CountModeEnum, count_rows
+from sqlalchemy import select
+
+
+@pytest.mark.asyncio
+async def test_count_rows_exact(mock_session: MagicMock) -> None:
+    """
+    Test exact mode runs a COUNT(*) over the filtered query.
+    """
+    execute_result = MagicMock()
+    execute_result.scalar_one.return_value = 42
+    mock_session.execute.return_value = execute_result
+
+    query = select(Site).where(Site.country == CountryEnum.FR)
+    total = await count_rows(mock_session, query, CountModeEnum.exact)
+
+    assert total == 42
+    assert "count(*)" in str(mock_session.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_count_rows_estimate_unfiltered_uses_reltuples(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test estimate mode on an unfiltered query sums pg_class.reltuples over
+    the table's leaf partitions.
+    """
+    execute_result = MagicMock()
+    execute_result.scalar.return_value = 1_000_000
+    mock_session.execute.return_value = execute_result
+
+    total = await count_rows(mock_session, select(Site), CountModeEnum.estimate)
+
+    assert total == 1_000_000
+    args = mock_session.execute.call_args.args
+    assert "pg_class" in str(args[0])
+    assert "pg_partition_tree" in str(args[0])
+    assert args[1] == {"table_name": "sites"}
+
+
+@pytest.mark.asyncio
+async def test_count_rows_estimate_without_statistics_falls_back(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test estimate mode falls back to an exact count on never-analyzed tables.
+    """
+    reltuples_result = MagicMock()
+    # No analyzed partition: the sum over none of them is NULL
+    reltuples_result.scalar.return_value = None
+    count_result = MagicMock()
+    count_result.scalar_one.return_value = 3
+    mock_session.execute.side_effect = [reltuples_result, count_result]
+
+    total = await count_rows(mock_session, select(Site), CountModeEnum.estimate)
+
+    assert total == 3
+
+
+@pytest.mark.asyncio
+async def test_count_rows_estimate_filtered_uses_explain(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test estimate mode on a filtered query reads the EXPLAIN row estimate.
+    """
+    connection = MagicMock()
+    explain_result = MagicMock()
+    explain_result.scalar.return_value = '[{"Plan": {"Plan Rows": 1234}}]'
+    connection.exec_driver_sql = AsyncMock(return_value=explain_result)
+    mock_session.connection = AsyncMock(return_value=connection)
+
+    query = select(Site).where(Site.country == CountryEnum.FR)
+    total = await count_rows(mock_session, query, CountModeEnum.estimate)
+
+    assert total == 1234
+    statement = connection.exec_driver_sql.call_args.args[0]
+    assert statement.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "'FR'" in statement
@@ -0,0 +1,144 @@
+import io
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from services.export import (
+    EXPORT_TABLES,
+    ExportFormatEnum,
+    ExportTableEnum,
+    export_schema,
+    export_table,
+)
+from sqlalchemy import Table
+
+
+def setup_stream_partitions(mock_session: MagicMock, partitions: list[list]) -> None:
+    """Helper to mock session.stream() yielding the given row partitions."""
+
+    async def iterate_partitions():
+        for rows in partitions:
+            yield rows
+
+    result = MagicMock()
+    result.partitions = iterate_partitions
+    mock_session.stream.return_value = result
+
+
+async def collect(table: ExportTableEnum, fmt: ExportFormatEnum, session) -> bytes:
+    return b"".join(
+        [chunk async for chunk in export_table(table, fmt, session, batch_size=2)]
+    )
+
+
+SITE_ROWS = [
+    [
+        (
+            1,
+            "Site A",
+            "FR",
+            date(2026, 10, 19),
+            10.0,
+            2.0,
+            None,
+            0.5,
+            datetime.now(timezone.utc),
+        ),
+        (
+            2,
+            "Site B",
+            "IT",
+            date(2026, 10, 17),
+            12.0,
+            3.0,
+            1.5,
+            None,
+            datetime.now(timezone.utc),
+        ),
+    ],
+    [
+        (
+            3,
+            "Site C",
+            "DE",
+            date(2026, 10, 20),
+            8.0,
+            1.0,
+            None,
+            None,
+            datetime.now(timezone.utc),
+        )
+    ],
+]
+
+
+def test_export_schema_maps_column_types() -> None:
+    """
+    Test every exported table has an Arrow type per column.
+    """
+    sites: Table = EXPORT_TABLES[ExportTableEnum.sites]
+    schema = export_schema(sites)
+    assert schema.names == [column.name for column in sites.columns]
+    assert schema.field("country").type == pa.string()
+    assert schema.field("installation_date").type == pa.date32()
+    assert schema.field("updated_at").type == pa.timestamp("us", tz="UTC")
+    assert schema.field("efficiency").nullable
+
+    links = export_schema(EXPORT_TABLES[ExportTableEnum.site_group])
+    assert links.types == [pa.int32(), pa.int32(), pa.string()]
+
+
+@pytest.mark.asyncio
+async def test_export_table_arrow_stream(mock_session: MagicMock) -> None:
+    """
+    Test sites are streamed as one Arrow record batch per fetched partition.
+    """
+    setup_stream_partitions(mock_session, SITE_ROWS)
+
+    body = await collect(ExportTableEnum.sites, ExportFormatEnum.arrow, mock_session)
+
+    reader = pa.ipc.open_stream(body)
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.column("country").to_pylist() == ["FR", "IT", "DE"]
+    assert table.column("useful_energy_at_1_megawatt").null_count == 2
+
+    statement = str(mock_session.stream.call_args.args[0])
+    assert "CAST(sites.country AS VARCHAR)" in statement
+    assert "ORDER BY sites.id" in statement
+
+
+@pytest.mark.asyncio
+async def test_export_table_parquet(mock_session: MagicMock) -> None:
+    """
+    Test a Parquet export is a complete file with a row group per partition.
+    """
+    setup_stream_partitions(mock_session, [[(1, 2), (1, 3)], [(2, 3)]])
+
+    body = await collect(
+        ExportTableEnum.group_group, ExportFormatEnum.parquet, mock_session
+    )
+
+    parquet_file = pq.ParquetFile(io.BytesIO(body))
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.read().to_pydict() == {
+        "parent_group_id": [1, 1, 2],
+        "child_group_id": [2, 3, 3],
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_empty_table(mock_session: MagicMock) -> None:
+    """
+    Test an empty table still yields a readable stream with its schema.
+    """
+    setup_stream_partitions(mock_session, [])
+
+    body = await collect(ExportTableEnum.groups, ExportFormatEnum.arrow, mock_session)
+
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 0
+    assert table.schema.names == ["id", "name", "type", "updated_at"]
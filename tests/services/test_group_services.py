@@ -1,11 +1,15 @@
 from unittest.mock import MagicMock
 
 import pytest
+from exceptions import BusinessLogicException
 from infrastructure.models.group import Group, GroupTypeEnum
 from schemas.group import GroupResponse
 from services.group import (
+    add_child_groups,
+    create_groups,
     delete_group,
     get_all_groups,
+    get_groups_by_ids,
     remove_child_groups,
     update_group,
 )
@@ -22,15 +26,20 @@ def setup_execute_scalars_all_returning_groups(
     mock_session.execute.return_value = execute_mock
 
 
-def setup_execute_scalars_first_returning(
-    mock_session: MagicMock, obj: Group | None
-) -> None:
-    """Helper to mock execute().scalars().first() returning a single Group or None."""
-    scalars_mock = MagicMock()
-    scalars_mock.first.return_value = obj
-    execute_mock = MagicMock()
-    execute_mock.scalars.return_value = scalars_mock
-    mock_session.execute.return_value = execute_mock
+def group_row(
+    group_id: int,
+    name: str,
+    sites: list[int] | None = None,
+    child_groups: list[int] | None = None,
+) -> dict:
+    """Helper building a group row as returned with its link IDs."""
+    return {
+        "id": group_id,
+        "name": name,
+        "type": GroupTypeEnum.group1,
+        "sites": sites or [],
+        "child_groups": child_groups or [],
+    }
 
 
 @pytest.mark.asyncio
@@ -52,79 +61,243 @@ async def test_get_all_groups(mock_session: MagicMock) -> None:
 @pytest.mark.asyncio
 async def test_update_group(mock_session: MagicMock) -> None:
     """
-    Test updating a group modifies its fields and commits the session.
+    Test updating a group builds the response from the UPDATE's RETURNING
+    row and commits the session.
     """
-    existing_group = Group(id=1, name="Old Name", type=GroupTypeEnum.group1)
     update_data = {"name": "Updated Name"}
 
-    # Mock first execute call: fetching existing group
-    scalars_mock = MagicMock()
-    scalars_mock.first.return_value = existing_group
-    execute_result_1 = MagicMock()
-    execute_result_1.scalars.return_value = scalars_mock
-
-    # Mock second execute call: returning updated group
-    execute_result_2 = MagicMock()
-    execute_result_2.scalar_one.return_value = existing_group
-
-    # Setup sequential side_effect for execute calls
-    mock_session.execute.side_effect = [execute_result_1, execute_result_2]
+    # Single execute call: UPDATE ... RETURNING with links and NOTIFY
+    returning_mock = MagicMock()
+    returning_mock.mappings.return_value.first.return_value = group_row(
+        1, "Updated Name", sites=[4], child_groups=[2]
+    )
+    mock_session.execute.side_effect = [returning_mock]
 
     updated_group = await update_group(1, update_data, session=mock_session)
 
-    # Confirm the ORM object was updated
     assert updated_group.name == update_data["name"]
-    # Confirm session commit was called
+    assert updated_group.sites == [4]
+    assert updated_group.child_groups == [2]
+    statement = str(mock_session.execute.call_args.args[0])
+    assert statement.startswith("UPDATE groups")
+    assert "pg_notify" in statement
     mock_session.commit.assert_called_once()
+    mock_session.refresh.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_group_not_found(mock_session: MagicMock) -> None:
+    """
+    Test updating a missing group raises 404 without committing.
+    """
+    returning_mock = MagicMock()
+    returning_mock.mappings.return_value.first.return_value = None
+    mock_session.execute.side_effect = [returning_mock]
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await update_group(99, {"name": "Nope"}, session=mock_session)
+
+    assert exc_info.value.status_code == 404
+    mock_session.commit.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_delete_group(mock_session: MagicMock) -> None:
     """
-    Test deleting a group removes it from session and commits.
+    Test deleting a group is one DELETE statement, links left to the
+    database cascade, and commits.
     """
-    group_to_delete = Group(id=1, name="DeleteMe", type=GroupTypeEnum.group1)
-    setup_execute_scalars_first_returning(mock_session, group_to_delete)
+    delete_result = MagicMock()
+    delete_result.first.return_value = (1, "")
+    mock_session.execute.return_value = delete_result
 
     await delete_group(1, session=mock_session)
 
-    mock_session.delete.assert_called_once_with(group_to_delete)
+    assert mock_session.execute.call_count == 1
+    statement = str(mock_session.execute.call_args.args[0])
+    assert statement.startswith("DELETE FROM groups")
+    assert "pg_notify" in statement
+    mock_session.delete.assert_not_called()
     mock_session.commit.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_delete_group_not_found(mock_session: MagicMock) -> None:
+    """
+    Test deleting a missing group raises 404 without committing.
+    """
+    delete_result = MagicMock()
+    delete_result.first.return_value = None
+    mock_session.execute.return_value = delete_result
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await delete_group(99, session=mock_session)
+
+    assert exc_info.value.status_code == 404
+    mock_session.commit.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_remove_child_groups(mock_session: MagicMock) -> None:
     """
-    Test that removing child groups clears them from the parent and commits.
+    Test that removing child groups deletes the links and notifies the
+    removed ones in one statement and commits.
     """
-    # Setup parent and children
-    child1 = Group(id=2, name="Child1", type=GroupTypeEnum.group2)
-    child2 = Group(id=3, name="Child2", type=GroupTypeEnum.group1)
-    parent = Group(id=1, name="Parent", type=GroupTypeEnum.group1)
-    parent.child_groups = [child1, child2]
+    snapshot_mock = MagicMock()
+    snapshot_mock.mappings.return_value.first.return_value = group_row(
+        1, "Parent", child_groups=[2, 3, 4]
+    )
 
-    # Mock execute().scalars().first() calls returning parent, then children
-    scalars_mock = MagicMock()
-    scalars_mock.first.side_effect = [parent, child1, child2]
-    execute_mock = MagicMock()
-    execute_mock.scalars.return_value = scalars_mock
+    # Parent snapshot, then DELETE + NOTIFY
+    mock_session.execute.side_effect = [snapshot_mock, MagicMock()]
 
-    # Mock final execute returning updated parent
-    final_execute_mock = MagicMock()
-    final_execute_mock.scalar_one.return_value = parent
+    result = await remove_child_groups(1, [2, 3], session=mock_session)
+
+    assert result.id == 1
+    assert result.child_groups == [4]
+    assert mock_session.execute.call_count == 2
+    write_stmt = str(mock_session.execute.call_args_list[1].args[0])
+    assert "DELETE FROM group_group" in write_stmt
+    assert "RETURNING group_group.child_group_id" in write_stmt
+    assert "pg_notify" in write_stmt
+    assert "HAVING count(*) >" in write_stmt
 
-    # Execute side effects list:
+    mock_session.commit.assert_called_once()
+    mock_session.refresh.assert_not_called()
+
+
+def setup_add_child_groups_execute(
+    mock_session: MagicMock,
+    parent: dict,
+    found_child_ids: list[int],
+    cycle_hit: int | None = None,
+) -> None:
+    """
+    Helper to mock the parent, existence, hierarchy lock and cycle queries of
+    add_child_groups.
+    """
+    parent_result = MagicMock()
+    parent_result.mappings.return_value.first.return_value = parent
+    found_result = MagicMock()
+    found_result.scalars.return_value.all.return_value = found_child_ids
+    cycle_result = MagicMock()
+    cycle_result.scalars.return_value.first.return_value = cycle_hit
     mock_session.execute.side_effect = [
-        execute_mock,
-        execute_mock,
-        execute_mock,
-        final_execute_mock,
+        parent_result,
+        found_result,
+        MagicMock(),
+        cycle_result,
+        MagicMock(),
     ]
 
-    result = await remove_child_groups(1, [2, 3], session=mock_session)
 
-    # After removal, child_groups list should be empty
-    assert result.id == 1
-    assert parent.child_groups == []
+@pytest.mark.asyncio
+async def test_add_child_groups(mock_session: MagicMock) -> None:
+    """
+    Test that adding child groups takes the hierarchy lock before the cycle
+    check, bulk inserts the links, notifies only the inserted ones and commits.
+    """
+    parent = group_row(1, "Parent", child_groups=[3, 5])
+    setup_add_child_groups_execute(mock_session, parent, [2, 3])
+
+    result = await add_child_groups(1, [2, 3, 3], session=mock_session)
 
+    assert result.id == 1
+    assert result.child_groups == [2, 3, 5]
+    lock_stmt = str(mock_session.execute.call_args_list[2].args[0])
+    assert "pg_advisory_xact_lock" in lock_stmt
+    write_stmt = str(mock_session.execute.call_args_list[4].args[0])
+    assert "ON CONFLICT DO NOTHING" in write_stmt
+    assert "RETURNING group_group.child_group_id" in write_stmt
+    assert "pg_notify" in write_stmt
+    assert "HAVING count(*) >" in write_stmt
     mock_session.commit.assert_called_once()
+    mock_session.refresh.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_child_groups_self_reference_raises(mock_session: MagicMock) -> None:
+    """
+    Test that a group cannot be linked as its own child.
+    """
+    parent = group_row(1, "Parent")
+    setup_add_child_groups_execute(mock_session, parent, [1])
+
+    with pytest.raises(BusinessLogicException, match="its own child"):
+        await add_child_groups(1, [1], session=mock_session)
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_child_groups_cycle_raises(mock_session: MagicMock) -> None:
+    """
+    Test that linking an ancestor as a child is rejected as a cycle.
+    """
+    parent = group_row(1, "Parent")
+    setup_add_child_groups_execute(mock_session, parent, [2], cycle_hit=2)
+
+    with pytest.raises(BusinessLogicException, match="cycle"):
+        await add_child_groups(1, [2], session=mock_session)
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_all_groups_fuzzy_search(mock_session: MagicMock) -> None:
+    """
+    Test get_all_groups with `q` ranks by trigram similarity.
+    """
+    setup_execute_scalars_all_returning_groups(mock_session, [])
+
+    await get_all_groups(session=mock_session, q="Main", limit=10)
+
+    query = str(mock_session.execute.call_args.args[0])
+    assert "ORDER BY word_similarity" in query
+    assert "LIMIT" in query
+
+
+@pytest.mark.asyncio
+async def test_get_groups_by_ids(mock_session: MagicMock) -> None:
+    """
+    Test a batch get runs one group query and one link query and reports
+    missing IDs.
+    """
+    groups_mock = MagicMock()
+    groups_mock.mappings.return_value = [
+        {"id": 1, "name": "A", "type": GroupTypeEnum.group1},
+        {"id": 2, "name": "B", "type": GroupTypeEnum.group2},
+    ]
+    links_mock = MagicMock()
+    links_mock.__iter__.return_value = iter(
+        [("child_groups", 1, 2), ("sites", 1, 10), ("sites", 2, 11)]
+    )
+    mock_session.execute.side_effect = [groups_mock, links_mock]
+
+    found, missing = await get_groups_by_ids([2, 1, 8], session=mock_session)
+
+    assert [(g.id, g.sites, g.child_groups) for g in found] == [
+        (2, [11], []),
+        (1, [10], [2]),
+    ]
+    assert missing == [8]
+    assert mock_session.execute.call_count == 2
+    assert "UNION ALL" in str(mock_session.execute.call_args_list[1].args[0])
+
+
+@pytest.mark.asyncio
+async def test_create_groups_commits_once(mock_session: MagicMock) -> None:
+    """Test a batch of groups is inserted in one transaction."""
+    rows = [group_row(1, "A"), group_row(2, "B")]
+    results = []
+    for row in rows:
+        result = MagicMock()
+        result.mappings.return_value.one.return_value = row
+        results.append(result)
+    mock_session.execute.side_effect = results
+
+    created = await create_groups(
+        [{"name": "A", "type": "group1"}, {"name": "B", "type": "group1"}], mock_session
+    )
+
+    assert [group.id for group in created] == [1, 2]
+    assert mock_session.execute.call_count == 2
+    mock_session.commit.assert_awaited_once()
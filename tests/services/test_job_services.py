@@ -0,0 +1,249 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from exceptions import BusinessLogicException
+from infrastructure.job_runner import JobCancelledError, JobContext, JobRunner
+from infrastructure.models.job import Job, JobKindEnum, JobStatusEnum
+from services.job import _run_site_import, cancel_job, submit_job
+from sqlalchemy.exc import OperationalError
+
+
+def scalar_result(value: Any) -> MagicMock:
+    """Helper to mock an execute() result exposing scalar_one/scalars().first()."""
+    result = MagicMock()
+    result.scalar_one.return_value = value
+    result.scalars.return_value.first.return_value = value
+    return result
+
+
+def session_factory(session: MagicMock) -> MagicMock:
+    """Helper turning a mock session into an async_session_maker replacement."""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=session)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=context)
+
+
+@pytest.mark.asyncio
+async def test_submit_job(mock_session: MagicMock, monkeypatch: Any) -> None:
+    """
+    Test submitting a job stores it as pending and wakes the workers.
+    """
+    notify = MagicMock()
+    monkeypatch.setattr("services.job.job_runner.notify", notify)
+    mock_session.execute.return_value = scalar_result(0)
+    mock_session.add = MagicMock()
+
+    job = await submit_job(JobKindEnum.site_revalidation, {}, mock_session)
+
+    assert job.status == JobStatusEnum.pending
+    mock_session.add.assert_called_once_with(job)
+    mock_session.commit.assert_called_once()
+    notify.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_submit_job_backlog_full_raises(mock_session: MagicMock) -> None:
+    """
+    Test submissions are refused with 503 when the pending backlog is full.
+    """
+    mock_session.execute.return_value = scalar_result(10_000)
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await submit_job(JobKindEnum.site_revalidation, {}, mock_session)
+    assert exc_info.value.status_code == 503
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cancel_pending_job(mock_session: MagicMock) -> None:
+    """
+    Test a pending job is cancelled with a single conditional update.
+    """
+    job = Job(id=7, kind=JobKindEnum.site_import, status=JobStatusEnum.cancelled)
+    mock_session.execute.return_value = scalar_result(7)
+    mock_session.get = AsyncMock(return_value=job)
+
+    result = await cancel_job(7, mock_session)
+
+    assert result.status == JobStatusEnum.cancelled
+    assert mock_session.execute.call_count == 1
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cancel_finished_job_raises(mock_session: MagicMock) -> None:
+    """
+    Test cancelling a finished job is rejected with 409.
+    """
+    job = Job(id=7, kind=JobKindEnum.site_import, status=JobStatusEnum.succeeded)
+    mock_session.execute.return_value = scalar_result(None)
+    mock_session.get = AsyncMock(return_value=job)
+
+    with pytest.raises(BusinessLogicException, match="already succeeded"):
+        await cancel_job(7, mock_session)
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_raises_when_cancel_requested(
+    mock_session: MagicMock, monkeypatch: Any
+) -> None:
+    """
+    Test a checkpoint persists progress and stops a job asked to cancel.
+    """
+    monkeypatch.setattr(
+        "infrastructure.job_runner.async_session_maker", session_factory(mock_session)
+    )
+    mock_session.execute.return_value = scalar_result(True)
+
+    with pytest.raises(JobCancelledError):
+        await JobContext(1).checkpoint(500, 1000)
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("outcome", "expected_status"),
+    [
+        ({"checked": 3}, JobStatusEnum.succeeded),
+        (JobCancelledError(), JobStatusEnum.cancelled),
+        (RuntimeError("boom"), JobStatusEnum.failed),
+    ],
+)
+async def test_runner_records_job_outcome(
+    mock_session: MagicMock, monkeypatch: Any, outcome: Any, expected_status: Any
+) -> None:
+    """
+    Test the runner stores the final status of a handler run.
+    """
+    monkeypatch.setattr(
+        "infrastructure.job_runner.async_session_maker", session_factory(mock_session)
+    )
+    runner = JobRunner(workers=1, poll_interval=0.1, stale_after=MagicMock())
+
+    @runner.handler(JobKindEnum.site_revalidation)
+    async def handler(params: dict, context: JobContext) -> dict:
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    await runner._run(1, JobKindEnum.site_revalidation, {})
+
+    statement = mock_session.execute.call_args.args[0]
+    assert statement.compile().params["status"] == expected_status
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_runner_requeues_stale_jobs_while_running(monkeypatch: Any) -> None:
+    """
+    Test a job abandoned after start is re-queued and run without a restart.
+    """
+    runner = JobRunner(
+        workers=1, poll_interval=0.01, stale_after=timedelta(milliseconds=40)
+    )
+    recoveries: list[int] = []
+    pending: list[tuple] = []
+    ran = asyncio.Event()
+
+    async def recover() -> None:
+        recoveries.append(len(recoveries))
+        # Nothing is stale on start; a later check finds the abandoned job
+        if len(recoveries) == 2:
+            pending.append((7, JobKindEnum.site_revalidation, {}))
+
+    async def claim() -> tuple | None:
+        return pending.pop() if pending else None
+
+    async def run(job_id: int, kind: JobKindEnum, params: dict) -> None:
+        ran.set()
+
+    monkeypatch.setattr(runner, "_recover_stale_jobs", recover)
+    monkeypatch.setattr(runner, "_claim", claim)
+    monkeypatch.setattr(runner, "_run", run)
+
+    await runner.start()
+    try:
+        await asyncio.wait_for(ran.wait(), timeout=1)
+    finally:
+        await runner.stop()
+    assert len(recoveries) >= 2
+
+
+def _import_params(count: int) -> dict:
+    """Helper building site_import params for `count` valid German sites."""
+    return {
+        "sites": [
+            {
+                "name": f"Site {index}",
+                "country": "DE",
+                "installation_date": "2026-01-05",
+                "max_power_megawatt": 10.5,
+                "min_power_megawatt": 2.0,
+            }
+            for index in range(count)
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_site_import_writes_each_chunk_in_one_transaction(
+    mock_session: MagicMock, monkeypatch: Any
+) -> None:
+    """
+    Test an import creates each chunk with a single create_sites call and
+    reports rejected sites by index.
+    """
+    monkeypatch.setattr(
+        "services.job.async_session_maker", session_factory(mock_session)
+    )
+    monkeypatch.setattr(
+        "services.job.get_settings", lambda: SimpleNamespace(job_chunk_size=2)
+    )
+    create_sites = AsyncMock(
+        side_effect=[
+            [SimpleNamespace(id=1), BusinessLogicException(detail="Rejected")],
+            [SimpleNamespace(id=3)],
+        ]
+    )
+    monkeypatch.setattr("services.job.create_sites", create_sites)
+    context = MagicMock(checkpoint=AsyncMock())
+
+    result = await _run_site_import(_import_params(3), context)
+
+    assert create_sites.await_count == 2
+    assert result["created_ids"] == [1, 3]
+    assert result["errors"] == [{"index": 1, "detail": "Rejected"}]
+
+
+@pytest.mark.asyncio
+async def test_site_import_retries_a_failed_chunk_item_by_item(
+    mock_session: MagicMock, monkeypatch: Any
+) -> None:
+    """
+    Test a chunk whose transaction fails in the database is retried one
+    site per transaction, so only the failing site is reported.
+    """
+    monkeypatch.setattr(
+        "services.job.async_session_maker", session_factory(mock_session)
+    )
+    monkeypatch.setattr(
+        "services.job.create_sites",
+        AsyncMock(side_effect=OperationalError("INSERT", {}, Exception("boom"))),
+    )
+    create_site = AsyncMock(
+        side_effect=[SimpleNamespace(id=1), BusinessLogicException(detail="Taken")]
+    )
+    monkeypatch.setattr("services.job.create_site", create_site)
+    context = MagicMock(checkpoint=AsyncMock())
+
+    result = await _run_site_import(_import_params(2), context)
+
+    assert create_site.await_count == 2
+    assert result["created_ids"] == [1]
+    assert result["errors"] == [{"index": 1, "detail": "Taken"}]
@@ -0,0 +1,100 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+from exceptions import BusinessLogicException
+from infrastructure.models.site import CountryEnum
+from schemas.projection import ProjectionLevelEnum
+from services.projection import compute_projection, get_projection
+
+JANUARY = (date(2025, 1, 1), date(2025, 1, 10))
+FIRST_DAY = (date(2025, 1, 1) - date(1970, 1, 1)).days
+
+# Columns as returned by the array_agg query, not in id order: id, country,
+# installation day, max power, min power, useful energy, efficiency
+FLEET = [
+    [3, 1, 2, 4],
+    ["DE", "FR", "IT", "FR"],
+    [FIRST_DAY + 8, FIRST_DAY, FIRST_DAY + 4, FIRST_DAY + 31],
+    [1.0, 10.0, 4.0, 5.0],
+    [0.5, 2.0, 1.0, 1.0],
+    [None, 0.5, None, 0.8],
+    [None, None, 50.0, None],
+]
+
+
+def test_compute_projection_per_site() -> None:
+    """
+    Test each site is projected from its installation date, scaled by its
+    country's factor, and that sites installed later project nothing.
+    """
+    projection = compute_projection(FLEET, ([], []), *JANUARY, ProjectionLevelEnum.site)
+
+    assert projection["keys"] == [1, 2, 3, 4]
+    assert projection["operating_days"] == [10, 6, 2, 0]
+    assert projection["site_counts"] == [1, 1, 1, 0]
+    # 10 MW x 24 h x 0.5 x 10 days, 4 MW x 24 h x 50% x 6 days, rated DE site
+    assert projection["max_energy_mwh"] == [1200.0, 288.0, 48.0, 0.0]
+    assert projection["min_energy_mwh"] == [240.0, 72.0, 24.0, 0.0]
+    assert projection["total_max_energy_mwh"] == 1536.0
+
+
+def test_compute_projection_per_country_and_group() -> None:
+    """
+    Test country and group totals sum their sites, ignoring links to sites
+    outside the loaded fleet.
+    """
+    by_country = compute_projection(
+        FLEET, ([], []), *JANUARY, ProjectionLevelEnum.country
+    )
+    assert by_country["keys"] == ["DE", "FR", "IT"]
+    assert by_country["site_counts"] == [1, 1, 1]
+    assert by_country["max_energy_mwh"] == [48.0, 1200.0, 288.0]
+
+    links = ([1, 2, 3, 99], [7, 7, 8, 8])
+    by_group = compute_projection(FLEET, links, *JANUARY, ProjectionLevelEnum.group)
+    assert by_group["keys"] == [7, 8]
+    assert by_group["site_counts"] == [2, 1]
+    assert by_group["max_energy_mwh"] == [1488.0, 48.0]
+
+
+def test_compute_projection_empty_fleet() -> None:
+    """Test an empty fleet projects to empty columns."""
+    projection = compute_projection(
+        [None] * 7, (None, None), *JANUARY, ProjectionLevelEnum.group
+    )
+    assert projection["keys"] == []
+    assert projection["total_max_energy_mwh"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_get_projection_loads_columns_and_links(mock_session: MagicMock) -> None:
+    """
+    Test the group level reads the site columns and the links of the
+    requested country in two queries.
+    """
+    sites_result = MagicMock()
+    sites_result.one.return_value = [column[1:2] for column in FLEET]
+    links_result = MagicMock()
+    links_result.one.return_value = ([1], [7])
+    mock_session.execute.side_effect = [sites_result, links_result]
+
+    projection = await get_projection(
+        mock_session, *JANUARY, ProjectionLevelEnum.group, CountryEnum.FR
+    )
+
+    assert projection["keys"] == [7]
+    sites_query, links_query = (
+        str(call.args[0]) for call in mock_session.execute.call_args_list
+    )
+    assert "sites.country = " in sites_query
+    assert "array_agg(sites.installation_date - " in sites_query
+    assert "site_group.site_country = " in links_query
+
+
+@pytest.mark.asyncio
+async def test_get_projection_invalid_range_raises(mock_session: MagicMock) -> None:
+    """Test a range ending before it starts is rejected."""
+    with pytest.raises(BusinessLogicException):
+        await get_projection(mock_session, date(2025, 2, 1), date(2025, 1, 1))
+    mock_session.execute.assert_not_called()
@@ -1,11 +1,25 @@
 from datetime import date
+from types import SimpleNamespace
 from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
 from exceptions import BusinessLogicException
+from infrastructure.models.group import GroupTypeEnum
 from infrastructure.models.site import CountryEnum, Site
-from services.site import create_site, delete_site, get_all_sites, get_site_by_id
+from schemas.site import SiteResponse, TimelineGranularityEnum
+from services.site import (
+    create_site,
+    create_sites,
+    delete_site,
+    get_all_sites,
+    get_available_installation_dates,
+    get_capacity_timeline,
+    get_site_by_id,
+    get_sites_by_ids,
+    update_site,
+    update_sites,
+)
 
 
 def setup_mock_execute_returning_sites(
@@ -87,16 +101,126 @@ async def test_create_site_success(mock_session: MagicMock) -> None:
     no_conflict_mock = MagicMock()
     no_conflict_mock.scalars.return_value.first.return_value = None
 
-    # Mock returned created site object
-    created_site = Site(id=1, **site_data)
-    fetch_created_mock = MagicMock()
-    fetch_created_mock.scalar_one.return_value = created_site
+    # Mock the RETURNING row of the insert
+    insert_mock = MagicMock()
+    insert_mock.mappings.return_value.one.return_value = {"id": 1, **site_data}
 
-    mock_session.execute.side_effect = [no_conflict_mock, fetch_created_mock]
+    mock_session.execute.side_effect = [no_conflict_mock, insert_mock]
 
     site = await create_site(site_data.copy(), session=mock_session)
     assert site.id == 1
     assert site.name == site_data["name"]
+    assert site.groups == []
+    insert_stmt = str(mock_session.execute.call_args_list[1].args[0])
+    assert "INSERT INTO sites" in insert_stmt
+    assert "pg_notify" in insert_stmt
+    assert mock_session.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_create_site_links_groups_in_same_statement(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test group links are inserted with the site, announced as a site_group
+    event and returned without a re-select.
+    """
+    site_data: dict[str, Any] = {
+        "name": "Site G",
+        "country": CountryEnum.DE,
+        "installation_date": date(2026, 10, 19),
+        "max_power_megawatt": 10.5,
+        "min_power_megawatt": 2.0,
+    }
+    groups_mock = MagicMock()
+    groups_mock.__iter__.return_value = iter(
+        [SimpleNamespace(id=7, name="Group 7", type=GroupTypeEnum.group1)]
+    )
+    insert_mock = MagicMock()
+    insert_mock.mappings.return_value.one.return_value = {"id": 1, **site_data}
+    mock_session.execute.side_effect = [groups_mock, insert_mock]
+
+    site = await create_site({**site_data, "group_ids": [7]}, session=mock_session)
+
+    assert [group.id for group in site.groups] == [7]
+    insert_stmt = str(mock_session.execute.call_args_list[1].args[0])
+    assert "INSERT INTO site_group (site_id, site_country, group_id)" in insert_stmt
+    params = mock_session.execute.call_args_list[1].args[0].compile().params
+    assert "site_group" in params.values()
+    assert [7] in params.values()
+    assert mock_session.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_update_site_returns_updated_row(mock_session: MagicMock) -> None:
+    """
+    Test a plain update is a single UPDATE ... RETURNING carrying the groups.
+    """
+    returning_mock = MagicMock()
+    returning_mock.mappings.return_value.first.return_value = {
+        "id": 1,
+        "name": "Renamed",
+        "country": CountryEnum.DE,
+        "installation_date": date(2026, 10, 19),
+        "max_power_megawatt": 10.5,
+        "min_power_megawatt": 2.0,
+        "groups": [{"id": 7, "name": "Group 7", "type": "group1"}],
+    }
+    mock_session.execute.side_effect = [returning_mock]
+
+    site = await update_site(1, {"name": "Renamed"}, session=mock_session)
+
+    assert site.name == "Renamed"
+    assert [group.id for group in site.groups] == [7]
+    statement = str(mock_session.execute.call_args.args[0])
+    assert statement.startswith("UPDATE sites")
+    assert "pg_notify" in statement
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_site_not_found(mock_session: MagicMock) -> None:
+    """
+    Test updating a missing site raises 404 without committing.
+    """
+    returning_mock = MagicMock()
+    returning_mock.mappings.return_value.first.return_value = None
+    mock_session.execute.side_effect = [returning_mock]
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await update_site(99, {"name": "Nope"}, session=mock_session)
+
+    assert exc_info.value.status_code == 404
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_sites_commits_the_batch_once(mock_session: MagicMock) -> None:
+    """
+    Test a batch update reports a missing site as its own 404 and commits
+    the other sites once.
+    """
+    updated_mock = MagicMock()
+    updated_mock.mappings.return_value.first.return_value = {
+        "id": 1,
+        "name": "Renamed",
+        "country": CountryEnum.DE,
+        "installation_date": date(2026, 10, 19),
+        "max_power_megawatt": 10.5,
+        "min_power_megawatt": 2.0,
+        "groups": [],
+    }
+    missing_mock = MagicMock()
+    missing_mock.mappings.return_value.first.return_value = None
+    mock_session.execute.side_effect = [updated_mock, missing_mock]
+
+    results = await update_sites([1, 99], {"name": "Renamed"}, session=mock_session)
+
+    assert isinstance(results[0], SiteResponse)
+    assert results[0].name == "Renamed"
+    assert isinstance(results[1], BusinessLogicException)
+    assert results[1].status_code == 404
+    mock_session.commit.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -155,20 +279,292 @@ async def test_create_site_italian_site_on_weekday_raises(
 @pytest.mark.asyncio
 async def test_delete_site(mock_session: MagicMock) -> None:
     """
-    Test deleting a site triggers delete and commit on session.
+    Test deleting a site is one DELETE statement and commits.
+    """
+    delete_result = MagicMock()
+    delete_result.first.return_value = (1, "")
+    mock_session.execute.return_value = delete_result
+
+    await delete_site(1, session=mock_session)
+
+    assert mock_session.execute.call_count == 1
+    statement = str(mock_session.execute.call_args.args[0])
+    assert statement.startswith("DELETE FROM sites")
+    assert "pg_notify" in statement
+    mock_session.delete.assert_not_called()
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_delete_site_not_found(mock_session: MagicMock) -> None:
+    """
+    Test deleting a missing site raises 404 without committing.
+    """
+    delete_result = MagicMock()
+    delete_result.first.return_value = None
+    mock_session.execute.return_value = delete_result
+
+    with pytest.raises(BusinessLogicException) as exc_info:
+        await delete_site(99, session=mock_session)
+
+    assert exc_info.value.status_code == 404
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_all_sites_fuzzy_search_is_ranked_and_paginated(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test get_all_sites with `q` ranks by trigram similarity and pages results.
+    """
+    setup_mock_execute_returning_sites(mock_session, [])
+
+    await get_all_sites(session=mock_session, q="Solar Plant", limit=20, offset=40)
+
+    query = str(mock_session.execute.call_args.args[0])
+    assert "<%" in query
+    assert "ORDER BY word_similarity" in query
+    assert "LIMIT" in query and "OFFSET" in query
+
+
+@pytest.mark.asyncio
+async def test_get_all_sites_range_filter_on_the_sort_field(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test range filters become inclusive bounds on the sort field, which is
+    followed by the id tie-breaker in the same direction.
     """
-    site_to_delete = Site(
-        id=1,
-        name="DeleteMe",
+    setup_mock_execute_returning_sites(mock_session, [])
+
+    await get_all_sites(
+        session=mock_session,
         country=CountryEnum.FR,
-        installation_date=date.today(),
-        max_power_megawatt=10.5,
-        min_power_megawatt=2.0,
+        sort_by="-installation_date",
+        installation_date_from=date(2025, 1, 1),
+        installation_date_to=date(2025, 12, 31),
     )
 
-    setup_mock_execute_returning_site_or_none(mock_session, site_to_delete)
+    query = str(mock_session.execute.call_args.args[0])
+    assert "sites.installation_date >=" in query
+    assert "sites.installation_date <=" in query
+    assert query.endswith("ORDER BY sites.installation_date DESC, sites.id DESC")
 
-    await delete_site(1, session=mock_session)
 
-    mock_session.delete.assert_called_once_with(site_to_delete)
-    mock_session.commit.assert_called_once()
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("sort_by", "filters", "detail"),
+    [
+        ("efficiency", {}, "Invalid sort field"),
+        ("installation_date,-max_power_megawatt", {}, "Sort by one field"),
+        ("installation_date,-id", {}, "Sort by one field"),
+        (
+            "installation_date",
+            {"max_power_megawatt_to": 50.0},
+            "only allowed on the sort field",
+        ),
+        ("id", {"min_power_megawatt_from": 1.0}, "only allowed on the sort field"),
+    ],
+)
+async def test_get_all_sites_rejects_listings_no_index_serves(
+    mock_session: MagicMock, sort_by: str, filters: dict, detail: str
+) -> None:
+    """
+    Test sorts and range filters outside what a (field, id) index returns
+    are rejected before querying.
+    """
+    with pytest.raises(BusinessLogicException, match=detail):
+        await get_all_sites(session=mock_session, sort_by=sort_by, **filters)
+    mock_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_capacity_timeline_uses_window_function(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test the capacity timeline is one bucketed aggregate with a running sum.
+    """
+    point = {
+        "country": CountryEnum.FR,
+        "period": date(2025, 7, 1),
+        "installed_megawatt": 10.5,
+        "cumulative_megawatt": 31.5,
+    }
+    execute_result = MagicMock()
+    execute_result.mappings.return_value.all.return_value = [point]
+    mock_session.execute.return_value = execute_result
+
+    timeline = await get_capacity_timeline(
+        mock_session, TimelineGranularityEnum.week, CountryEnum.FR
+    )
+
+    assert timeline == [point]
+    mock_session.execute.assert_called_once()
+    query = str(mock_session.execute.call_args.args[0])
+    assert "date_trunc('week'" in query
+    assert "OVER (PARTITION BY sites.country ORDER BY" in query
+    assert "GROUP BY sites.country" in query
+
+
+@pytest.mark.asyncio
+async def test_get_available_installation_dates_france(mock_session: MagicMock) -> None:
+    """
+    Test French availability excludes days that already have a French site.
+    """
+    execute_result = MagicMock()
+    execute_result.scalars.return_value.all.return_value = [date(2025, 7, 2)]
+    mock_session.execute.return_value = execute_result
+
+    available = await get_available_installation_dates(
+        mock_session, CountryEnum.FR, date(2025, 7, 1), date(2025, 7, 3)
+    )
+
+    assert available == [date(2025, 7, 1), date(2025, 7, 3)]
+    mock_session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_available_installation_dates_italy(mock_session: MagicMock) -> None:
+    """
+    Test Italian availability lists weekends only, without querying.
+    """
+    available = await get_available_installation_dates(
+        mock_session, CountryEnum.IT, date(2025, 7, 21), date(2025, 7, 27)
+    )
+
+    assert available == [date(2025, 7, 26), date(2025, 7, 27)]
+    mock_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_available_installation_dates_invalid_range_raises(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test reversed or oversized ranges are rejected.
+    """
+    with pytest.raises(BusinessLogicException, match="must not be after"):
+        await get_available_installation_dates(
+            mock_session, CountryEnum.FR, date(2025, 7, 3), date(2025, 7, 1)
+        )
+    with pytest.raises(BusinessLogicException, match="cannot exceed"):
+        await get_available_installation_dates(
+            mock_session, CountryEnum.FR, date(2025, 1, 1), date(2027, 1, 1)
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_sites_by_ids(mock_session: MagicMock) -> None:
+    """
+    Test a batch get runs one site query and one group query, keeps the
+    requested order and reports missing IDs.
+    """
+    site_row = {
+        "name": "Site",
+        "country": CountryEnum.DE,
+        "installation_date": date(2026, 10, 19),
+        "max_power_megawatt": 10.0,
+        "min_power_megawatt": 1.0,
+    }
+    sites_mock = MagicMock()
+    sites_mock.mappings.return_value = [{**site_row, "id": 2}, {**site_row, "id": 1}]
+    groups_mock = MagicMock()
+    groups_mock.__iter__.return_value = iter([(2, 7, "Group 7", "group1")])
+    mock_session.execute.side_effect = [sites_mock, groups_mock]
+
+    found, missing = await get_sites_by_ids([1, 3, 2, 1], session=mock_session)
+
+    assert [site.id for site in found] == [1, 2]
+    assert found[0].groups == []
+    assert [group.id for group in found[1].groups] == [7]
+    assert missing == [3]
+    assert mock_session.execute.call_count == 2
+    assert "= ANY" in str(mock_session.execute.call_args_list[0].args[0])
+
+
+@pytest.mark.asyncio
+async def test_get_sites_by_ids_none_found(mock_session: MagicMock) -> None:
+    """
+    Test the group query is skipped when no site matches.
+    """
+    sites_mock = MagicMock()
+    sites_mock.mappings.return_value = []
+    mock_session.execute.side_effect = [sites_mock]
+
+    found, missing = await get_sites_by_ids([4], session=mock_session)
+
+    assert found == []
+    assert missing == [4]
+    assert mock_session.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_sites_checks_rules_across_the_batch(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test a batch validates French dates and groups in one query each,
+    rejects a second French site on the same day within the batch, and
+    commits the valid sites once.
+    """
+    base: dict[str, Any] = {"max_power_megawatt": 10.5, "min_power_megawatt": 2.0}
+    items = [
+        {
+            **base,
+            "name": "FR 1",
+            "country": CountryEnum.FR,
+            "installation_date": date(2026, 1, 5),
+            "group_ids": [7],
+        },
+        {
+            **base,
+            "name": "FR 2",
+            "country": CountryEnum.FR,
+            "installation_date": date(2026, 1, 5),
+        },
+        {
+            **base,
+            "name": "FR 3",
+            "country": CountryEnum.FR,
+            "installation_date": date(2026, 1, 6),
+        },
+        {
+            **base,
+            "name": "IT",
+            "country": CountryEnum.IT,
+            "installation_date": date(2026, 1, 7),
+        },
+        {
+            **base,
+            "name": "DE",
+            "country": CountryEnum.DE,
+            "installation_date": date(2026, 1, 7),
+            "group_ids": [8],
+        },
+    ]
+    taken_mock = MagicMock()
+    taken_mock.scalars.return_value.all.return_value = [date(2026, 1, 6)]
+    groups_mock = MagicMock()
+    groups_mock.__iter__.return_value = iter(
+        [
+            SimpleNamespace(id=7, name="Group 7", type=GroupTypeEnum.group1),
+            SimpleNamespace(id=8, name="Group 8", type=GroupTypeEnum.group3),
+        ]
+    )
+    insert_mock = MagicMock()
+    insert_mock.mappings.return_value.one.return_value = {"id": 1, **items[0]}
+    mock_session.execute.side_effect = [taken_mock, groups_mock, insert_mock]
+
+    results = await create_sites(items, mock_session)
+
+    assert isinstance(results[0], SiteResponse)
+    assert [group.id for group in results[0].groups] == [7]
+    assert "already exists for date 2026-01-05" in results[1].detail
+    assert "already exists for date 2026-01-06" in results[2].detail
+    assert "weekends" in results[3].detail
+    assert "group3" in results[4].detail
+    assert mock_session.execute.call_count == 3
+    mock_session.commit.assert_awaited_once()
+    assert items[0]["group_ids"] == [7]
@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock
+
+import pytest
+from infrastructure.models.site import CountryEnum
+from services.site_stats import fold_site_stats, get_site_stats, verify_site_stats
+
+
+def make_stats(**overrides: float) -> dict:
+    """Build a stored stats row for France with consistent defaults."""
+    values = {
+        "country": CountryEnum.FR,
+        "site_count": 2,
+        "total_max_power_megawatt": 30.0,
+        "efficiency_sum": 0.0,
+        "efficiency_count": 0,
+        "useful_energy_sum": 1.6,
+        "useful_energy_count": 2,
+        **overrides,
+    }
+    return values
+
+
+def setup_verify_execute(
+    mock_session: MagicMock, actual: list[dict], stored: list[dict]
+) -> None:
+    """Helper to mock the snapshot, recompute, stored-stats and fix queries."""
+    recompute_result = MagicMock()
+    recompute_result.mappings.return_value.all.return_value = actual
+    stored_result = MagicMock()
+    stored_result.mappings.return_value.all.return_value = stored
+    mock_session.execute.side_effect = [
+        MagicMock(),
+        recompute_result,
+        stored_result,
+        MagicMock(),
+        MagicMock(),
+        MagicMock(),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_site_stats_derives_averages(mock_session: MagicMock) -> None:
+    """
+    Test averages are derived from sums and non-null counts, read from the
+    summary plus the pending deltas.
+    """
+    execute_result = MagicMock()
+    execute_result.mappings.return_value.all.return_value = [make_stats()]
+    mock_session.execute.return_value = execute_result
+
+    stats = await get_site_stats(mock_session)
+
+    statement = str(mock_session.execute.call_args.args[0])
+    assert "FROM site_country_stats UNION ALL" in statement
+    assert "FROM site_country_stats_deltas" in statement
+    assert stats == [
+        {
+            "country": CountryEnum.FR,
+            "site_count": 2,
+            "total_max_power_megawatt": 30.0,
+            "average_max_power_megawatt": 15.0,
+            "average_efficiency": None,
+            "average_useful_energy_at_1_megawatt": 0.8,
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_verify_site_stats_consistent(mock_session: MagicMock) -> None:
+    """
+    Test no drift is reported when the summary matches a recomputation.
+    """
+    stored = make_stats()
+    actual = {field: stored[field] for field in ("country", "site_count")}
+    actual.update(
+        total_max_power_megawatt=30.0 + 1e-12,
+        efficiency_sum=0.0,
+        efficiency_count=0,
+        useful_energy_sum=1.6,
+        useful_energy_count=2,
+    )
+    setup_verify_execute(mock_session, [actual], [stored])
+
+    assert await verify_site_stats(mock_session) == []
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_verify_site_stats_reports_and_fixes_drift(
+    mock_session: MagicMock,
+) -> None:
+    """
+    Test drifted fields are reported and the summary rebuilt with `fix`.
+    """
+    stored = make_stats(site_count=3)
+    actual = {
+        "country": CountryEnum.FR,
+        "site_count": 2,
+        "total_max_power_megawatt": 30.0,
+        "efficiency_sum": 0.0,
+        "efficiency_count": 0,
+        "useful_energy_sum": 1.6,
+        "useful_energy_count": 2,
+    }
+    setup_verify_execute(mock_session, [actual], [stored])
+
+    drifts = await verify_site_stats(mock_session, fix=True)
+
+    assert drifts == [
+        {"country": CountryEnum.FR, "field": "site_count", "stored": 3, "actual": 2}
+    ]
+    statements = [str(c.args[0]) for c in mock_session.execute.call_args_list]
+    assert statements[0] == "LOCK TABLE sites IN SHARE MODE"
+    assert statements[3].startswith("DELETE FROM site_country_stats_deltas")
+    assert statements[4] == "DELETE FROM site_country_stats"
+    assert statements[5].startswith("INSERT INTO site_country_stats")
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_fold_site_stats(mock_session: MagicMock) -> None:
+    """
+    Test the pending deltas are moved into the summary in one statement.
+    """
+    await fold_site_stats(mock_session)
+
+    statement = str(mock_session.execute.call_args.args[0])
+    assert statement.startswith(
+        "WITH folded AS \n(DELETE FROM site_country_stats_deltas"
+    )
+    assert "INSERT INTO site_country_stats" in statement
+    assert "ORDER BY folded.country" in statement
+    assert "ON CONFLICT (country) DO UPDATE" in statement
+    mock_session.commit.assert_called_once()